@@ -1,12 +1,20 @@
+import csv
+import itertools
+import tempfile
+
+from asgiref.sync import sync_to_async
 from django.contrib import admin
+from django.core.handlers.asgi import ASGIRequest
 from django.utils.html import format_html
-from django.http import HttpResponse
+from django.http import FileResponse, StreamingHttpResponse
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
+from chapters.admin import PricedModelAdmin
+from chapters.pricing import price_many
 from .models import Application, ApplicationAnswer, ReintroductionAnswer, ActiveApplication, ArchivedApplication, ShortStayWarning, PricingSettings, ReintroductionQuestionSettings
 
 @admin.register(ReintroductionQuestionSettings)
@@ -80,38 +88,51 @@ class PricingSettingsAdmin(admin.ModelAdmin):
         # Prevent deleting the only instance
         return False
 
+EXPORT_CHUNK_SIZE = 500
+EXPORT_HEADER = ['Name', 'Email', 'Chapter', 'Status', 'Total Cost']
+
+
+def export_row_chunks(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield the export rows in chunks of chunk_size applications.
+    Rows are streamed from the database and each chunk is priced with one price_many call.
+    """
+    def rows(applications):
+        quotes = price_many(applications, breakdown=False)
+        return [[
+            f"{app.first_name} {app.last_name}",
+            app.email,
+            str(app.chapter) if app.chapter else 'N/A',
+            app.application_status,
+            f"₩{quotes[app.pk].cost:,.2f}"
+        ] for app in applications]
+
+    chunk = []
+    for app in queryset.select_related('chapter').iterator(chunk_size=chunk_size):
+        chunk.append(app)
+        if len(chunk) == chunk_size:
+            yield rows(chunk)
+            chunk = []
+    if chunk:
+        yield rows(chunk)
+
+
 def export_to_pdf(modeladmin, request, queryset):
-    # Create the HttpResponse object with PDF headers
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="applications.pdf"'
-    
-    # Create the PDF object using ReportLab
-    doc = SimpleDocTemplate(response, pagesize=letter)
+    # Build into a temporary file that only spills to disk for large exports
+    output = tempfile.SpooledTemporaryFile(max_size=5 * 1024 * 1024)
+    doc = SimpleDocTemplate(output, pagesize=letter)
     elements = []
     
     # Define styles
     styles = getSampleStyleSheet()
     title_style = styles['Heading1']
-    normal_style = styles['Normal']
     
     # Add title
     elements.append(Paragraph('Applications Report', title_style))
     elements.append(Spacer(1, 12))
     
-    # Create table data
-    data = [['Name', 'Email', 'Chapter', 'Status', 'Total Cost']]
-    for app in queryset:
-        data.append([
-            f"{app.first_name} {app.last_name}",
-            app.email,
-            str(app.chapter) if app.chapter else 'N/A',
-            app.application_status,
-            app.total_cost
-        ])
-    
-    # Create table
-    table = Table(data)
-    table.setStyle(TableStyle([
+    # One table per chunk, each repeating the header row on every page it spans
+    table_style = TableStyle([
         ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
         ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
         ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
@@ -124,15 +145,54 @@ def export_to_pdf(modeladmin, request, queryset):
         ('FONTSIZE', (0, 1), (-1, -1), 12),
         ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
         ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    elements.append(table)
+    ])
+    chunks = export_row_chunks(queryset)
+    # Start with an empty chunk when nothing is selected so the header is still drawn
+    for rows in itertools.chain([next(chunks, [])], chunks):
+        table = Table([EXPORT_HEADER] + rows, repeatRows=1)
+        table.setStyle(table_style)
+        elements.append(table)
     
     # Build PDF
     doc.build(elements)
-    return response
+    output.seek(0)
+    return FileResponse(output, as_attachment=True, filename='applications.pdf', content_type='application/pdf')
 
 export_to_pdf.short_description = "Export selected applications to PDF"
 
+
+class Echo:
+    """File-like object whose write() hands the line back, for streaming csv.writer output."""
+
+    def write(self, value):
+        return value
+
+
+def export_to_csv(modeladmin, request, queryset):
+    writer = csv.writer(Echo())
+
+    def lines():
+        yield writer.writerow(EXPORT_HEADER)
+        for rows in export_row_chunks(queryset):
+            for row in rows:
+                yield writer.writerow(row)
+
+    async def async_lines():
+        # Under ASGI a sync iterator is buffered in full before sending, so fetch
+        # each chunk in the sync thread and hand it over as soon as it is priced
+        yield writer.writerow(EXPORT_HEADER)
+        chunks = export_row_chunks(queryset)
+        next_chunk = sync_to_async(next)
+        while (rows := await next_chunk(chunks, None)) is not None:
+            yield ''.join(writer.writerow(row) for row in rows)
+
+    content = async_lines() if isinstance(request, ASGIRequest) else lines()
+    response = StreamingHttpResponse(content, content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="applications.csv"'
+    return response
+
+export_to_csv.short_description = "Export selected applications to CSV"
+
 class ApplicationAnswerInline(admin.TabularInline):
     model = ApplicationAnswer
     extra = 0
@@ -155,13 +215,13 @@ class ReintroductionAnswerInline(admin.TabularInline):
     def has_add_permission(self, request, obj=None):
         return False
 
-class BaseApplicationAdmin(admin.ModelAdmin):
+class BaseApplicationAdmin(PricedModelAdmin):
     list_display = ('full_name', 'email', 'chapter', 'created_at', 'status', 'application_status', 'total_cost', 'manual_cost_display')
     list_filter = ('status', 'application_status', 'chapter', 'created_at')
     search_fields = ('first_name', 'last_name', 'email')
     readonly_fields = ('created_by', 'created_at', 'modified_at', 'total_cost', 'wants_reintroduction', 'reintroduction_completed')
     inlines = [ApplicationAnswerInline, ReintroductionAnswerInline]
-    actions = [export_to_pdf]
+    actions = [export_to_pdf, export_to_csv]
 
     def full_name(self, obj):
         return f"{obj.first_name} {obj.last_name}"
@@ -0,0 +1,70 @@
+"""
+Batch access to the answers of one application. AnswerStore reads every answer
+in one query, serves lookups from memory and writes all changed answers back
+with a single upsert on the (application, question) unique constraint.
+"""
+from django.db import connections
+
+from .models import ApplicationAnswer
+
+
+class AnswerStore:
+    def __init__(self, application, model=ApplicationAnswer):
+        self.application = application
+        self.model = model
+        self._answers = dict(
+            model.objects.filter(application=application).order_by().values_list('question_id', 'answer')
+        )
+        self._changed = set()
+
+    def __contains__(self, question_id):
+        return question_id in self._answers
+
+    def get(self, question_id, default=''):
+        answer = self._answers.get(question_id)
+        return default if answer is None else answer
+
+    def is_answered(self, question_id):
+        """True once the question has a saved answer, even a blank one."""
+        return self._answers.get(question_id) is not None
+
+    def first_unanswered(self, questions):
+        """Index of the first of questions without an answer, or of the last question if all have one."""
+        for index, question in enumerate(questions):
+            if not self.is_answered(question.id):
+                return index
+        return max(len(questions) - 1, 0)
+
+    def set(self, question_id, answer):
+        if question_id not in self._answers or self._answers[question_id] != answer:
+            self._answers[question_id] = answer
+            self._changed.add(question_id)
+
+    def setdefault(self, question_id, answer=''):
+        if question_id not in self._answers:
+            self.set(question_id, answer)
+        return self.get(question_id)
+
+    def set_from_form(self, cleaned_data, skip_blank=False):
+        """Take the answers from a form's question_<id> fields."""
+        for field_name, value in cleaned_data.items():
+            if field_name.startswith('question_') and (value or not skip_blank):
+                self.set(int(field_name.split('_')[1]), value)
+
+    def save(self):
+        """Insert or update every changed answer in one query."""
+        if not self._changed:
+            return
+        # MySQL upserts on any unique key and refuses an explicit conflict target
+        features = connections[self.model.objects.db].features
+        target = ['application', 'question'] if features.supports_update_conflicts_with_target else None
+        self.model.objects.bulk_create(
+            [
+                self.model(application=self.application, question_id=question_id, answer=self._answers[question_id])
+                for question_id in sorted(self._changed)
+            ],
+            update_conflicts=True,
+            unique_fields=target,
+            update_fields=['answer'],
+        )
+        self._changed.clear()
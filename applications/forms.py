@@ -4,7 +4,9 @@ from django.utils.safestring import mark_safe
 from django.forms import inlineformset_factory
 from django.utils import timezone
 
-from .models import Application, ApplicationAnswer, Question
+from questions.snapshot import active_questions
+from .answers import AnswerStore
+from .models import Application, ApplicationAnswer
 
 class ApplicationDatesForm(forms.ModelForm):
     class Meta:
@@ -62,8 +64,7 @@ class ApplicationNameForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        active_questions = Question.objects.filter(is_active=True).order_by('order')
-        for question in active_questions:
+        for question in active_questions():
             self.fields[f'question_{question.id}'] = forms.CharField(
                 label=question.text,
                 required=question.required,
@@ -76,24 +77,18 @@ class ApplicationNameForm(forms.ModelForm):
             for field_name, value in cleaned_data.items():
                 if field_name.startswith('question_'):
                     question_id = int(field_name.split('_')[1])
-                    question = Question.objects.get(id=question_id)
-                    if question.required and not value:
+                    question = active_questions().get(question_id)
+                    if question and question.required and not value:
                         self.add_error(field_name, 'This field is required for submission.')
         return cleaned_data
 
     def save(self, commit=True):
         application = super().save(commit=commit)
         if commit:
-            # Save answers for dynamic questions
-            for field_name, value in self.cleaned_data.items():
-                if field_name.startswith('question_'):
-                    question_id = int(field_name.split('_')[1])
-                    question = Question.objects.get(id=question_id)
-                    ApplicationAnswer.objects.update_or_create(
-                        application=application,
-                        question=question,
-                        defaults={'answer': value}
-                    )
+            # Save answers for dynamic questions in one query
+            answers = AnswerStore(application)
+            answers.set_from_form(self.cleaned_data)
+            answers.save()
         return application
 
 class ApplicationEditForm(forms.ModelForm):
@@ -108,19 +103,16 @@ class ApplicationEditForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        if self.instance.pk:
-            active_questions = Question.objects.filter(is_active=True).order_by('order')
-            for question in active_questions:
-                answer = ApplicationAnswer.objects.filter(
-                    application=self.instance,
-                    question=question
-                ).first()
+        questions = active_questions()
+        if self.instance.pk and questions:
+            answers = AnswerStore(self.instance)
+            for question in questions:
                 field_name = f'question_{question.id}'
                 self.fields[field_name] = forms.CharField(
                     label=question.text,
                     required=False,  # Set to False initially
                     widget=forms.Textarea(attrs={'rows': 4}),
-                    initial=answer.answer if answer else ''
+                    initial=answers.get(question.id)
                 )
 
     def clean(self):
@@ -146,8 +138,8 @@ class ApplicationEditForm(forms.ModelForm):
             for field_name, value in field_items:
                 if field_name.startswith('question_'):
                     question_id = int(field_name.split('_')[1])
-                    question = Question.objects.get(id=question_id)
-                    if question.required and not value:
+                    question = active_questions().get(question_id)
+                    if question and question.required and not value:
                         self.add_error(field_name, 'This field is required.')
 
         return cleaned_data
@@ -155,14 +147,8 @@ class ApplicationEditForm(forms.ModelForm):
     def save(self, commit=True):
         application = super().save(commit=commit)
         if commit:
-            # Save answers for dynamic questions
-            for field_name, value in self.cleaned_data.items():
-                if field_name.startswith('question_'):
-                    question_id = int(field_name.split('_')[1])
-                    question = Question.objects.get(id=question_id)
-                    ApplicationAnswer.objects.update_or_create(
-                        application=application,
-                        question=question,
-                        defaults={'answer': value}
-                    )
+            # Save answers for dynamic questions in one query
+            answers = AnswerStore(application)
+            answers.set_from_form(self.cleaned_data)
+            answers.save()
         return application
@@ -0,0 +1,20 @@
+# Generated by Django 5.2 on 2026-10-18 08:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0012_shortstaywarning_long_stay_button_text_and_more'),
+        ('chapters', '0006_chapterbooking_booking_chapter_dates_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['created_by', 'status', 'is_active'], name='app_owner_status_active_idx'),
+        ),
+    ]
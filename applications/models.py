@@ -1,3 +1,5 @@
+import logging
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.conf import settings
@@ -6,6 +8,11 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 from chapters.models import ChapterBooking
 from django.core.exceptions import ValidationError
+from core import user_data, versioned_cache
+from core.tracking import FieldTrackerMixin
+from jobs.queue import enqueue
+
+logger = logging.getLogger(__name__)
 
 class PricingSettings(models.Model):
     member_discount = models.DecimalField(
@@ -53,16 +60,15 @@ class PricingSettings(models.Model):
 
     @classmethod
     def get_settings(cls):
-        settings = cls.objects.first()
-        if not settings:
-            settings = cls.objects.create()
-        return settings
+        # Fall back to unsaved defaults rather than writing a row during a read
+        return versioned_cache.get('pricing_settings', lambda: cls.objects.first() or cls())
 
+    # Unsaved defaults are floats, so go through str() to get exact Decimals
     def get_member_discount_decimal(self):
-        return self.member_discount / Decimal('100.0')
+        return Decimal(str(self.member_discount)) / Decimal('100.0')
 
     def get_guest_increase_decimal(self):
-        return self.guest_increase / Decimal('100.0')
+        return Decimal(str(self.guest_increase)) / Decimal('100.0')
 
     def get_formatted_texts(self):
         return {
@@ -73,7 +79,7 @@ class PricingSettings(models.Model):
             'note': self.calculation_note.format(discount=self.member_discount, increase=self.guest_increase)
         }
 
-class Application(models.Model):
+class Application(FieldTrackerMixin, models.Model):
     STATUS_CHOICES = [
         ('Draft', 'Draft'),
         ('Submitted', 'Submitted'),
@@ -123,39 +129,56 @@ class Application(models.Model):
     wants_reintroduction = models.BooleanField(null=True, blank=True, help_text="Whether the returning member wants to reintroduce themselves")
     reintroduction_completed = models.BooleanField(default=False, help_text="Whether the reintroduction form has been completed")
 
+    # Used by chapters.pricing.price_many
+    pricing_chapter_field = 'chapter'
+    uses_pricing_settings = True
+
+    tracked_fields = ('application_status',)
+
+    class Meta:
+        indexes = [
+            # A user's applications by status (applications list, user status, dashboard)
+            models.Index(fields=['created_by', 'status', 'is_active'], name='app_owner_status_active_idx'),
+        ]
+
     def clean(self):
         super().clean()
+        # Report a double booking here, where the admin sees it, rather than in the onboarding job
+        if self.is_starting_onboarding():
+            booking = self.build_booking()
+            if booking is not None:
+                try:
+                    booking.clean()
+                except ValidationError as error:
+                    raise ValidationError(
+                        [f'Cannot start onboarding: {message}' for message in error.messages]
+                    ) from error
         # Removed duplicate date validation to avoid double error messages
         # if self.date_join and self.date_leave:
         #     if self.date_leave <= self.date_join:
         #         raise ValidationError('Departure date must be after arrival date.')
         #     # Removed 93-day validation here
 
-    def calculate_cost(self):
+    def calculate_cost(self, pricing_settings=None):
         if self.manual_cost is not None:
             return self.manual_cost
             
         if self.chapter and self.date_join and self.date_leave:
-            settings = PricingSettings.get_settings()
+            settings = pricing_settings or PricingSettings.get_settings()
             nights = (self.date_leave - self.date_join).days
             
             # Use tiered pricing if enabled, otherwise fall back to legacy pricing
             base_cost = self.chapter.calculate_tiered_cost(nights)
-            print(f"Initial base cost (tiered): {base_cost}")
-            print(f"Member type: {self.member_type}")
-            print(f"Number of guests: {self.guests}")
             
             # Apply member discount for returning members
             if self.member_type == 'returning member':
                 discount = round(base_cost * settings.get_member_discount_decimal(), 2)
                 base_cost = base_cost - discount
-                print(f"After returning member discount ({settings.member_discount}%): {base_cost}")
             
             # Apply increase for 2 guests
             if self.guests == '2':
                 increase = round(base_cost * settings.get_guest_increase_decimal(), 2)
                 base_cost = base_cost + increase
-                print(f"After guest increase ({settings.guest_increase}%): {base_cost}")
             
             return round(base_cost, 2)
         return Decimal('0.00')
@@ -165,7 +188,7 @@ class Application(models.Model):
         """Return the formatted total cost with Korean Won sign and commas."""
         return f"₩{self.calculate_cost():,.2f}"
     
-    def get_pricing_breakdown(self):
+    def get_pricing_breakdown(self, pricing_settings=None):
         """Get a detailed breakdown of pricing for this application."""
         if not self.chapter or not self.date_join or not self.date_leave:
             return []
@@ -174,7 +197,7 @@ class Application(models.Model):
         breakdown = self.chapter.get_pricing_breakdown(nights)
         
         # Apply member discount and guest increase to the breakdown
-        settings = PricingSettings.get_settings()
+        settings = pricing_settings or PricingSettings.get_settings()
         
         # Calculate total before adjustments
         total_before_adjustments = sum(item['total_cost'] for item in breakdown)
@@ -207,123 +230,131 @@ class Application(models.Model):
             'tiers': breakdown,
             'adjustments': adjustments,
             'total_nights': nights,
-            'final_total': self.calculate_cost()
+            'final_total': self.calculate_cost(settings)
         }
 
     @property
     def is_editable(self):
         return self.status == 'Draft'  # Only allow editing for Draft status
 
+    def is_starting_onboarding(self):
+        """Whether application_status has changed to 'Onboarding' since the application was loaded."""
+        return bool(
+            self.pk and
+            self.previous('application_status') != 'Onboarding' and
+            self.application_status == 'Onboarding'
+        )
+
     def save(self, *args, **kwargs):
-        # Check if this is a new instance or if application_status has changed to 'Onboarding'
-        if self.pk:
-            old_instance = Application.objects.get(pk=self.pk)
-            if old_instance.application_status != 'Onboarding' and self.application_status == 'Onboarding':
-                # Create chapter booking when status changes to Onboarding
-                if self.chapter and self.date_join and self.date_leave:
-                    ChapterBooking.objects.create(
-                        chapter=self.chapter,
-                        start_date=self.date_join,
-                        end_date=self.date_leave
-                    )
-                
-                # Create coliver and automatic payments when status changes to Onboarding
-                print(f"🎯 Application status changed to ONBOARDING for {self.first_name} {self.last_name}")
-                self._create_coliver_and_payments()
-        
+        started_onboarding = self.is_starting_onboarding()
         super().save(*args, **kwargs)
+        if started_onboarding:
+            # The booking, coliver and payments are created by a background job
+            self.enqueue_onboarding()
+
+    def enqueue_onboarding(self):
+        """Queue the onboarding job (applications.tasks.onboard_application) for this application."""
+        return enqueue(
+            'applications.onboard',
+            {'application_id': self.pk},
+            # modified_at was just stamped by the save that entered Onboarding, so
+            # each transition gets its own job and repeat saves within it do not
+            idempotency_key=f'applications.onboard:{self.pk}:{self.modified_at.isoformat()}'
+        )
+
+    def build_booking(self):
+        """The unsaved chapter booking for this stay, or None without a chapter and both dates."""
+        if self.chapter and self.date_join and self.date_leave:
+            return ChapterBooking(
+                chapter=self.chapter,
+                start_date=self.date_join,
+                end_date=self.date_leave
+            )
+        return None
+
+    def onboard(self):
+        """Create the chapter booking, coliver and automatic payments for an onboarding application."""
+        booking = self.build_booking()
+        if booking is not None:
+            # clean() catches this when the status changes, but another booking may
+            # have taken the dates since; the job then fails with a clear message
+            booking.full_clean()
+            booking.save()
+        
+        logger.info('Onboarding application %s', self.pk)
+        self._create_coliver_and_payments()
     
     def _create_coliver_and_payments(self):
         """Create coliver and automatic payments when application status changes to Onboarding"""
-        try:
-            from colivers.models import Coliver
-            from payments.models import AutomaticPaymentTemplate, AutomaticPayment
-            
-            # Create or update coliver - use arrival/departure dates for unique identification
-            coliver, coliver_created = Coliver.objects.get_or_create(
-                user=self.created_by,
-                first_name=self.first_name,
-                last_name=self.last_name,
-                email=self.email,
-                arrival_date=self.date_join,
-                departure_date=self.date_leave,
-                defaults={
-                    'chapter_name': self.chapter,
-                    'status': 'ONBOARDING',
-                    'manual_cost': self.manual_cost,
-                    'is_active': True
-                }
-            )
-            
-            if coliver_created:
-                print(f"✓ Created new coliver record for {coliver.first_name} {coliver.last_name}")
-            else:
-                print(f"⚠ Found existing coliver for {coliver.first_name} {coliver.last_name}")
-                # Update existing coliver with new application data
-                coliver.chapter_name = self.chapter
-                coliver.manual_cost = self.manual_cost
-                coliver.status = 'ONBOARDING'
-                coliver.is_active = True
-                coliver.save()
-                print(f"✓ Updated existing coliver with new application data")
-            
-            # Create automatic payments for this coliver
-            templates = AutomaticPaymentTemplate.objects.filter(
-                is_active=True, 
-                applies_to_all_colivers=True
-            )
+        from colivers.models import Coliver
+        from payments.models import AutomaticPaymentTemplate, AutomaticPayment
+        
+        # Create or update coliver - use arrival/departure dates for unique identification
+        coliver, coliver_created = Coliver.objects.get_or_create(
+            user=self.created_by,
+            first_name=self.first_name,
+            last_name=self.last_name,
+            email=self.email,
+            arrival_date=self.date_join,
+            departure_date=self.date_leave,
+            defaults={
+                'chapter_name': self.chapter,
+                'status': 'ONBOARDING',
+                'manual_cost': self.manual_cost,
+                'is_active': True
+            }
+        )
+        
+        if coliver_created:
+            logger.info('Created coliver %s for application %s', coliver.pk, self.pk)
+        else:
+            # Update existing coliver with new application data
+            coliver.chapter_name = self.chapter
+            coliver.manual_cost = self.manual_cost
+            coliver.status = 'ONBOARDING'
+            coliver.is_active = True
+            coliver.save()
+            logger.info('Updated existing coliver %s from application %s', coliver.pk, self.pk)
+        
+        # Create automatic payments for this coliver
+        templates = AutomaticPaymentTemplate.objects.filter(
+            is_active=True, 
+            applies_to_all_colivers=True
+        )
+        
+        payment_count = 0
+        for template in templates:
+            # Check if payment already exists for this specific template and coliver
+            existing_auto_payment = AutomaticPayment.objects.filter(
+                template=template,
+                coliver=coliver
+            ).first()
             
-            payment_count = 0
-            for template in templates:
-                try:
-                    # Check if payment already exists for this specific template and coliver
-                    existing_auto_payment = AutomaticPayment.objects.filter(
-                        template=template,
-                        coliver=coliver
-                    ).first()
+            if existing_auto_payment:
+                # Check if we need to update the existing payment with new application data
+                payment = existing_auto_payment.payment
+                if payment.status == 'requested':  # Only update if not yet processed
+                    new_amount = template.calculate_amount(coliver)
+                    new_due_date = template.calculate_due_date(coliver)
                     
-                    if existing_auto_payment:
-                        print(f"⚠ Payment already exists for template '{template.title}' and coliver {coliver.first_name} {coliver.last_name}")
-                        # Check if we need to update the existing payment with new application data
-                        payment = existing_auto_payment.payment
-                        if payment.status == 'requested':  # Only update if not yet processed
-                            new_amount = template.calculate_amount(coliver)
-                            new_due_date = template.calculate_due_date(coliver)
-                            
-                            # Update payment with recalculated values
-                            payment.amount = new_amount
-                            payment.due_date = new_due_date
-                            
-                            # Update description with new details
-                            payment.description = template.description_template.format(
-                                coliver_name=f"{coliver.first_name} {coliver.last_name}",
-                                chapter_name=coliver.chapter_name.name if coliver.chapter_name else "No Chapter",
-                                arrival_date=coliver.arrival_date.strftime('%Y-%m-%d') if coliver.arrival_date else "TBD",
-                                departure_date=coliver.departure_date.strftime('%Y-%m-%d') if coliver.departure_date else "TBD"
-                            )
-                            
-                            payment.save()
-                            print(f"✓ Updated existing payment '{template.title}' for {coliver.first_name} {coliver.last_name}")
-                            payment_count += 1
-                    else:
-                        # Create new automatic payment for this coliver
-                        payment = template.create_payment_for_coliver(coliver)
-                        if payment:
-                            payment_count += 1
-                            print(f"✓ Created new automatic payment '{template.title}' for {coliver.first_name} {coliver.last_name}")
-                        
-                except Exception as e:
-                    print(f"✗ Error creating/updating automatic payment '{template.title}' for {coliver.first_name} {coliver.last_name}: {e}")
-            
-            if payment_count > 0:
-                print(f"🎉 Successfully created/updated {payment_count} automatic payments for {coliver.first_name} {coliver.last_name}")
+                    # Update payment with recalculated values
+                    payment.amount = new_amount
+                    payment.due_date = new_due_date
+                    
+                    # Update description with new details
+                    payment.description = template.format_description(coliver)
+                    
+                    payment.save()
+                    logger.debug('Updated payment %s from template %s for coliver %s', payment.pk, template.pk, coliver.pk)
+                    payment_count += 1
             else:
-                print(f"⚠ No automatic payments were created/updated for {coliver.first_name} {coliver.last_name}")
-                
-        except Exception as e:
-            print(f"✗ Error in _create_coliver_and_payments: {e}")
-            import traceback
-            traceback.print_exc()
+                # Create new automatic payment for this coliver
+                payment = template.create_payment_for_coliver(coliver)
+                if payment:
+                    payment_count += 1
+                    logger.debug('Created payment %s from template %s for coliver %s', payment.pk, template.pk, coliver.pk)
+        
+        logger.info('Created or updated %d automatic payments for coliver %s', payment_count, coliver.pk)
 
     def withdraw(self):
         """Withdraw the application."""
@@ -398,6 +429,10 @@ class ReintroductionQuestionSettings(models.Model):
 
     @classmethod
     def get_active(cls):
+        return versioned_cache.get('reintroduction_question_settings', cls._load_active)
+
+    @classmethod
+    def _load_active(cls):
         try:
             return cls.objects.get(is_active=True)
         except cls.DoesNotExist:
@@ -440,6 +475,10 @@ class ShortStayWarning(models.Model):
 
     @classmethod
     def get_active(cls):
+        return versioned_cache.get('short_stay_warning', cls._load_active)
+
+    @classmethod
+    def _load_active(cls):
         try:
             return cls.objects.get(is_active=True)
         except cls.DoesNotExist:
@@ -455,4 +494,10 @@ class ShortStayWarning(models.Model):
                 long_stay_button_text="I understand, continue anyway"
             )
     
-    
\ No newline at end of file
+    
+
+
+versioned_cache.register('pricing_settings', PricingSettings)
+versioned_cache.register('reintroduction_question_settings', ReintroductionQuestionSettings)
+versioned_cache.register('short_stay_warning', ShortStayWarning)
+user_data.register('created_by', Application)
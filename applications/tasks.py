@@ -0,0 +1,18 @@
+from django.core.exceptions import ValidationError
+
+from jobs.queue import PermanentError, register
+from .models import Application
+
+
+@register('applications.onboard')
+def onboard_application(application_id):
+    """Create the booking, coliver and payments for an application moved to Onboarding."""
+    application = Application.objects.select_related('chapter', 'created_by').get(pk=application_id)
+    # The status may have moved on while the job was waiting in the queue
+    if application.application_status != 'Onboarding':
+        return
+    try:
+        application.onboard()
+    except ValidationError as error:
+        # The stay no longer fits the chapter; retrying will not change that
+        raise PermanentError(f'Application {application_id} cannot be onboarded: {"; ".join(error.messages)}') from error
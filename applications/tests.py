@@ -1,9 +1,30 @@
-from django.test import TestCase
-from .models import ShortStayWarning
+from datetime import date, timedelta
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from chapters.models import Chapter, ChapterBooking
+from colivers.models import Coliver
+from jobs.models import Job
+from jobs.queue import run_pending
+from questions.models import Question
+from .admin import export_row_chunks
+from .answers import AnswerStore
+from .models import Application, ApplicationAnswer, PricingSettings, ShortStayWarning
 
 # Create your tests here.
 
 class ShortStayWarningTestCase(TestCase):
+    def setUp(self):
+        # get_active is cached, and test rollbacks don't send the signals that invalidate it
+        cache.clear()
+
     def test_default_minimum_days(self):
         """Test that the default minimum_days is 28"""
         warning = ShortStayWarning.objects.create(
@@ -136,3 +157,279 @@ class ShortStayWarningTestCase(TestCase):
         self.assertEqual(active_warning.id, warning2.id)
         self.assertEqual(active_warning.minimum_days, 30)
         self.assertEqual(active_warning.maximum_days, 120)
+
+
+class SuggestWindowsViewTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='suggest', password='testpass123', is_staff=True)
+        self.client.force_login(self.user)
+        self.chapter = Chapter.objects.create(name='Booked', created_by=self.user)
+        self.start = date.today() + timedelta(days=30)
+        ChapterBooking.objects.create(chapter=self.chapter, start_date=self.start, end_date=self.start + timedelta(days=10))
+
+    def test_returns_nearest_windows_as_json(self):
+        """Test that the endpoint suggests the first free stay after a booked period"""
+        response = self.client.get(reverse('suggest_windows'), {
+            'date_join': (self.start + timedelta(days=2)).isoformat(),
+            'date_leave': (self.start + timedelta(days=5)).isoformat(),
+        })
+        self.assertEqual(response.status_code, 200)
+        windows = response.json()['chapters'][0]['windows']
+        self.assertEqual(windows[0]['arrival'], (self.start - timedelta(days=3)).isoformat())
+        self.assertEqual(windows[1]['arrival'], (self.start + timedelta(days=10)).isoformat())
+
+        response = self.client.get(reverse('suggest_windows'), {'date_join': 'soon'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ApplicationsListCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='lister', password='testpass123')
+        self.application = Application.objects.create(
+            created_by=self.user, first_name='Cached', last_name='Name', email='c@example.com'
+        )
+        self.client.force_login(self.user)
+
+    def test_list_is_rendered_once_per_data_version(self):
+        """Test that the list fragment skips its query until one of the user's applications changes"""
+        self.client.get(reverse('applications_list'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('applications_list'))
+        self.assertContains(response, 'Cached Name')
+        selects = [q for q in queries if 'ORDER BY "applications_application"."created_at" DESC' in q['sql']]
+        self.assertEqual(selects, [])
+
+        self.application.first_name = 'Renamed'
+        self.application.save()
+        self.assertContains(self.client.get(reverse('applications_list')), 'Renamed Name')
+
+
+class AnswerStoreTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='answerer', password='testpass123')
+        self.application = Application.objects.create(
+            created_by=self.user, first_name='A', last_name='B', email='a@example.com'
+        )
+        self.questions = [Question.objects.create(text=f'Question {i}', order=i) for i in range(4)]
+        ApplicationAnswer.objects.create(application=self.application, question=self.questions[0], answer='Yes')
+        ApplicationAnswer.objects.create(application=self.application, question=self.questions[1], answer='')
+
+    def test_first_gap_found_in_one_query(self):
+        """Test that blank answers count as answered and missing ones do not"""
+        with self.assertNumQueries(1):
+            store = AnswerStore(self.application)
+            self.assertEqual(store.first_unanswered(self.questions), 2)
+        self.assertEqual(store.first_unanswered(self.questions[:2]), 1)
+        self.assertEqual(store.first_unanswered([]), 0)
+
+    def test_changed_answers_saved_in_one_query(self):
+        """Test that updates and inserts go out as a single upsert, and unchanged answers are skipped"""
+        store = AnswerStore(self.application)
+        store.set(self.questions[0].id, 'Yes')
+        store.set(self.questions[1].id, 'Changed')
+        store.set(self.questions[3].id, 'New')
+        with self.assertNumQueries(1):
+            store.save()
+        with self.assertNumQueries(0):
+            store.save()
+
+        saved = dict(ApplicationAnswer.objects.filter(application=self.application).values_list('question__order', 'answer'))
+        self.assertEqual(saved, {0: 'Yes', 1: 'Changed', 3: 'New'})
+
+    def test_edit_continues_at_the_first_unanswered_question(self):
+        """Test that editing questions resumes at the first gap"""
+        self.client.force_login(self.user)
+        session = self.client.session
+        session['edit_questions'] = True
+        session.save()
+        response = self.client.get(reverse('application_edit', args=[self.application.pk]))
+        self.assertRedirects(response, reverse('application_step2'), fetch_redirect_response=False)
+        self.assertEqual(self.client.session['current_question_index'], 2)
+
+
+class AvailabilityMatrixTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='matrix', password='testpass123', is_staff=True)
+        self.client.force_login(self.user)
+
+    def add_chapters(self, count):
+        for i in range(count):
+            chapter = Chapter.objects.create(name=f'Chapter {Chapter.objects.count()}', created_by=self.user)
+            ChapterBooking.objects.create(
+                chapter=chapter,
+                start_date=date.today() + timedelta(days=i),
+                end_date=date.today() + timedelta(days=i + 5)
+            )
+
+    def count_queries(self, days):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('availability_matrix'), {'days': days})
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_is_independent_of_chapters_and_days(self):
+        """Test that the matrix is served in a fixed number of queries"""
+        self.add_chapters(2)
+        baseline = self.count_queries(14)
+        self.add_chapters(8)
+        self.assertEqual(self.count_queries(14), baseline)
+        self.assertEqual(self.count_queries(365), baseline)
+
+    def test_days_parameter_is_clamped(self):
+        """Test that oversized or invalid day counts fall back to sane values"""
+        response = self.client.get(reverse('availability_matrix'), {'days': 5000})
+        self.assertEqual(response.context['days_to_show'], 366)
+        response = self.client.get(reverse('availability_matrix'), {'days': 'abc'})
+        self.assertEqual(response.context['days_to_show'], 30)
+
+
+class PricingSettingsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_get_settings_does_not_write(self):
+        """Test that reading pricing settings never creates a row"""
+        settings = PricingSettings.get_settings()
+        self.assertIsNone(settings.pk)
+        self.assertEqual(settings.member_discount, 3.00)
+        self.assertFalse(PricingSettings.objects.exists())
+
+    def test_get_settings_is_cached_until_saved(self):
+        """Test that settings are served from the cache and refreshed after a save"""
+        settings = PricingSettings.objects.create(member_discount=5)
+        PricingSettings.get_settings()
+        with self.assertNumQueries(0):
+            self.assertEqual(PricingSettings.get_settings().member_discount, 5)
+
+        settings.member_discount = 7
+        settings.save()
+        self.assertEqual(PricingSettings.get_settings().member_discount, 7)
+
+
+class ApplicationExportTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='testpass123')
+        chapter = Chapter.objects.create(name='Export', created_by=self.admin, cost_per_night=100)
+        for i in range(5):
+            Application.objects.create(
+                created_by=self.admin, first_name='Guest', last_name=str(i), email=f'guest{i}@example.com',
+                chapter=chapter, date_join=date(2025, 1, 1), date_leave=date(2025, 1, 2 + i)
+            )
+        self.client.force_login(self.admin)
+
+    def export(self, action):
+        ids = Application.objects.values_list('pk', flat=True)
+        return self.client.post(reverse('admin:applications_activeapplication_changelist'), {
+            'action': action, '_selected_action': list(ids)
+        })
+
+    def test_csv_export_streams_priced_rows(self):
+        """Test that the CSV export streams a header and one priced row per application"""
+        response = self.export('export_to_csv')
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'Name,Email,Chapter,Status,Total Cost')
+        self.assertEqual(len(lines), 6)
+        self.assertIn('Guest 4,guest4@example.com,Export,Application in progress,₩500.00', lines)
+
+    async def test_csv_export_streams_asynchronously_under_asgi(self):
+        """Test that ASGI requests get an async iterator, so the server does not buffer the export"""
+        await self.async_client.aforce_login(self.admin)
+        ids = await sync_to_async(list)(Application.objects.values_list('pk', flat=True))
+        response = await self.async_client.post(reverse('admin:applications_activeapplication_changelist'), {
+            'action': 'export_to_csv', '_selected_action': ids
+        })
+        self.assertTrue(response.is_async)
+        lines = b''.join([chunk async for chunk in response.streaming_content]).decode().splitlines()
+        self.assertEqual(len(lines), 6)
+
+    def test_pdf_export(self):
+        """Test that the PDF export is returned as a file attachment"""
+        response = self.export('export_to_pdf')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertIn('applications.pdf', response['Content-Disposition'])
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+
+    def test_rows_are_priced_per_chunk(self):
+        """Test that rows are chunked and pricing adds no queries per row"""
+        with self.assertNumQueries(2):
+            chunks = list(export_row_chunks(Application.objects.all(), chunk_size=2))
+        self.assertEqual([len(rows) for rows in chunks], [2, 2, 1])
+
+
+class OnboardingJobTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='testpass123', is_staff=True)
+        self.chapter = Chapter.objects.create(name='Onboard', created_by=self.admin, cost_per_night=100)
+        self.application = Application.objects.create(
+            created_by=self.admin, first_name='New', last_name='Member', email='new@example.com',
+            chapter=self.chapter, date_join=date(2025, 3, 1), date_leave=date(2025, 4, 1)
+        )
+
+    def onboard(self):
+        self.application.application_status = 'Onboarding'
+        self.application.save()
+
+    @override_settings(JOBS_SYNC=False)
+    def test_save_only_enqueues(self):
+        """Test that moving to Onboarding queues one job and defers the work to a worker"""
+        self.onboard()
+        self.assertFalse(Coliver.objects.exists())
+        job = Job.objects.get(name='applications.onboard')
+        self.assertEqual(job.payload, {'application_id': self.application.pk})
+
+        # Saving again while still onboarding does not queue another job
+        self.application.save()
+        self.assertEqual(Job.objects.count(), 1)
+
+        run_pending()
+        self.assertTrue(Coliver.objects.filter(user=self.admin, chapter_name=self.chapter).exists())
+        self.assertTrue(ChapterBooking.objects.filter(chapter=self.chapter, start_date=date(2025, 3, 1)).exists())
+
+    @override_settings(JOBS_SYNC=False)
+    def test_reentering_onboarding_queues_a_new_job(self):
+        """Test that leaving and re-entering Onboarding with the same stay runs the job again"""
+        self.onboard()
+        run_pending()
+        ChapterBooking.objects.all().delete()
+        Coliver.objects.all().delete()
+
+        self.application.application_status = 'Accepted'
+        self.application.save()
+        self.onboard()
+
+        self.assertEqual(Job.objects.filter(name='applications.onboard', status='queued').count(), 1)
+        run_pending()
+        self.assertTrue(Coliver.objects.filter(user=self.admin, chapter_name=self.chapter).exists())
+
+    def test_double_booking_is_reported_when_onboarding_starts(self):
+        """Test that clean rejects moving to Onboarding when the chapter is already booked"""
+        ChapterBooking.objects.create(chapter=self.chapter, start_date=date(2025, 3, 20), end_date=date(2025, 4, 10))
+        self.application.application_status = 'Onboarding'
+        with self.assertRaisesMessage(ValidationError, 'Cannot start onboarding'):
+            self.application.full_clean()
+
+    @override_settings(JOBS_SYNC=False)
+    def test_double_booking_fails_the_job_without_retrying(self):
+        """Test that a booking taken while the job waited fails it at once instead of retrying"""
+        self.onboard()
+        ChapterBooking.objects.create(chapter=self.chapter, start_date=date(2025, 3, 20), end_date=date(2025, 4, 10))
+
+        with self.assertLogs('jobs.queue', level='ERROR'):
+            run_pending()
+        job = Job.objects.get(name='applications.onboard')
+        self.assertEqual((job.status, job.attempts), ('failed', 1))
+        self.assertIn('already booked', job.last_error)
+        self.assertFalse(Coliver.objects.exists())
+
+    @override_settings(JOBS_SYNC=True)
+    def test_sync_mode_onboards_during_save(self):
+        """Test that in sync mode the coliver exists as soon as save returns"""
+        self.onboard()
+        self.assertTrue(Coliver.objects.filter(user=self.admin).exists())
+        self.assertEqual(Job.objects.get().status, 'done')
@@ -12,5 +12,6 @@ urlpatterns = [
     path('reintroduction-form/', views.reintroduction_form, name='reintroduction_form'),
     path('success/', views.application_success, name='application_success'),
     path('available-chapters/', views.available_chapters, name='available_chapters'),
+    path('suggest-windows/', views.suggest_windows, name='suggest_windows'),
     path('<int:pk>/withdraw/', views.withdraw_application, name='withdraw_application'),
 ]
@@ -1,3 +1,5 @@
+import logging
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from datetime import datetime, timedelta, date
@@ -9,9 +11,13 @@ from django.http import JsonResponse
 from django.urls import reverse
 
 from .forms import ApplicationDatesForm, ApplicationNameForm, ApplicationEditForm          
+from chapters import availability
 from chapters.models import Chapter, ChapterBooking
+from .answers import AnswerStore
 from .models import Application, ApplicationAnswer, ReintroductionAnswer, ReintroductionQuestionSettings, ShortStayWarning, PricingSettings
-from questions.models import Question, ReintroductionQuestion
+from questions.snapshot import active_questions, active_reintroduction_questions
+
+logger = logging.getLogger(__name__)
 
 @login_required
 def applications_list(request):
@@ -140,6 +146,8 @@ def applications(request):
                         'is_short_term': is_short_term
                     })
 
+                add_suggested_windows(chapters_info, date_join, date_leave)
+
                 context = {
                     'form': form,
                     'chapters_info': chapters_info,
@@ -229,6 +237,8 @@ def applications(request):
                             'is_short_term': is_short_term
                         })
                     
+                    add_suggested_windows(chapters_info, date_join, date_leave)
+
                     context = {
                         'form': form,
                         'chapters_info': chapters_info,
@@ -265,21 +275,8 @@ def available_chapters(request):
     date_join = datetime.fromisoformat(application_data['date_join'])
     date_leave = datetime.fromisoformat(application_data['date_leave'])
 
-    # Get all chapters
-    all_chapters = Chapter.objects.all()
-    available_chapters = []
-
-    for chapter in all_chapters:
-        # Check if chapter has any conflicting bookings
-        conflicting_bookings = ChapterBooking.objects.filter(
-            chapter=chapter
-        ).filter(
-            models.Q(start_date__lte=date_leave) & 
-            models.Q(end_date__gte=date_join)
-        ).exists()
-
-        if not conflicting_bookings:
-            available_chapters.append(chapter)
+    # Get the chapters without conflicting bookings in a single query
+    available_chapters = list(availability.available_chapters(date_join, date_leave))
 
     if request.method == 'POST':
         selected_chapter = request.POST.get('chapter')
@@ -327,14 +324,14 @@ def application_step2(request):
     
     application = get_object_or_404(Application, id=application_id, created_by=request.user)
     
-    # Get all active questions ordered by their order field
-    questions = Question.objects.filter(is_active=True).order_by('order')
+    # Get all active questions ordered by their order field, from the cached snapshot
+    questions = active_questions()
     
     # Get current question index from session or default to 0
     current_question_index = request.session.get('current_question_index', 0)
     
     # If we've answered all questions, clear session and redirect to success
-    if current_question_index >= questions.count():
+    if current_question_index >= len(questions):
         if 'current_question_index' in request.session:
             del request.session['current_question_index']
         if 'application_id' in request.session:
@@ -347,19 +344,10 @@ def application_step2(request):
     
     current_question = questions[current_question_index]
     
-    # Get the answer for this question if it exists for this specific application
-    try:
-        answer = ApplicationAnswer.objects.get(
-            application=application,
-            question=current_question
-        )
-    except ApplicationAnswer.DoesNotExist:
-        # For new applications, create a blank answer
-        answer = ApplicationAnswer.objects.create(
-            application=application,
-            question=current_question,
-            answer=''
-        )
+    # Get the answer for this question, creating a blank one for new applications
+    answers = AnswerStore(application)
+    answers.setdefault(current_question.id)
+    answers.save()
 
     save_success = False
     if request.method == 'POST':
@@ -370,8 +358,8 @@ def application_step2(request):
             # Save the current answer
             answer_text = request.POST.get('answer')
             if answer_text:
-                answer.answer = answer_text
-                answer.save()
+                answers.set(current_question.id, answer_text)
+                answers.save()
             
             # Only clear edit_questions flag, preserve current_question_index
             if 'edit_questions' in request.session:
@@ -382,8 +370,8 @@ def application_step2(request):
         # Save the current answer regardless of direction
         answer_text = request.POST.get('answer')
         if answer_text is not None:  # Save even if empty string
-            answer.answer = answer_text
-            answer.save()
+            answers.set(current_question.id, answer_text)
+            answers.save()
         
         if action == 'previous':
             # Move to previous question
@@ -397,13 +385,13 @@ def application_step2(request):
             request.session['current_question_index'] = current_question_index + 1
             return redirect('application_step2')
 
-    total_questions = questions.count()
+    total_questions = len(questions)
     progress = int((current_question_index / total_questions) * 100)
 
     return render(request, 'applications/question_form.html', {
         'application': application,
         'question': current_question,
-        'answer': answer,
+        'answer': answers.get(current_question.id),
         'progress': progress,
         'current_step': current_question_index + 1,
         'total_steps': total_questions,
@@ -415,35 +403,58 @@ def application_success(request):
     return render(request, 'applications/application_success.html')
 
 def get_available_chapters(date_join, date_leave):
-    chapters = Chapter.objects.all()
-    chapters_with_availability = []
-    
-    for chapter in chapters:
-        # Check if there are any overlapping bookings
-        overlapping_bookings = ChapterBooking.objects.filter(
-            chapter=chapter,
-            end_date__gt=date_join,
-            start_date__lt=date_leave
-        ).exists()
-        
-        chapters_with_availability.append({
-            'chapter': chapter,
-            'is_available': not overlapping_bookings
-        })
-    
-    return chapters_with_availability
+    chapters = availability.chapters_with_availability(date_join, date_leave)
+    return [
+        {'chapter': chapter, 'is_available': chapter.is_available}
+        for chapter in chapters
+    ]
+
+def add_suggested_windows(chapters_info, date_join, date_leave):
+    """Attach the nearest free windows of the same length to every unavailable chapter."""
+    unavailable = [info['chapter'] for info in chapters_info if not info['is_available']]
+    if not unavailable:
+        return
+    suggestions = availability.suggest_windows(date_join, date_leave, chapters=unavailable, earliest=date.today())
+    for info in chapters_info:
+        info['suggested_windows'] = suggestions.get(info['chapter'].pk, [])
+
+@login_required
+def suggest_windows(request):
+    """JSON list of the nearest free windows per chapter for the requested stay."""
+    try:
+        date_join = date.fromisoformat(request.GET['date_join'])
+        date_leave = date.fromisoformat(request.GET['date_leave'])
+        nights = int(request.GET.get('nights') or (date_leave - date_join).days)
+    except (KeyError, ValueError):
+        return JsonResponse({'error': 'date_join and date_leave must be YYYY-MM-DD dates.'}, status=400)
+    if nights <= 0:
+        return JsonResponse({'error': 'The stay must be at least one night.'}, status=400)
+
+    chapters = Chapter.objects.only('id', 'name')
+    suggestions = availability.suggest_windows(
+        date_join, date_leave, nights=nights, chapters=chapters, earliest=date.today()
+    )
+    return JsonResponse({'chapters': [
+        {
+            'id': chapter.pk,
+            'name': chapter.name,
+            'windows': [
+                {
+                    'arrival': window.arrival.isoformat(),
+                    'departure': window.departure.isoformat(),
+                    'shift_days': window.shift_days,
+                }
+                for window in suggestions[chapter.pk]
+            ],
+        }
+        for chapter in chapters
+    ]})
 
 @login_required
 def edit_application(request, pk):
-    print("\n=== Starting edit_application view ===")
-    print(f"Request method: {request.method}")
-    print(f"POST data: {request.POST}")
-    print(f"Session data before: {dict(request.session)}")
+    logger.debug('edit_application %s for application %s', request.method, pk)
     
     application = get_object_or_404(Application, pk=pk, created_by=request.user)
-    print(f"Found application: {application.pk}")
-    print(f"Current application status: {application.status}")
-    print(f"Current chapter: {application.chapter_id if application.chapter_id else 'None'}")
     
     if not application.is_editable:
         messages.error(request, "This application has already been submitted and cannot be edited.")
@@ -451,7 +462,6 @@ def edit_application(request, pk):
     
     # Store application ID in session to maintain connection between modes
     request.session['application_id'] = application.pk
-    print(f"Stored application_id in session: {application.pk}")
     
     # Get the short stay warning message and pricing settings
     short_stay_message = ShortStayWarning.get_active()
@@ -459,13 +469,11 @@ def edit_application(request, pk):
     
     # Check if we're in question editing mode
     edit_questions = request.session.get('edit_questions', False)
-    print(f"Edit questions mode: {edit_questions}")
     
     if edit_questions:
-        print("\n=== Processing question editing mode ===")
         # Add support for reintroduction questions
         if application.member_type == 'returning member' and application.wants_reintroduction:
-            reintro_questions = list(ReintroductionQuestion.objects.filter(is_active=True).order_by('order'))
+            reintro_questions = active_reintroduction_questions()
             reintro_answers = {a.question_id: a for a in ReintroductionAnswer.objects.filter(application=application) if a.answer}
             last_answered_index = 0
             for idx, q in enumerate(reintro_questions):
@@ -478,54 +486,33 @@ def edit_application(request, pk):
             return redirect('reintroduction_question')
         else:
             # Regular questions logic for new members
-            questions = Question.objects.filter(is_active=True).order_by('order')
-            answers = ApplicationAnswer.objects.filter(application=application)
-            answered_question_ids = set(a.question_id for a in answers)
-            first_unanswered_index = 0
-            for idx, q in enumerate(questions):
-                if q.id not in answered_question_ids or not answers.filter(question=q, answer__isnull=False).exists():
-                    first_unanswered_index = idx
-                    break
-            else:
-                first_unanswered_index = questions.count() - 1 if questions.exists() else 0
-            request.session['current_question_index'] = first_unanswered_index
+            # All answers are read in one query and the first gap is found in memory
+            request.session['current_question_index'] = AnswerStore(application).first_unanswered(active_questions())
             return redirect('application_step2')
     
     # Handle the chapter selection and basic info editing
     if request.method == 'POST':
-        print("\n=== Processing POST request for chapter selection ===")
-        print(f"POST data: {request.POST}")
         form = ApplicationEditForm(request.POST, instance=application)
         
         if form.is_valid():
-            print("Form is valid")
             date_join = form.cleaned_data['date_join']
             date_leave = form.cleaned_data['date_leave']
-            print(f"Dates: {date_join} to {date_leave}")
 
             # Save the form data but don't commit yet
             application = form.save(commit=False)
             
             # If just checking availability
             if 'check_availability' in request.POST:
-                print("Checking chapter availability")
-                # Save any answers that were provided
-                for field_name, value in form.cleaned_data.items():
-                    if field_name.startswith('question_'):
-                        question_id = int(field_name.split('_')[1])
-                        question = Question.objects.get(id=question_id)
-                        if value:  # Only save if an answer was provided
-                            ApplicationAnswer.objects.update_or_create(
-                                application=application,
-                                question=question,
-                                defaults={'answer': value}
-                            )
+                # Save any answers that were provided, in one query
+                answers = AnswerStore(application)
+                answers.set_from_form(form.cleaned_data, skip_blank=True)
+                answers.save()
                 
                 # Save the application with updated dates
                 application.date_join = date_join
                 application.date_leave = date_leave
                 application.save()
-                print(f"Saved application with dates: {date_join} to {date_leave}")
+                logger.debug('Saved dates of application %s', application.pk)
                 
                 chapters_with_availability = get_available_chapters(date_join, date_leave)
                 nights = (date_leave - date_join).days
@@ -533,7 +520,6 @@ def edit_application(request, pk):
                 chapters_info = []
                 for chapter_data in chapters_with_availability:
                     chapter = chapter_data['chapter']
-                    print(f"Processing chapter: {chapter.name} (Available: {chapter_data['is_available']})")
                     temp_application = Application(
                         chapter=chapter,
                         date_join=date_join,
@@ -564,7 +550,6 @@ def edit_application(request, pk):
                         'is_short_term': is_short_term
                     })
 
-                print(f"Rendering chapter selection with {len(chapters_info)} chapters")
                 return render(request, 'applications/new_application.html', {
                     'form': form,
                     'application': application,
@@ -577,22 +562,13 @@ def edit_application(request, pk):
             
             # If continuing to questions
             elif request.POST.get('action') == 'continue_to_questions':
-                print("\n=== Continuing to questions ===")
-                # Save any answers that were provided
-                for field_name, value in form.cleaned_data.items():
-                    if field_name.startswith('question_'):
-                        question_id = int(field_name.split('_')[1])
-                        question = Question.objects.get(id=question_id)
-                        if value:  # Only save if an answer was provided
-                            ApplicationAnswer.objects.update_or_create(
-                                application=application,
-                                question=question,
-                                defaults={'answer': value}
-                            )
+                # Save any answers that were provided, in one query
+                answers = AnswerStore(application)
+                answers.set_from_form(form.cleaned_data, skip_blank=True)
+                answers.save()
                 
                 # Get selected chapter
                 chapter_id = request.POST.get('chapter')
-                print(f"Selected chapter ID: {chapter_id}")
                 
                 if chapter_id:
                     application.chapter_id = chapter_id
@@ -601,26 +577,21 @@ def edit_application(request, pk):
                 application.date_join = date_join
                 application.date_leave = date_leave
                 application.save()
-                print(f"Saved application with dates: {date_join} to {date_leave}")
+                logger.debug('Saved dates of application %s', application.pk)
                 
                 # Set up session for question editing
                 request.session['edit_questions'] = True
                 request.session['current_question_index'] = 0
                 request.session['application_id'] = application.pk
-                print("Session updated for questions:")
-                print(f"edit_questions: {request.session.get('edit_questions')}")
-                print(f"current_question_index: {request.session.get('current_question_index')}")
-                print(f"application_id: {request.session.get('application_id')}")
                 
                 # Check if this is a returning member and redirect to reintroduction question
                 if application.member_type == 'returning member':
                     return redirect('reintroduction_question')
                 else:
                     # Redirect to application_step2
-                    print("Redirecting to application_step2")
                     return redirect('application_step2')
         else:
-            print(f"Form validation failed: {form.errors}")
+            logger.info('Edit form for application %s rejected: %s', application.pk, list(form.errors))
             return render(request, 'applications/new_application.html', {
                 'form': form,
                 'application': application,
@@ -631,18 +602,14 @@ def edit_application(request, pk):
                 'is_edit': True
             })
     else:
-        print("\n=== Initial GET request ===")
         # Clear any existing question editing session data
         if 'edit_questions' in request.session:
             del request.session['edit_questions']
         if 'current_question_index' in request.session:
             del request.session['current_question_index']
-        print("Cleared existing question editing session data")
         
         form = ApplicationEditForm(instance=application)
     
-    print("Rendering initial edit form")
-    print(f"Final session state: {dict(request.session)}")
     return render(request, 'applications/new_application.html', {
         'form': form,
         'application': application,
@@ -724,11 +691,11 @@ def reintroduction_form(request):
     if application.member_type != 'returning member' or not application.wants_reintroduction:
         return redirect('application_step2')
     
-    # Get all active reintroduction questions ordered by their order field
-    questions = ReintroductionQuestion.objects.filter(is_active=True).order_by('order')
+    # Get all active reintroduction questions ordered by their order field, from the cached snapshot
+    questions = active_reintroduction_questions()
     
     # If there are no reintroduction questions, submit directly
-    if not questions.exists():
+    if not questions:
         if 'current_reintroduction_question_index' in request.session:
             del request.session['current_reintroduction_question_index']
         if 'application_id' in request.session:
@@ -742,7 +709,7 @@ def reintroduction_form(request):
     current_question_index = request.session.get('current_reintroduction_question_index', 0)
     
     # If we've answered all reintroduction questions, mark as completed and submit the application
-    if current_question_index >= questions.count():
+    if current_question_index >= len(questions):
         if 'current_reintroduction_question_index' in request.session:
             del request.session['current_reintroduction_question_index']
         if 'application_id' in request.session:
@@ -758,17 +725,17 @@ def reintroduction_form(request):
     try:
         answer = ReintroductionAnswer.objects.get(
             application=application,
-            question=current_question
+            question_id=current_question.id
         )
     except ReintroductionAnswer.DoesNotExist:
         # For new applications, create a blank answer
         answer = ReintroductionAnswer.objects.create(
             application=application,
-            question=current_question,
+            question_id=current_question.id,
             answer=''
         )
 
-    total_questions = questions.count()
+    total_questions = len(questions)
     progress = int((current_question_index / total_questions) * 100) if total_questions else 0
 
     save_success = False
@@ -852,6 +819,8 @@ def reintroduction_form(request):
         'save_success': save_success
     })
 
+MAX_MATRIX_DAYS = 366
+
 @login_required
 def availability_matrix(request):
     """
@@ -865,43 +834,18 @@ def availability_matrix(request):
     else:
         start_date = date.today()
     
-    # Default to showing 30 days
-    days_to_show = int(request.GET.get('days', 30))
+    # Default to showing 30 days, capped so a single request stays cheap
+    try:
+        days_to_show = int(request.GET.get('days', 30))
+    except ValueError:
+        days_to_show = 30
+    days_to_show = max(1, min(days_to_show, MAX_MATRIX_DAYS))
     end_date = start_date + timedelta(days=days_to_show - 1)
     
-    # Generate date range
-    date_range = []
-    current_date = start_date
-    while current_date <= end_date:
-        date_range.append(current_date)
-        current_date += timedelta(days=1)
-    
-    # Get all chapters
-    chapters = Chapter.objects.all()
-    
-    # Build availability matrix
-    matrix_data = []
-    for chapter in chapters:
-        row_data = {
-            'chapter': chapter,
-            'dates': []
-        }
-        
-        for single_date in date_range:
-            # Check if chapter is booked on this date
-            is_booked = ChapterBooking.objects.filter(
-                chapter=chapter,
-                start_date__lte=single_date,
-                end_date__gt=single_date
-            ).exists()
-            
-            row_data['dates'].append({
-                'date': single_date,
-                'is_available': not is_booked,
-                'is_booked': is_booked
-            })
-        
-        matrix_data.append(row_data)
+    # Paint all bookings in the window into a per-chapter occupancy bitmap
+    grid = availability.OccupancyGrid.build(start_date, days_to_show)
+    date_range = grid.dates
+    matrix_data = list(grid.rows())
     
     # Navigation dates
     prev_start = start_date - timedelta(days=days_to_show)
@@ -3,10 +3,11 @@ from django.utils.html import format_html_join, format_html
 from django.utils.safestring import mark_safe
 
 # Register your models here.
+from chapters.admin import PricedModelAdmin
 from .models import Archive
 
 @admin.register(Archive)
-class ArchiveAdmin(admin.ModelAdmin):
+class ArchiveAdmin(PricedModelAdmin):
     list_display = ('first_name', 'last_name', 'email', 'date_join', 'date_leave', 'member_type', 'guests', 'application_status', 'chapter', 'total_cost', 'manual_cost_display')
     list_filter = ('application_status', 'member_type', 'guests', 'chapter')
     search_fields = ('first_name', 'last_name', 'email')
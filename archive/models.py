@@ -37,6 +37,13 @@ class Archive(models.Model):
     chapter = models.ForeignKey('chapters.Chapter', on_delete=models.SET_NULL, null=True, blank=True, related_name='archived_applications')
     application_answers = models.ManyToManyField('applications.ApplicationAnswer', related_name='archive_application_answers')
     manual_cost = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, help_text="Override the automatically calculated cost. Leave empty to use calculated cost.")
+
+    # Used by chapters.pricing.price_many
+    pricing_chapter_field = 'chapter'
+
+    # Archived applications keep the rates that applied when they were archived
+    MEMBER_DISCOUNT = Decimal('0.03')
+    GUEST_INCREASE = Decimal('0.20')
     
     def calculate_cost(self):
         """Calculate the total cost for the archived application using tiered pricing."""
@@ -50,11 +57,11 @@ class Archive(models.Model):
             
             # Apply 3% discount for returning members (using hardcoded values for archived data)
             if self.member_type == 'returning member':
-                base_cost = base_cost * Decimal('0.97')
+                base_cost = base_cost * (1 - self.MEMBER_DISCOUNT)
             
             # Apply 20% increase for 2 guests
             if self.guests == '2':
-                base_cost = base_cost * Decimal('1.20')
+                base_cost = base_cost * (1 + self.GUEST_INCREASE)
             
             return round(base_cost, 2)
         return Decimal('0.00')
@@ -64,6 +71,41 @@ class Archive(models.Model):
         """Return the formatted total cost with Korean Won sign and commas."""
         return f"₩{self.calculate_cost():,.2f}"
 
+    def get_pricing_breakdown(self):
+        """Get a detailed breakdown of pricing for this archived application."""
+        if not self.chapter or not self.date_join or not self.date_leave:
+            return []
+
+        nights = (self.date_leave - self.date_join).days
+        breakdown = self.chapter.get_pricing_breakdown(nights)
+        total_before_adjustments = sum(item['total_cost'] for item in breakdown)
+
+        adjustments = []
+        amount = total_before_adjustments
+        if self.member_type == 'returning member':
+            discount_amount = amount * self.MEMBER_DISCOUNT
+            amount -= discount_amount
+            adjustments.append({
+                'type': 'discount',
+                'name': 'Returning Member Discount (3%)',
+                'amount': round(-discount_amount, 2)
+            })
+
+        if self.guests == '2':
+            increase_amount = amount * self.GUEST_INCREASE
+            adjustments.append({
+                'type': 'increase',
+                'name': 'Second Guest Increase (20%)',
+                'amount': round(increase_amount, 2)
+            })
+
+        return {
+            'tiers': breakdown,
+            'adjustments': adjustments,
+            'total_nights': nights,
+            'final_total': self.calculate_cost()
+        }
+
     def __str__(self):
         return f"{self.first_name} {self.last_name}'s Archived Application"
     
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
 from chapters.models import Chapter
+from core import user_data, versioned_cache
 
 # Create your models here.
 
@@ -23,6 +24,14 @@ class TransferAcknowledgmentText(models.Model):
             TransferAcknowledgmentText.objects.exclude(pk=self.pk).update(is_active=False)
         super().save(*args, **kwargs)
 
+    @classmethod
+    def get_active(cls):
+        """Return the active acknowledgment text, or an unsaved default if there is none."""
+        return versioned_cache.get(
+            'transfer_acknowledgment_text',
+            lambda: cls.objects.filter(is_active=True).first() or cls()
+        )
+
     def __str__(self):
         return f"Acknowledgment Text {'(Active)' if self.is_active else ''}"
 
@@ -50,3 +59,7 @@ class ChapterTransferRequest(models.Model):
 
     def __str__(self):
         return f"{self.coliver.username}'s request to transfer from {self.current_chapter} to {self.requested_chapter}"
+
+
+versioned_cache.register('transfer_acknowledgment_text', TransferAcknowledgmentText)
+user_data.register('coliver', ChapterTransferRequest)
@@ -5,7 +5,6 @@ from django.utils import timezone
 from datetime import datetime, time
 from todos.models import Todo
 from .models import ChapterTransferRequest
-from django.db import models
 from colivers.models import Coliver
 
 @receiver(post_save, sender=ChapterTransferRequest)
@@ -23,46 +22,35 @@ def handle_transfer_todo(sender, instance, created, **kwargs):
     
     # If status is pending, ensure there's a todo
     if instance.status == 'pending':
-        # Check if a todo already exists
-        existing_todo = Todo.objects.filter(
-            task_type='transfer_review',
-            reference_id=str(instance.id)
-        ).first()
-        
-        if not existing_todo:
-            # Convert start_date to datetime for due_date (set to end of day)
-            due_datetime = None
-            if instance.start_date:
-                due_datetime = timezone.make_aware(
-                    datetime.combine(instance.start_date, time(23, 59, 59))
-                )
-            
-            # Create a new todo
-            Todo.objects.create(
-                title=f'Review transfer request from {coliver_name}',
-                description=(
-                    f'Transfer request from {coliver_name}:\n'
-                    f'From: {instance.current_chapter.name}\n'
-                    f'To: {instance.requested_chapter.name}\n'
-                    f'End Date at Current Chapter: {instance.end_date}\n'
-                    f'Start Date at New Chapter: {instance.start_date}\n\n'
-                    f'Reason: {instance.reason}'
-                ),
-                task_type='transfer_review',
-                reference_id=str(instance.id),
-                coliver_name=coliver_name,
-                due_date=due_datetime
+        # Convert start_date to datetime for due_date (set to end of day)
+        due_datetime = None
+        if instance.start_date:
+            due_datetime = timezone.make_aware(
+                datetime.combine(instance.start_date, time(23, 59, 59))
             )
+        
+        # A no-op while a review todo for this request is still pending
+        Todo.objects.create_pending(
+            title=f'Review transfer request from {coliver_name}',
+            description=(
+                f'Transfer request from {coliver_name}:\n'
+                f'From: {instance.current_chapter.name}\n'
+                f'To: {instance.requested_chapter.name}\n'
+                f'End Date at Current Chapter: {instance.end_date}\n'
+                f'Start Date at New Chapter: {instance.start_date}\n\n'
+                f'Reason: {instance.reason}'
+            ),
+            task_type='transfer_review',
+            reference_id=str(instance.id),
+            coliver_name=coliver_name,
+            due_date=due_datetime
+        )
     # If status is not pending, mark any existing todo as completed
     else:
         Todo.objects.filter(
             task_type='transfer_review',
-            reference_id=str(instance.id),
-            status='pending'
-        ).update(
-            status='completed',
-            completed_at=models.functions.Now()
-        )
+            reference_id=str(instance.id)
+        ).complete()
         
         # If the transfer was approved, create a new todo for administrative tasks
         if instance.status == 'approved':
@@ -73,7 +61,7 @@ def handle_transfer_todo(sender, instance, created, **kwargs):
                     datetime.combine(instance.start_date, time(23, 59, 59))
                 )
             
-            Todo.objects.create(
+            Todo.objects.create_pending(
                 title=f'Process chapter transfer for {coliver_name}',
                 description=(
                     f'Administrative tasks for {coliver_name}\'s approved transfer:\n\n'
@@ -71,9 +71,7 @@ def create_transfer_request(request):
         return redirect('dashboard:dashboard')
     
     # Get the active acknowledgment text or use the default from the model
-    acknowledgment_text = TransferAcknowledgmentText.objects.filter(is_active=True).first()
-    if not acknowledgment_text:
-        acknowledgment_text = TransferAcknowledgmentText.objects.create(is_active=True)
+    acknowledgment_text = TransferAcknowledgmentText.get_active()
 
     chapters = Chapter.objects.all().order_by('name')
     return render(request, 'chapter_transfers/create_transfer_request.html', {
@@ -1,7 +1,32 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
 
 # Register your models here.
 from .models import Chapter, ChapterBooking, ChapterImage, PricingTier
+from .pricing import price_many
+
+
+class PricedChangeList(ChangeList):
+    """Prices the whole result page with one price_many call instead of row by row."""
+
+    def get_results(self, request):
+        super().get_results(request)
+        quotes = price_many(self.result_list, breakdown=False)
+        for obj in self.result_list:
+            obj.price_quote = quotes[obj.pk]
+
+
+class PricedModelAdmin(admin.ModelAdmin):
+    """Base admin for models priced through chapters.pricing, showing a total_cost column."""
+
+    def get_changelist(self, request, **kwargs):
+        return PricedChangeList
+
+    def total_cost(self, obj):
+        quote = getattr(obj, 'price_quote', None)
+        cost = quote.cost if quote else obj.calculate_cost()
+        return f"₩{cost:,.2f}"
+    total_cost.short_description = 'Total cost'
 
 class ChapterBookingsInline(admin.TabularInline):
     model = ChapterBooking
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ChaptersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'chapters'
+
+    def ready(self):
+        import chapters.signals  # Import signals when the app is ready
@@ -0,0 +1,134 @@
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.db.models import Exists, OuterRef
+
+from . import intervals
+from .models import Chapter, ChapterBooking
+
+SUGGESTION_HORIZON_DAYS = 120
+
+
+def overlapping_bookings(date_join, date_leave):
+    """
+    Bookings that overlap a stay from date_join up to (but not including) date_leave.
+    Both stays and bookings are half-open: the departure day is free for the next guest.
+    """
+    return ChapterBooking.objects.filter(
+        start_date__lt=date_leave,
+        end_date__gt=date_join
+    )
+
+
+def chapters_with_availability(date_join, date_leave, chapters=None):
+    """
+    Annotate chapters with an `is_available` flag for the given stay.
+    The flag is an EXISTS subquery, so the whole list is answered in one query.
+    """
+    if chapters is None:
+        chapters = Chapter.objects.all()
+
+    conflicts = overlapping_bookings(date_join, date_leave).filter(chapter=OuterRef('pk'))
+    return chapters.annotate(is_available=~Exists(conflicts))
+
+
+def available_chapters(date_join, date_leave, chapters=None):
+    """Return only the chapters that are free for the given stay."""
+    return chapters_with_availability(date_join, date_leave, chapters).filter(is_available=True)
+
+
+@dataclass(frozen=True)
+class Window:
+    arrival: object
+    departure: object
+    shift_days: int
+
+    @property
+    def nights(self):
+        return (self.departure - self.arrival).days
+
+
+def suggest_windows(date_join, date_leave, nights=None, chapters=None, limit=2,
+                    earliest=None, horizon_days=SUGGESTION_HORIZON_DAYS):
+    """
+    For each chapter, the `limit` free windows of at least `nights` nights (the
+    requested stay length by default) closest to the requested arrival, within
+    horizon_days either side of it and never before `earliest`.
+    Each chapter is one sweep over its merged, sorted bookings from the interval
+    index, so the cost does not depend on how many dates are probed.
+    Returns {chapter_id: [Window, ...]} ordered by how far each window moves the stay.
+    """
+    if chapters is None:
+        chapters = Chapter.objects.all()
+    chapter_ids = [chapter.pk for chapter in chapters]
+    nights = nights or (date_leave - date_join).days
+    start = date_join - timedelta(days=horizon_days)
+    if earliest is not None:
+        start = max(start, earliest)
+    end = date_leave + timedelta(days=horizon_days)
+
+    suggestions = {}
+    for chapter_id, index in intervals.get_indexes(chapter_ids).items():
+        windows = []
+        for gap_start, gap_end in index.free_gaps(start, end):
+            if (gap_end - gap_start).days < nights:
+                continue
+            # The arrival inside this gap that moves the stay the least
+            latest_arrival = gap_end - timedelta(days=nights)
+            arrival = min(max(date_join, gap_start), latest_arrival)
+            windows.append(Window(arrival, arrival + timedelta(days=nights), (arrival - date_join).days))
+        windows.sort(key=lambda window: (abs(window.shift_days), window.arrival))
+        suggestions[chapter_id] = windows[:limit]
+    return suggestions
+
+
+class OccupancyGrid:
+    """
+    Day-by-day occupancy of a set of chapters over a date window.
+    Each chapter gets a bytearray with one byte per day (1 = booked), painted
+    from the bookings that overlap the window, which are fetched in one query.
+    """
+
+    def __init__(self, chapters, start_date, days):
+        self.chapters = list(chapters)
+        self.start_date = start_date
+        self.days = days
+        self.end_date = start_date + timedelta(days=days)
+        self.dates = [start_date + timedelta(days=offset) for offset in range(days)]
+        self.bitmaps = {chapter.pk: bytearray(days) for chapter in self.chapters}
+
+    @classmethod
+    def build(cls, start_date, days, chapters=None):
+        if chapters is None:
+            chapters = Chapter.objects.all()
+        grid = cls(chapters, start_date, days)
+
+        bookings = overlapping_bookings(grid.start_date, grid.end_date).filter(
+            chapter_id__in=list(grid.bitmaps)
+        ).values_list('chapter_id', 'start_date', 'end_date')
+        for chapter_id, start, end in bookings:
+            grid.paint(chapter_id, start, end)
+        return grid
+
+    def paint(self, chapter_id, start, end):
+        """Mark the nights from start up to (but not including) end as booked."""
+        first = max((start - self.start_date).days, 0)
+        last = min((end - self.start_date).days, self.days)
+        if first < last:
+            self.bitmaps[chapter_id][first:last] = b'\x01' * (last - first)
+
+    def is_booked(self, chapter_id, day):
+        offset = (day - self.start_date).days
+        return 0 <= offset < self.days and bool(self.bitmaps[chapter_id][offset])
+
+    def rows(self):
+        """Yield one row per chapter with a cell per date, ready for the matrix template."""
+        for chapter in self.chapters:
+            bitmap = self.bitmaps[chapter.pk]
+            yield {
+                'chapter': chapter,
+                'dates': [
+                    {'date': day, 'is_available': not booked, 'is_booked': bool(booked)}
+                    for day, booked in zip(self.dates, bitmap)
+                ],
+            }
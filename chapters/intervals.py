@@ -0,0 +1,172 @@
+"""
+In-process interval index over each chapter's bookings.
+A chapter's bookings are merged into sorted, disjoint half-open intervals, so
+overlap, free-gap and next-available questions are answered with a bisect
+instead of a query. Indexes are built lazily, several chapters per query, and
+each held index is checked against a fingerprint of the chapter's bookings read
+from the database, so a write made by any process is noticed by every other.
+"""
+import threading
+from bisect import bisect_right
+from datetime import timedelta
+
+from django.db.models import Count, Max
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+class BookingIndex:
+    """
+    Merged booked intervals of one chapter. Bookings that touch or overlap are
+    joined, so starts and ends are both sorted and every gap between two
+    intervals is at least one free night.
+    """
+
+    def __init__(self, intervals=()):
+        starts = []
+        ends = []
+        for start, end in sorted(intervals):
+            if end <= start:
+                continue
+            if ends and start <= ends[-1]:
+                ends[-1] = max(ends[-1], end)
+            else:
+                starts.append(start)
+                ends.append(end)
+        self.starts = starts
+        self.ends = ends
+
+        # Max segment tree over the gap lengths, for next_available
+        gaps = [(starts[i + 1] - ends[i]).days for i in range(len(starts) - 1)]
+        size = 1
+        while size < len(gaps):
+            size *= 2
+        tree = [0] * (2 * size)
+        tree[size:size + len(gaps)] = gaps
+        for node in range(size - 1, 0, -1):
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+        self._gap_count = len(gaps)
+        self._size = size
+        self._gap_tree = tree
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __iter__(self):
+        return zip(self.starts, self.ends)
+
+    def _first_ending_after(self, day):
+        # Index of the first interval that is still booked on day or later
+        return bisect_right(self.ends, day)
+
+    def overlaps(self, start, end):
+        """Whether a stay from start up to (but not including) end hits a booking."""
+        if end <= start:
+            return False
+        index = self._first_ending_after(start)
+        return index < len(self.starts) and self.starts[index] < end
+
+    def free_gaps(self, start, end):
+        """The free half-open (start, end) stretches between start and end."""
+        gaps = []
+        cursor = start
+        index = self._first_ending_after(start)
+        while index < len(self.starts) and self.starts[index] < end:
+            if self.starts[index] > cursor:
+                gaps.append((cursor, self.starts[index]))
+            cursor = max(cursor, self.ends[index])
+            index += 1
+        if cursor < end:
+            gaps.append((cursor, end))
+        return gaps
+
+    def _first_gap_at_least(self, first, nights, node=1, low=0, high=None):
+        # Leftmost gap index >= first whose length is at least nights
+        if high is None:
+            high = self._size
+        if high <= first or low >= self._gap_count or self._gap_tree[node] < nights:
+            return None
+        if high - low == 1:
+            return low
+        middle = (low + high) // 2
+        found = self._first_gap_at_least(first, nights, 2 * node, low, middle)
+        if found is None:
+            found = self._first_gap_at_least(first, nights, 2 * node + 1, middle, high)
+        return found
+
+    def next_available(self, on_or_after, nights=1):
+        """The first arrival date on or after on_or_after with `nights` free nights in a row."""
+        index = self._first_ending_after(on_or_after)
+        if index == len(self.starts):
+            return on_or_after
+        if self.starts[index] > on_or_after:
+            if (self.starts[index] - on_or_after).days >= nights:
+                return on_or_after
+        gap = self._first_gap_at_least(index, nights)
+        if gap is None:
+            return self.ends[-1]
+        return self.ends[gap]
+
+    def next_free_stay(self, on_or_after, nights):
+        """(arrival, departure) of the first free stay of `nights` nights from on_or_after."""
+        arrival = self.next_available(on_or_after, nights)
+        return arrival, arrival + timedelta(days=nights)
+
+
+def _fingerprints(chapter_ids):
+    """
+    {chapter_id: (count, max id, max updated_at)} of each chapter's bookings.
+    An insert raises the max id, a delete lowers the count and an edit moves
+    updated_at, so any change to a chapter's bookings changes its fingerprint.
+    """
+    from .models import ChapterBooking
+
+    fingerprints = {chapter_id: (0, None, None) for chapter_id in chapter_ids}
+    rows = ChapterBooking.objects.filter(chapter_id__in=chapter_ids).order_by().values('chapter_id').annotate(
+        count=Count('id'), last_id=Max('id'), updated=Max('updated_at')
+    ).values_list('chapter_id', 'count', 'last_id', 'updated')
+    for chapter_id, *fingerprint in rows:
+        fingerprints[chapter_id] = tuple(fingerprint)
+    return fingerprints
+
+
+def get_indexes(chapter_ids):
+    """
+    Return {chapter_id: BookingIndex} for chapter_ids. Indexes this process
+    already holds are reused while their chapter's fingerprint is unchanged;
+    the rest are built from a single query.
+    """
+    from .models import ChapterBooking
+
+    chapter_ids = set(chapter_ids)
+    # Read before the bookings, so an index is never keyed newer than its data
+    fingerprints = _fingerprints(chapter_ids)
+    indexes = {}
+    with _indexes_lock:
+        for chapter_id in chapter_ids:
+            held = _indexes.get(chapter_id)
+            if held is not None and held[0] == fingerprints[chapter_id]:
+                indexes[chapter_id] = held[1]
+
+    stale = chapter_ids - set(indexes)
+    if stale:
+        intervals = {chapter_id: [] for chapter_id in stale}
+        bookings = ChapterBooking.objects.filter(chapter_id__in=stale).values_list('chapter_id', 'start_date', 'end_date')
+        for chapter_id, start, end in bookings:
+            intervals[chapter_id].append((start, end))
+        with _indexes_lock:
+            for chapter_id in stale:
+                indexes[chapter_id] = BookingIndex(intervals[chapter_id])
+                _indexes[chapter_id] = (fingerprints[chapter_id], indexes[chapter_id])
+    return indexes
+
+
+def get_index(chapter_id):
+    return get_indexes([chapter_id])[chapter_id]
+
+
+def invalidate(chapter_id):
+    """Drop the index this process holds for chapter_id. Other processes notice through the fingerprint."""
+    with _indexes_lock:
+        _indexes.pop(chapter_id, None)
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 08:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chapters', '0005_chapter_short_term_price_per_night_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chapterbooking',
+            index=models.Index(fields=['chapter', 'start_date', 'end_date'], name='booking_chapter_dates_idx'),
+        ),
+    ]
@@ -0,0 +1,74 @@
+from django.db import migrations
+
+CONSTRAINT_NAME = 'booking_no_overlap'
+
+
+def find_conflicting_bookings(ChapterBooking):
+    """
+    Ids of the bookings that would violate the constraint: ones ending before they
+    start, and ones overlapping an earlier booking of the same chapter (with the id
+    of the booking they overlap).
+    """
+    inverted = []
+    overlapping = []
+    chapter_id = latest_end = latest_id = None
+    bookings = ChapterBooking.objects.order_by('chapter_id', 'start_date', 'end_date', 'id')
+    for pk, booking_chapter_id, start, end in bookings.values_list('id', 'chapter_id', 'start_date', 'end_date'):
+        if end < start:
+            inverted.append(pk)
+            continue
+        if end == start:
+            # An empty range overlaps nothing
+            continue
+        if booking_chapter_id != chapter_id:
+            chapter_id, latest_end, latest_id = booking_chapter_id, end, pk
+        elif start < latest_end:
+            overlapping.append((latest_id, pk))
+            if end > latest_end:
+                latest_end, latest_id = end, pk
+        else:
+            latest_end, latest_id = end, pk
+    return inverted, overlapping
+
+
+def add_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    # Existing bookings are never rewritten: resolving a conflict is a decision for a person
+    inverted, overlapping = find_conflicting_bookings(apps.get_model('chapters', 'ChapterBooking'))
+    if inverted or overlapping:
+        problems = []
+        if inverted:
+            problems.append('ending before they start: ' + ', '.join(map(str, inverted)))
+        if overlapping:
+            problems.append('overlapping: ' + ', '.join(f'{a} and {b}' for a, b in overlapping))
+        raise RuntimeError(
+            'Cannot add the booking overlap constraint until these chapter bookings are fixed by hand. '
+            'Bookings ' + '; bookings '.join(problems) + '.'
+        )
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    schema_editor.execute(
+        f'ALTER TABLE chapters_chapterbooking ADD CONSTRAINT {CONSTRAINT_NAME} '
+        "EXCLUDE USING gist (chapter_id WITH =, daterange(start_date, end_date, '[)') WITH &&)"
+    )
+
+
+def drop_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'ALTER TABLE chapters_chapterbooking DROP CONSTRAINT IF EXISTS {CONSTRAINT_NAME}')
+
+
+class Migration(migrations.Migration):
+    """
+    Postgres only: refuse overlapping bookings of the same chapter at insert time.
+    Other databases rely on ChapterBooking.clean.
+    """
+
+    dependencies = [
+        ('chapters', '0006_chapterbooking_booking_chapter_dates_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_exclusion_constraint, drop_exclusion_constraint),
+    ]
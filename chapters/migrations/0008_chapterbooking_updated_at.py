@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 09:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chapters', '0007_chapterbooking_no_overlap'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chapterbooking',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -1,7 +1,10 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
 from userprofile.models import Userprofile
-from decimal import Decimal
+from core import versioned_cache
+from core.tracking import FieldTrackerMixin
+from . import pricing
 
 class PricingTier(models.Model):
     """
@@ -80,46 +83,22 @@ class Chapter(models.Model):
     created_by = models.ForeignKey(User, related_name='chapters', on_delete=models.CASCADE)
     booked_by = models.ForeignKey(Userprofile, related_name='booked_chapters', on_delete=models.CASCADE, blank=True, null=True)
 
+    def get_pricing_plan(self):
+        """
+        Return this chapter's compiled PricingPlan.
+        Memoized on the instance and shared between requests through the cache.
+        """
+        plan = self.__dict__.get('_pricing_plan')
+        if plan is None:
+            plan = self._pricing_plan = pricing.get_plan(self)
+        return plan
+
     def calculate_tiered_cost(self, total_nights):
         """
         Calculate the total cost using tiered pricing, short-term pricing, or legacy pricing.
         Returns the total cost for the given number of nights.
         """
-        # Check for short-term pricing first
-        if (self.use_short_term_pricing and 
-            total_nights <= self.short_term_threshold_days and 
-            self.short_term_price_per_night > 0):
-            return Decimal(str(self.short_term_price_per_night)) * Decimal(str(total_nights))
-        
-        # Use tiered pricing if enabled and available
-        if self.use_tiered_pricing and self.pricing_tiers.exists():
-            total_cost = Decimal('0.00')
-            remaining_nights = total_nights
-            
-            # Get all pricing tiers ordered by tier_order
-            tiers = self.pricing_tiers.all().order_by('tier_order')
-            
-            for tier in tiers:
-                if remaining_nights <= 0:
-                    break
-                    
-                # Calculate nights for this tier
-                nights_in_tier = min(remaining_nights, tier.duration_days)
-                tier_cost = tier.price_per_night * Decimal(str(nights_in_tier))
-                total_cost += tier_cost
-                remaining_nights -= nights_in_tier
-            
-            # If there are still remaining nights after all tiers,
-            # use the last tier's price for the remaining nights
-            if remaining_nights > 0 and tiers.exists():
-                last_tier = tiers.last()
-                additional_cost = last_tier.price_per_night * Decimal(str(remaining_nights))
-                total_cost += additional_cost
-            
-            return round(total_cost, 2)
-        
-        # Fall back to legacy pricing
-        return self.cost_per_night * Decimal(str(total_nights))
+        return self.get_pricing_plan().cost(total_nights)
     
     def get_display_rate_per_night(self, total_nights):
         """
@@ -128,80 +107,14 @@ class Chapter(models.Model):
         For tiered pricing: returns first tier rate
         Otherwise: returns legacy rate
         """
-        # Check for short-term pricing first
-        if (self.use_short_term_pricing and 
-            total_nights <= self.short_term_threshold_days and 
-            self.short_term_price_per_night > 0):
-            return Decimal(str(self.short_term_price_per_night))
-        
-        # Use first tier rate if tiered pricing is enabled
-        if self.use_tiered_pricing and self.pricing_tiers.exists():
-            first_tier = self.pricing_tiers.order_by('tier_order').first()
-            return first_tier.price_per_night
-        
-        # Fall back to legacy pricing
-        return self.cost_per_night
+        return self.get_pricing_plan().display_rate(total_nights)
     
     def get_pricing_breakdown(self, total_nights):
         """
         Get a detailed breakdown of pricing for the given number of nights.
         Returns a list of dictionaries with tier information and costs.
         """
-        # Check for short-term pricing first
-        if (self.use_short_term_pricing and 
-            total_nights <= self.short_term_threshold_days and 
-            self.short_term_price_per_night > 0):
-            return [{
-                'tier_name': f'Short-term Rate (≤{self.short_term_threshold_days} days)',
-                'nights': total_nights,
-                'price_per_night': Decimal(str(self.short_term_price_per_night)),
-                'total_cost': Decimal(str(self.short_term_price_per_night)) * Decimal(str(total_nights))
-            }]
-        
-        # Use tiered pricing if enabled and available
-        if self.use_tiered_pricing and self.pricing_tiers.exists():
-            breakdown = []
-            remaining_nights = total_nights
-            
-            tiers = self.pricing_tiers.all().order_by('tier_order')
-            
-            for tier in tiers:
-                if remaining_nights <= 0:
-                    break
-                    
-                nights_in_tier = min(remaining_nights, tier.duration_days)
-                tier_cost = tier.price_per_night * Decimal(str(nights_in_tier))
-                
-                breakdown.append({
-                    'tier_name': tier.tier_name,
-                    'nights': nights_in_tier,
-                    'price_per_night': tier.price_per_night,
-                    'total_cost': tier_cost
-                })
-                
-                remaining_nights -= nights_in_tier
-            
-            # Handle remaining nights with last tier pricing
-            if remaining_nights > 0 and tiers.exists():
-                last_tier = tiers.last()
-                additional_cost = last_tier.price_per_night * Decimal(str(remaining_nights))
-                
-                breakdown.append({
-                    'tier_name': f'{last_tier.tier_name} (Extended)',
-                    'nights': remaining_nights,
-                    'price_per_night': last_tier.price_per_night,
-                    'total_cost': additional_cost
-                })
-            
-            return breakdown
-        
-        # Fall back to legacy pricing
-        return [{
-            'tier_name': 'Standard Rate',
-            'nights': total_nights,
-            'price_per_night': self.cost_per_night,
-            'total_cost': self.cost_per_night * Decimal(str(total_nights))
-        }]
+        return self.get_pricing_plan().breakdown(total_nights)
 
     def __str__(self):
         return self.name
@@ -211,19 +124,41 @@ class Chapter(models.Model):
             raise ValueError("Chapter must have a created_by user.")
         if not self.created_by.is_staff:
             raise PermissionError("Only admin users can create chapters.")
+        self.__dict__.pop('_pricing_plan', None)
         super().save(*args, **kwargs)
 
-class ChapterBooking(models.Model):
+class ChapterBooking(FieldTrackerMixin, models.Model):
     chapter = models.ForeignKey(Chapter, related_name='bookings', on_delete=models.CASCADE)
     start_date = models.DateField()
     end_date = models.DateField()
-    
+    # Part of the fingerprint that tells each process its interval index is stale
+    updated_at = models.DateTimeField(auto_now=True)
+
+    tracked_fields = ('chapter',)
+
     class Meta:
         ordering = ['start_date']
+        indexes = [
+            # Overlap checks filter by chapter and compare both dates
+            models.Index(fields=['chapter', 'start_date', 'end_date'], name='booking_chapter_dates_idx'),
+        ]
         
     def __str__(self):
         return f"{self.chapter.name}: {self.start_date} to {self.end_date}"
 
+    def clean(self):
+        """Reject bookings that end before they start or overlap another booking of the chapter."""
+        if not (self.start_date and self.end_date):
+            return
+        if self.end_date <= self.start_date:
+            raise ValidationError({'end_date': 'End date must be after the start date.'})
+        if self.chapter_id and ChapterBooking.objects.filter(
+            chapter_id=self.chapter_id,
+            start_date__lt=self.end_date,
+            end_date__gt=self.start_date
+        ).exclude(pk=self.pk).exists():
+            raise ValidationError(f'{self.chapter.name} is already booked for some of these dates.')
+
 class ChapterImage(models.Model):
     chapter = models.ForeignKey(
         Chapter, 
@@ -244,3 +179,6 @@ class ChapterImage(models.Model):
 
     def __str__(self):
         return f"Image for {self.chapter.name}"
+
+
+versioned_cache.register('pricing_plans', Chapter, PricingTier)
@@ -0,0 +1,218 @@
+from bisect import bisect_left
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.db.models import prefetch_related_objects
+
+from core import versioned_cache
+
+
+def _to_decimal(value):
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+@dataclass(frozen=True)
+class TierPlan:
+    name: str
+    duration_days: int
+    price_per_night: Decimal
+
+
+@dataclass(frozen=True)
+class PricingPlan:
+    """
+    A chapter's pricing rules compiled into plain values.
+    Tier boundaries and costs are stored cumulatively, so pricing a stay is a
+    bisect over the boundaries instead of a walk over the tiers, and needs no queries.
+    """
+    cost_per_night: Decimal
+    use_short_term_pricing: bool
+    short_term_threshold_days: int
+    short_term_price_per_night: Decimal
+    tiers: tuple = ()
+    boundaries: tuple = ()
+    cumulative_costs: tuple = ()
+
+    @classmethod
+    def compile(cls, chapter):
+        tiers = ()
+        if chapter.use_tiered_pricing:
+            # Sort in Python so tiers prefetched with prefetch_related are reused as-is
+            ordered = sorted(chapter.pricing_tiers.all(), key=lambda tier: tier.tier_order)
+            tiers = tuple(
+                TierPlan(tier.tier_name, max(tier.duration_days, 0), _to_decimal(tier.price_per_night))
+                for tier in ordered
+            )
+
+        boundaries = []
+        cumulative_costs = []
+        nights = 0
+        cost = Decimal('0.00')
+        for tier in tiers:
+            nights += tier.duration_days
+            cost += tier.price_per_night * Decimal(tier.duration_days)
+            boundaries.append(nights)
+            cumulative_costs.append(cost)
+
+        return cls(
+            cost_per_night=_to_decimal(chapter.cost_per_night),
+            use_short_term_pricing=chapter.use_short_term_pricing,
+            short_term_threshold_days=chapter.short_term_threshold_days,
+            short_term_price_per_night=_to_decimal(chapter.short_term_price_per_night),
+            tiers=tiers,
+            boundaries=tuple(boundaries),
+            cumulative_costs=tuple(cumulative_costs),
+        )
+
+    def is_short_term(self, total_nights):
+        return (self.use_short_term_pricing and
+                total_nights <= self.short_term_threshold_days and
+                self.short_term_price_per_night > 0)
+
+    def _last_tier_index(self, total_nights):
+        # Index of the tier the stay ends in; len(tiers) means it runs past the last one
+        return bisect_left(self.boundaries, total_nights)
+
+    def cost(self, total_nights):
+        if self.is_short_term(total_nights):
+            return self.short_term_price_per_night * Decimal(total_nights)
+
+        if self.tiers:
+            if total_nights <= 0:
+                return Decimal('0.00')
+            index = self._last_tier_index(total_nights)
+            # Nights past the last tier are charged at the last tier's price
+            tier = self.tiers[min(index, len(self.tiers) - 1)]
+            covered_nights = self.boundaries[index - 1] if index else 0
+            covered_cost = self.cumulative_costs[index - 1] if index else Decimal('0.00')
+            total_cost = covered_cost + tier.price_per_night * Decimal(total_nights - covered_nights)
+            return round(total_cost, 2)
+
+        return self.cost_per_night * Decimal(total_nights)
+
+    def display_rate(self, total_nights):
+        if self.is_short_term(total_nights):
+            return self.short_term_price_per_night
+        if self.tiers:
+            return self.tiers[0].price_per_night
+        return self.cost_per_night
+
+    def breakdown(self, total_nights):
+        if self.is_short_term(total_nights):
+            return [{
+                'tier_name': f'Short-term Rate (≤{self.short_term_threshold_days} days)',
+                'nights': total_nights,
+                'price_per_night': self.short_term_price_per_night,
+                'total_cost': self.short_term_price_per_night * Decimal(total_nights)
+            }]
+
+        if self.tiers:
+            if total_nights <= 0:
+                return []
+            index = self._last_tier_index(total_nights)
+            breakdown = []
+            covered_nights = 0
+            for tier in self.tiers[:index + 1]:
+                nights_in_tier = min(total_nights - covered_nights, tier.duration_days)
+                breakdown.append({
+                    'tier_name': tier.name,
+                    'nights': nights_in_tier,
+                    'price_per_night': tier.price_per_night,
+                    'total_cost': tier.price_per_night * Decimal(nights_in_tier)
+                })
+                covered_nights += nights_in_tier
+
+            # Handle remaining nights with last tier pricing
+            remaining_nights = total_nights - covered_nights
+            if remaining_nights > 0:
+                last_tier = self.tiers[-1]
+                breakdown.append({
+                    'tier_name': f'{last_tier.name} (Extended)',
+                    'nights': remaining_nights,
+                    'price_per_night': last_tier.price_per_night,
+                    'total_cost': last_tier.price_per_night * Decimal(remaining_nights)
+                })
+            return breakdown
+
+        return [{
+            'tier_name': 'Standard Rate',
+            'nights': total_nights,
+            'price_per_night': self.cost_per_night,
+            'total_cost': self.cost_per_night * Decimal(total_nights)
+        }]
+
+
+def get_plan(chapter):
+    """
+    Return the compiled plan for chapter, shared between requests through the cache.
+    The key includes the chapter's own pricing fields, so an edited but unsaved
+    chapter never picks up the plan of its saved version.
+    """
+    if chapter.pk is None:
+        return PricingPlan.compile(chapter)
+
+    key = ':'.join(str(value) for value in (
+        chapter.pk,
+        _to_decimal(chapter.cost_per_night).normalize(),
+        chapter.use_tiered_pricing,
+        chapter.use_short_term_pricing,
+        chapter.short_term_threshold_days,
+        _to_decimal(chapter.short_term_price_per_night).normalize(),
+    ))
+    return versioned_cache.get('pricing_plans', lambda: PricingPlan.compile(chapter), key=key)
+
+
+@dataclass(frozen=True)
+class Quote:
+    cost: Decimal
+    breakdown: object = None
+
+
+def price_many(objects, breakdown=True):
+    """
+    Price a queryset or list of Applications, Colivers or Archive rows in one go.
+    Chapters and their tiers are loaded once for the whole batch and rows of the
+    same chapter share one instance, so its plan is compiled once. Pricing settings
+    are read once as well. Returns a dict mapping each row's pk to a Quote.
+    """
+    from .models import Chapter
+
+    objects = list(objects)
+    if not objects:
+        return {}
+
+    model = type(objects[0])
+    field_name = model.pricing_chapter_field
+    descriptor = getattr(model, field_name)
+    attname = descriptor.field.attname
+
+    chapters = {}
+    for obj in objects:
+        if descriptor.is_cached(obj) and getattr(obj, field_name) is not None:
+            chapters.setdefault(getattr(obj, attname), getattr(obj, field_name))
+    missing = {getattr(obj, attname) for obj in objects} - set(chapters) - {None}
+    if missing:
+        chapters.update(Chapter.objects.in_bulk(missing))
+
+    prefetch_related_objects(
+        [chapter for chapter in chapters.values()
+         if chapter.use_tiered_pricing and '_pricing_plan' not in chapter.__dict__],
+        'pricing_tiers'
+    )
+    for obj in objects:
+        chapter = chapters.get(getattr(obj, attname))
+        if chapter is not None:
+            setattr(obj, field_name, chapter)
+
+    kwargs = {}
+    if getattr(model, 'uses_pricing_settings', False):
+        from applications.models import PricingSettings
+        kwargs['pricing_settings'] = PricingSettings.get_settings()
+
+    return {
+        obj.pk: Quote(
+            cost=obj.calculate_cost(**kwargs),
+            breakdown=obj.get_pricing_breakdown(**kwargs) if breakdown else None
+        )
+        for obj in objects
+    }
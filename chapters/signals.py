@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import intervals
+from .models import ChapterBooking
+
+
+@receiver(post_save, sender=ChapterBooking)
+def refresh_booking_index_on_save(sender, instance, created, **kwargs):
+    """Drop the interval index of the booking's chapter, and of its old chapter if it moved"""
+    intervals.invalidate(instance.chapter_id)
+    if not created and instance.has_changed('chapter'):
+        intervals.invalidate(instance.previous('chapter'))
+
+
+@receiver(post_delete, sender=ChapterBooking)
+def refresh_booking_index_on_delete(sender, instance, **kwargs):
+    intervals.invalidate(instance.chapter_id)
@@ -1,3 +1,292 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
 from django.test import TestCase
 
-# Create your tests here.
+from applications.models import Application
+from archive.models import Archive
+from colivers.models import Coliver
+from . import intervals
+from .availability import OccupancyGrid, available_chapters, chapters_with_availability, suggest_windows
+from .models import Chapter, ChapterBooking, PricingTier
+from .pricing import price_many
+
+
+class ChapterAvailabilityTestCase(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='testpass123', is_staff=True)
+
+    def create_chapter(self, name):
+        return Chapter.objects.create(name=name, created_by=self.admin)
+
+    def test_overlapping_booking_makes_chapter_unavailable(self):
+        """Test that a booking inside the stay blocks the chapter"""
+        booked = self.create_chapter('Booked')
+        free = self.create_chapter('Free')
+        ChapterBooking.objects.create(chapter=booked, start_date=date(2025, 3, 10), end_date=date(2025, 3, 20))
+
+        chapters = {c.name: c.is_available for c in chapters_with_availability(date(2025, 3, 1), date(2025, 3, 15))}
+        self.assertEqual(chapters, {'Booked': False, 'Free': True})
+        self.assertEqual(list(available_chapters(date(2025, 3, 1), date(2025, 3, 15))), [free])
+
+    def test_departure_day_is_free_for_next_stay(self):
+        """Test that stays and bookings are half-open, so back-to-back stays do not conflict"""
+        chapter = self.create_chapter('Back to back')
+        ChapterBooking.objects.create(chapter=chapter, start_date=date(2025, 3, 10), end_date=date(2025, 3, 20))
+
+        self.assertEqual(list(available_chapters(date(2025, 3, 20), date(2025, 3, 30))), [chapter])
+        self.assertEqual(list(available_chapters(date(2025, 3, 1), date(2025, 3, 10))), [chapter])
+        self.assertEqual(list(available_chapters(date(2025, 3, 19), date(2025, 3, 21))), [])
+
+    def test_query_count_does_not_grow_with_chapters(self):
+        """Test that availability is answered in one query regardless of the number of chapters"""
+        for i in range(3):
+            chapter = self.create_chapter(f'Chapter {i}')
+            ChapterBooking.objects.create(chapter=chapter, start_date=date(2025, 3, 1), end_date=date(2025, 3, 5))
+
+        with self.assertNumQueries(1):
+            list(chapters_with_availability(date(2025, 3, 1), date(2025, 3, 15)))
+
+        for i in range(3, 20):
+            chapter = self.create_chapter(f'Chapter {i}')
+            ChapterBooking.objects.create(chapter=chapter, start_date=date(2025, 3, 1), end_date=date(2025, 3, 5))
+
+        with self.assertNumQueries(1):
+            list(chapters_with_availability(date(2025, 3, 1), date(2025, 3, 15)))
+
+
+class OccupancyGridTestCase(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='testpass123', is_staff=True)
+        self.chapter = Chapter.objects.create(name='Grid', created_by=self.admin)
+
+    def test_bookings_are_painted_into_the_window(self):
+        """Test that bookings are clipped to the window and the departure day stays free"""
+        ChapterBooking.objects.create(chapter=self.chapter, start_date=date(2025, 2, 25), end_date=date(2025, 3, 3))
+        ChapterBooking.objects.create(chapter=self.chapter, start_date=date(2025, 3, 6), end_date=date(2025, 3, 8))
+
+        grid = OccupancyGrid.build(date(2025, 3, 1), 10)
+        self.assertEqual(list(grid.bitmaps[self.chapter.pk]), [1, 1, 0, 0, 0, 1, 1, 0, 0, 0])
+        self.assertTrue(grid.is_booked(self.chapter.pk, date(2025, 3, 2)))
+        self.assertFalse(grid.is_booked(self.chapter.pk, date(2025, 3, 3)))
+
+        row = next(grid.rows())
+        self.assertEqual(row['chapter'], self.chapter)
+        self.assertEqual(len(row['dates']), 10)
+        self.assertFalse(row['dates'][0]['is_available'])
+        self.assertTrue(row['dates'][2]['is_available'])
+
+    def test_grid_uses_two_queries(self):
+        """Test that the grid loads chapters and bookings once each, whatever the window size"""
+        for i in range(5):
+            chapter = Chapter.objects.create(name=f'Chapter {i}', created_by=self.admin)
+            ChapterBooking.objects.create(chapter=chapter, start_date=date(2025, 3, i + 1), end_date=date(2025, 4, 1))
+
+        with self.assertNumQueries(2):
+            list(OccupancyGrid.build(date(2025, 1, 1), 365).rows())
+
+
+class BookingIndexTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='testpass123', is_staff=True)
+        self.chapter = Chapter.objects.create(name='Indexed', created_by=self.admin)
+
+    def test_overlaps_gaps_and_next_available(self):
+        """Test that touching bookings merge and queries respect half-open stays"""
+        index = intervals.BookingIndex([
+            (date(2025, 3, 10), date(2025, 3, 15)),
+            (date(2025, 3, 1), date(2025, 3, 5)),
+            (date(2025, 3, 5), date(2025, 3, 8)),
+            (date(2025, 3, 20), date(2025, 3, 30)),
+        ])
+        self.assertEqual(list(index), [
+            (date(2025, 3, 1), date(2025, 3, 8)),
+            (date(2025, 3, 10), date(2025, 3, 15)),
+            (date(2025, 3, 20), date(2025, 3, 30)),
+        ])
+        self.assertTrue(index.overlaps(date(2025, 3, 7), date(2025, 3, 9)))
+        self.assertFalse(index.overlaps(date(2025, 3, 8), date(2025, 3, 10)))
+        self.assertFalse(index.overlaps(date(2025, 2, 1), date(2025, 3, 1)))
+        self.assertEqual(index.free_gaps(date(2025, 3, 1), date(2025, 4, 5)), [
+            (date(2025, 3, 8), date(2025, 3, 10)),
+            (date(2025, 3, 15), date(2025, 3, 20)),
+            (date(2025, 3, 30), date(2025, 4, 5)),
+        ])
+        self.assertEqual(index.next_available(date(2025, 3, 2)), date(2025, 3, 8))
+        self.assertEqual(index.next_available(date(2025, 3, 2), nights=3), date(2025, 3, 15))
+        self.assertEqual(index.next_available(date(2025, 3, 2), nights=6), date(2025, 3, 30))
+        self.assertEqual(index.next_available(date(2025, 2, 20), nights=9), date(2025, 2, 20))
+        self.assertEqual(index.next_available(date(2025, 2, 20), nights=10), date(2025, 3, 30))
+
+    def test_index_is_rebuilt_after_booking_changes(self):
+        """Test that saving, moving and deleting bookings refresh the held indexes"""
+        other = Chapter.objects.create(name='Other', created_by=self.admin)
+        booking = ChapterBooking.objects.create(chapter=self.chapter, start_date=date(2025, 3, 1), end_date=date(2025, 3, 5))
+        indexes = intervals.get_indexes([self.chapter.pk, other.pk])
+        self.assertTrue(indexes[self.chapter.pk].overlaps(date(2025, 3, 2), date(2025, 3, 3)))
+        self.assertEqual(len(indexes[other.pk]), 0)
+
+        # Only the fingerprint is read while the held index is current
+        with self.assertNumQueries(1):
+            intervals.get_index(self.chapter.pk)
+
+        # Written without signals, as another process's write looks to this one
+        ChapterBooking.objects.bulk_create([
+            ChapterBooking(chapter=self.chapter, start_date=date(2025, 3, 10), end_date=date(2025, 3, 12))
+        ])
+        self.assertEqual(len(intervals.get_index(self.chapter.pk)), 2)
+        ChapterBooking.objects.filter(start_date=date(2025, 3, 10)).delete()
+
+        booking.chapter = other
+        booking.save()
+        self.assertEqual(len(intervals.get_index(self.chapter.pk)), 0)
+        self.assertEqual(len(intervals.get_index(other.pk)), 1)
+
+        booking.delete()
+        self.assertEqual(len(intervals.get_index(other.pk)), 0)
+
+    def test_clean_rejects_overlapping_bookings(self):
+        """Test that a booking may not overlap another booking of the same chapter"""
+        existing = ChapterBooking.objects.create(chapter=self.chapter, start_date=date(2025, 3, 1), end_date=date(2025, 3, 10))
+        with self.assertRaises(ValidationError):
+            ChapterBooking(chapter=self.chapter, start_date=date(2025, 3, 9), end_date=date(2025, 3, 12)).full_clean()
+        with self.assertRaises(ValidationError):
+            ChapterBooking(chapter=self.chapter, start_date=date(2025, 3, 12), end_date=date(2025, 3, 12)).full_clean()
+        ChapterBooking(chapter=self.chapter, start_date=date(2025, 3, 10), end_date=date(2025, 3, 12)).full_clean()
+        existing.full_clean()
+
+
+class SuggestWindowsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='testpass123', is_staff=True)
+        self.chapter = Chapter.objects.create(name='Busy', created_by=self.admin)
+
+    def test_nearest_windows_either_side_of_the_request(self):
+        """Test that windows are placed as close as possible to the requested dates"""
+        ChapterBooking.objects.create(chapter=self.chapter, start_date=date(2025, 3, 1), end_date=date(2025, 3, 20))
+        ChapterBooking.objects.create(chapter=self.chapter, start_date=date(2025, 3, 24), end_date=date(2025, 4, 10))
+        free = Chapter.objects.create(name='Free', created_by=self.admin)
+
+        # The bookings' fingerprint, then the bookings themselves
+        with self.assertNumQueries(2):
+            suggestions = suggest_windows(date(2025, 3, 10), date(2025, 3, 17), chapters=[self.chapter, free])
+
+        self.assertEqual(
+            [(w.arrival, w.departure, w.shift_days) for w in suggestions[self.chapter.pk]],
+            [(date(2025, 2, 22), date(2025, 3, 1), -16), (date(2025, 4, 10), date(2025, 4, 17), 31)]
+        )
+        self.assertEqual(suggestions[free.pk][0].arrival, date(2025, 3, 10))
+        # The four free nights between the bookings only fit shorter stays
+        short = suggest_windows(date(2025, 3, 10), date(2025, 3, 14), chapters=[self.chapter], limit=1)
+        self.assertEqual(short[self.chapter.pk][0].arrival, date(2025, 3, 20))
+        later = suggest_windows(date(2025, 3, 10), date(2025, 3, 17), chapters=[self.chapter], earliest=date(2025, 3, 1))
+        self.assertEqual([w.arrival for w in later[self.chapter.pk]], [date(2025, 4, 10)])
+
+
+class PricingPlanTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='testpass123', is_staff=True)
+        self.chapter = Chapter.objects.create(
+            name='Tiered', created_by=self.admin, cost_per_night=Decimal('50000.00'), use_tiered_pricing=True
+        )
+        PricingTier.objects.create(chapter=self.chapter, tier_name='First', duration_days=10,
+                                   price_per_night=Decimal('30000.00'), tier_order=1)
+        PricingTier.objects.create(chapter=self.chapter, tier_name='Second', duration_days=20,
+                                   price_per_night=Decimal('20000.00'), tier_order=2)
+
+    def test_tiered_cost_and_breakdown(self):
+        """Test tier boundaries, the extended last tier and the first tier display rate"""
+        chapter = Chapter.objects.get(pk=self.chapter.pk)
+        self.assertEqual(chapter.calculate_tiered_cost(0), Decimal('0.00'))
+        self.assertEqual(chapter.calculate_tiered_cost(10), Decimal('300000.00'))
+        self.assertEqual(chapter.calculate_tiered_cost(11), Decimal('320000.00'))
+        self.assertEqual(chapter.calculate_tiered_cost(30), Decimal('700000.00'))
+        self.assertEqual(chapter.calculate_tiered_cost(35), Decimal('800000.00'))
+        self.assertEqual(chapter.get_display_rate_per_night(35), Decimal('30000.00'))
+        self.assertEqual(chapter.get_pricing_breakdown(0), [])
+        self.assertEqual(
+            [(row['tier_name'], row['nights'], row['total_cost']) for row in chapter.get_pricing_breakdown(35)],
+            [('First', 10, Decimal('300000.00')), ('Second', 20, Decimal('400000.00')),
+             ('Second (Extended)', 5, Decimal('100000.00'))]
+        )
+
+    def test_short_term_and_legacy_pricing(self):
+        """Test that short stays use the short-term rate and untiered chapters the legacy rate"""
+        self.chapter.use_short_term_pricing = True
+        self.chapter.short_term_price_per_night = Decimal('40000.00')
+        self.chapter.save()
+        self.assertEqual(self.chapter.calculate_tiered_cost(7), Decimal('280000.00'))
+        self.assertEqual(self.chapter.calculate_tiered_cost(8), Decimal('240000.00'))
+
+        self.chapter.use_tiered_pricing = False
+        self.chapter.save()
+        self.assertEqual(self.chapter.calculate_tiered_cost(8), Decimal('400000.00'))
+        self.assertEqual(self.chapter.get_display_rate_per_night(8), Decimal('50000.00'))
+
+    def test_plan_is_cached_until_a_tier_changes(self):
+        """Test that pricing runs without queries once compiled and follows tier edits"""
+        self.chapter.calculate_tiered_cost(5)
+        chapter = Chapter.objects.get(pk=self.chapter.pk)
+        with self.assertNumQueries(0):
+            chapter.calculate_tiered_cost(40)
+            chapter.get_display_rate_per_night(40)
+            chapter.get_pricing_breakdown(40)
+
+        PricingTier.objects.filter(tier_order=1).get().delete()
+        chapter = Chapter.objects.get(pk=self.chapter.pk)
+        self.assertEqual(chapter.calculate_tiered_cost(5), Decimal('100000.00'))
+
+
+class PriceManyTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='testpass123', is_staff=True)
+        self.chapters = []
+        for i in range(2):
+            chapter = Chapter.objects.create(name=f'Chapter {i}', created_by=self.admin, use_tiered_pricing=True)
+            PricingTier.objects.create(chapter=chapter, tier_name='First', duration_days=10,
+                                       price_per_night=Decimal('30000.00') + i, tier_order=1)
+            PricingTier.objects.create(chapter=chapter, tier_name='Second', duration_days=20,
+                                       price_per_night=Decimal('20000.00') + i, tier_order=2)
+            self.chapters.append(chapter)
+
+    def create_applications(self, count):
+        for i in range(count):
+            Application.objects.create(
+                created_by=self.admin, first_name='A', last_name=str(i), email='a@example.com',
+                chapter=self.chapters[i % 2], date_join=date(2025, 1, 1), date_leave=date(2025, 1, 10 + i),
+                member_type='returning member' if i % 3 else 'new member', guests='2' if i % 2 else '1'
+            )
+
+    def test_quotes_match_row_by_row_pricing(self):
+        """Test that bulk quotes equal each object's own cost and breakdown"""
+        self.create_applications(6)
+        Coliver.objects.create(first_name='C', last_name='L', email='c@example.com', chapter_name=self.chapters[1],
+                               arrival_date=date(2025, 1, 1), departure_date=date(2025, 3, 1))
+        Archive.objects.create(first_name='A', last_name='R', email='a@example.com', chapter=self.chapters[0],
+                               date_join=date(2025, 1, 1), date_leave=date(2025, 2, 1),
+                               member_type='returning member', guests='2')
+
+        for model in (Application, Coliver, Archive):
+            quotes = price_many(model.objects.all())
+            for obj in model.objects.all():
+                self.assertEqual(quotes[obj.pk].cost, obj.calculate_cost())
+                self.assertEqual(quotes[obj.pk].breakdown, obj.get_pricing_breakdown())
+
+    def test_query_count_does_not_grow_with_rows(self):
+        """Test that chapters, tiers and settings are loaded once for the whole batch"""
+        self.create_applications(2)
+        cache.clear()
+        with self.assertNumQueries(4):
+            price_many(Application.objects.all())
+
+        self.create_applications(10)
+        cache.clear()
+        with self.assertNumQueries(4):
+            price_many(Application.objects.all())
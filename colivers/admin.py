@@ -1,4 +1,5 @@
 from django.contrib import admin
+from chapters.admin import PricedModelAdmin
 from .models import Coliver
 
 # Create proxy models for active and archived colivers
@@ -14,7 +15,7 @@ class ArchivedColiver(Coliver):
         verbose_name = 'Archived Coliver'
         verbose_name_plural = 'Archived Colivers'
 
-class BaseColiverAdmin(admin.ModelAdmin):
+class BaseColiverAdmin(PricedModelAdmin):
     list_display = ['first_name', 'last_name', 'email', 'arrival_date', 'departure_date', 'created_at', 'total_cost', 'manual_cost_display', 'is_active']
     search_fields = ['first_name', 'last_name', 'email']
     list_filter = ['is_active', 'arrival_date', 'departure_date', 'status']
@@ -57,3 +58,32 @@ class ArchivedColiverAdmin(BaseColiverAdmin):
 # Register the active and archived colivers separately
 admin.site.register(ActiveColiver, ActiveColiverAdmin)
 admin.site.register(ArchivedColiver, ArchivedColiverAdmin)
+
+class ColiverSearchAdmin(admin.ModelAdmin):
+    """
+    Every coliver, view-only, for the admin autocomplete view (the payments' coliver
+    filter searches it). Colivers are edited through the active and archived lists.
+    """
+    search_fields = BaseColiverAdmin.search_fields
+    readonly_fields = BaseColiverAdmin.readonly_fields
+
+    def get_model_perms(self, request):
+        # Kept off the admin index, where the active and archived lists already appear
+        return {}
+
+    def has_view_permission(self, request, obj=None):
+        # Only the autocomplete view reads through this admin, so its own pages and
+        # the related links on other admins' coliver fields stay closed
+        match = request.resolver_match
+        return match is not None and match.url_name == 'autocomplete' and super().has_view_permission(request, obj)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+admin.site.register(Coliver, ColiverSearchAdmin)
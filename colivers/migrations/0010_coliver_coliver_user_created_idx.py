@@ -0,0 +1,20 @@
+# Generated by Django 5.2 on 2026-10-18 08:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chapters', '0006_chapterbooking_booking_chapter_dates_idx'),
+        ('colivers', '0009_alter_coliver_created_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='coliver',
+            index=models.Index(fields=['user', '-created_at'], name='coliver_user_created_idx'),
+        ),
+    ]
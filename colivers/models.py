@@ -4,10 +4,13 @@ from datetime import datetime
 from django.contrib.auth.models import User
 from chapters.models import Chapter
 from decimal import Decimal
-from django.db.models.signals import pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
+from core import user_data
+from core.tracking import FieldTrackerMixin
+from userprofile.models import Userprofile
 
-class Coliver(models.Model):
+class Coliver(FieldTrackerMixin, models.Model):
 
     COLIVER_STATUS_CHOICES = [
         ('ONBOARDING', 'Onboarding'),
@@ -39,6 +42,11 @@ class Coliver(models.Model):
         default='ONBOARDING'
     )
 
+    # Used by chapters.pricing.price_many
+    pricing_chapter_field = 'chapter_name'
+
+    tracked_fields = ('user', 'created_at', 'is_active', 'arrival_date', 'departure_date', 'chapter_name', 'manual_cost')
+
     def calculate_cost(self):
         """Calculate the total cost for the coliver's stay using tiered pricing."""
         # Only use manual_cost if it's set to a positive value
@@ -83,18 +91,53 @@ class Coliver(models.Model):
 
     class Meta:
         ordering = ['-arrival_date']
+        indexes = [
+            # Latest coliver record for a user (context processors, core_router, dashboard)
+            models.Index(fields=['user', '-created_at'], name='coliver_user_created_idx'),
+        ]
 
 @receiver(pre_save, sender='colivers.Coliver')
 def handle_coliver_status_change(sender, instance, **kwargs):
     """Handle status changes when a coliver is deactivated"""
     if instance.pk:  # Only for existing colivers
-        try:
-            old_instance = Coliver.objects.get(pk=instance.pk)
-            if old_instance.is_active and not instance.is_active:
-                # When deactivating a coliver, update their status
-                instance.status = 'APPLICATION'
-        except Coliver.DoesNotExist:
-            pass
+        if instance.previous('is_active') and not instance.is_active:
+            # When deactivating a coliver, update their status
+            instance.status = 'APPLICATION'
+
+
+def current_coliver_of(user):
+    """The user's most recent coliver record, read from their profile pointer."""
+    try:
+        return user.userprofile.current_coliver
+    except Userprofile.DoesNotExist:
+        return None
+
+
+def latest_coliver_id(user_id):
+    return Coliver.objects.filter(user_id=user_id).order_by('-created_at').values_list('pk', flat=True).first()
+
+
+def refresh_current_coliver(user_id):
+    """Point the user's profile at their most recent coliver record, creating the profile if needed."""
+    if user_id is not None:
+        Userprofile.objects.update_or_create(user_id=user_id, defaults={'current_coliver_id': latest_coliver_id(user_id)})
+
+
+@receiver(post_save, sender=Coliver)
+def update_current_coliver_on_save(sender, instance, created, **kwargs):
+    # Only the owner and created_at decide which record is the latest, so other edits cost nothing here
+    if created or instance.has_changed('user') or instance.has_changed('created_at'):
+        refresh_current_coliver(instance.user_id)
+    if not created and instance.has_changed('user'):
+        refresh_current_coliver(instance.previous('user'))
+
+
+@receiver(post_delete, sender=Coliver)
+def update_current_coliver_on_delete(sender, instance, **kwargs):
+    # Only update an existing profile: when the user itself is being deleted the
+    # profile may already be gone and must not be created again
+    if instance.user_id is not None:
+        Userprofile.objects.filter(user_id=instance.user_id).update(current_coliver_id=latest_coliver_id(instance.user_id))
 
-    
 
+user_data.register('user', Coliver)
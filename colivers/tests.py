@@ -1,3 +1,29 @@
+from datetime import date
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
+
+from .models import Coliver
+
+
+class ColiverSearchAdminTestCase(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin', password='testpass123', email='admin@example.com')
+        self.coliver = Coliver.objects.create(
+            first_name='Search', last_name='Able', email='s@example.com',
+            arrival_date=date(2025, 1, 1), departure_date=date(2025, 2, 1)
+        )
+        self.client.force_login(self.admin)
+
+    def test_only_the_autocomplete_view_is_open(self):
+        """Test that the search-only coliver admin refuses its add and change pages"""
+        self.assertEqual(self.client.get(reverse('admin:colivers_coliver_add')).status_code, 403)
+        self.assertEqual(self.client.get(reverse('admin:colivers_coliver_change', args=[self.coliver.pk])).status_code, 403)
+        self.assertEqual(self.client.get(reverse('admin:colivers_coliver_delete', args=[self.coliver.pk])).status_code, 403)
+
+        results = self.client.get(reverse('admin:autocomplete'), {
+            'app_label': 'payments', 'model_name': 'automaticpayment', 'field_name': 'coliver', 'term': 'Search',
+        }).json()['results']
+        self.assertEqual([result['id'] for result in results], [str(self.coliver.pk)])
 
-# Create your tests here.
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+LOCMEM_BACKEND = 'django.core.cache.backends.locmem.LocMemCache'
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    versioned_cache and user_data invalidate by bumping a version in the cache, which
+    only reaches other processes when the cache is shared between them.
+    """
+    if getattr(settings, 'RENDER', False) and settings.CACHES['default']['BACKEND'] == LOCMEM_BACKEND:
+        return [Warning(
+            'The default cache is per-process memory, so cache invalidations do not reach other web or job workers.',
+            hint='Set CACHE_URL to a shared backend such as redis://.',
+            id='core.W001',
+        )]
+    return []
@@ -0,0 +1,13 @@
+from django.utils.functional import SimpleLazyObject
+
+from . import user_data
+
+
+def user_data_version(request):
+    """
+    The signed-in user's data version, for {% cache %} fragments that only show
+    their own rows. Looked up the first time a template uses it.
+    """
+    if not request.user.is_authenticated:
+        return {}
+    return {'user_data_version': SimpleLazyObject(lambda: user_data.get_version(request.user.pk))}
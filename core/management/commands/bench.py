@@ -0,0 +1,161 @@
+import json
+import logging
+import math
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from django.urls import reverse
+
+from colivers.models import Coliver
+from core.querycount import record_queries
+from core.seeding import Rollback, invalidate_caches, seed
+
+ADMIN_CHANGELISTS = [
+    'admin:applications_activeapplication_changelist',
+    'admin:colivers_activecoliver_changelist',
+    'admin:payments_payment_changelist',
+    'admin:todos_todo_changelist',
+    'admin:archive_archive_changelist',
+]
+
+# The test client needs a host from ALLOWED_HOSTS
+HOST = 'localhost'
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(pct / 100 * len(ordered)) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway dataset, time the applicant, coliver and admin flows through the '
+        'test client and print p50/p95 latency and queries per request as JSON. '
+        'Everything is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=20_000, help='Approximate number of rows to seed')
+        parser.add_argument('--iterations', type=int, default=20, help='Requests per step')
+        parser.add_argument('--output', help='Also write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        # Every request is measured here already; keep the per-request log lines out of the report
+        query_logger = logging.getLogger('core.queries')
+        level = query_logger.level
+        query_logger.setLevel(logging.ERROR)
+        try:
+            with transaction.atomic():
+                report = self.run(options['rows'], options['iterations'])
+                raise Rollback
+        except Rollback:
+            # The rows are gone, but what the flows cached from them is not
+            invalidate_caches(self.user_ids, self.chapter_ids)
+        finally:
+            query_logger.setLevel(level)
+
+        output = json.dumps(report, indent=2)
+        self.stdout.write(output)
+        if options['output']:
+            with open(options['output'], 'w') as report_file:
+                report_file.write(output + '\n')
+
+    def run(self, rows, iterations):
+        started = time.perf_counter()
+        data = seed(rows)
+        seed_seconds = time.perf_counter() - started
+
+        self.samples = {}
+        self.applicant_flow(data, iterations)
+        self.coliver_flow(data, iterations)
+        self.admin_flow(data, iterations)
+        # Everyone created from here on, including the applicants who signed up
+        self.user_ids = list(User.objects.filter(pk__gte=data['admin'].pk).values_list('pk', flat=True))
+        self.chapter_ids = [chapter.pk for chapter in data['chapters']]
+
+        return {
+            'date': date.today().isoformat(),
+            'rows': sum(data['counts'].values()),
+            'counts': data['counts'],
+            'iterations': iterations,
+            'seed_seconds': round(seed_seconds, 2),
+            'steps': {
+                step: {
+                    'p50_ms': round(percentile([ms for ms, _ in samples], 50), 2),
+                    'p95_ms': round(percentile([ms for ms, _ in samples], 95), 2),
+                    'queries_p50': percentile([queries for _, queries in samples], 50),
+                    'queries_max': max(queries for _, queries in samples),
+                }
+                for step, samples in self.samples.items()
+            },
+        }
+
+    def request(self, client, step, method, url, data=None, expect=(200, 302)):
+        started = time.perf_counter()
+        with record_queries() as recorder:
+            response = getattr(client, method)(url, data or {})
+        elapsed = (time.perf_counter() - started) * 1000
+        if response.status_code not in expect:
+            raise RuntimeError(f'{step}: {method.upper()} {url} returned {response.status_code}')
+        self.samples.setdefault(step, []).append((elapsed, recorder.count))
+        return response
+
+    def applicant_flow(self, data, iterations):
+        """signup -> dates form -> availability -> available_chapters -> chapter choice -> step 2"""
+        date_join = date.today() + timedelta(days=30)
+        date_leave = date_join + timedelta(days=60)
+        dates = {
+            'first_name': 'Bench', 'last_name': 'Applicant', 'guests': '1', 'member_type': 'new member',
+            'date_join': date_join.isoformat(), 'date_leave': date_leave.isoformat(),
+        }
+        chapter = data['chapters'][0]
+
+        for i in range(iterations):
+            client = Client(HTTP_HOST=HOST)
+            email = f'bench-{i}@example.com'
+            self.request(client, 'signup', 'post', reverse('signup'), {
+                'username': f'bench-applicant-{i}', 'email': email,
+                'password1': 'bench-Passw0rd!', 'password2': 'bench-Passw0rd!',
+            }, expect=(302,))
+            self.request(client, 'application_form', 'get', reverse('applications'))
+            self.request(client, 'check_availability', 'post', reverse('applications'),
+                         dict(dates, email=email, check_availability='1'))
+
+            session = client.session
+            session['application_data'] = dict(dates, email=email)
+            session.save()
+            self.request(client, 'available_chapters', 'get', reverse('available_chapters'))
+
+            self.request(client, 'choose_chapter', 'post', reverse('applications'),
+                         dict(dates, email=email, chapter=chapter.pk), expect=(302,))
+            self.request(client, 'application_step2', 'get', reverse('application_step2'))
+
+    def coliver_flow(self, data, iterations):
+        resident = data['users'][0]
+        chapter = data['chapters'][0]
+        # Saved normally so the signals point the resident's profile at it
+        Coliver.objects.create(
+            user=resident, chapter_name=chapter, first_name='Bench', last_name='Resident',
+            email='bench-resident@example.com', arrival_date=date.today(),
+            departure_date=date.today() + timedelta(days=60), is_active=True
+        )
+        client = Client(HTTP_HOST=HOST)
+        client.force_login(resident)
+        for _ in range(iterations):
+            self.request(client, 'dashboard', 'get', reverse('dashboard:dashboard'), expect=(200,))
+            self.request(client, 'availability_matrix', 'get', reverse('availability_matrix'), expect=(200,))
+
+    def admin_flow(self, data, iterations):
+        admin = data['admin']
+        admin.is_superuser = True
+        admin.save(update_fields=['is_superuser'])
+        client = Client(HTTP_HOST=HOST)
+        client.force_login(admin)
+        for name in ADMIN_CHANGELISTS:
+            for _ in range(iterations):
+                self.request(client, name.split(':')[1], 'get', reverse(name), expect=(200,))
@@ -0,0 +1,133 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from applications.models import Application
+from chapters.models import ChapterBooking
+from colivers.models import Coliver
+from core.seeding import Rollback, seed
+from payments.models import Payment
+from todos.models import Todo
+
+# Backends with transactional DDL, where dropping the indexes is rolled back too.
+# MySQL and Oracle commit implicitly on DROP INDEX, which would lose them for good.
+SUPPORTED_VENDORS = ('postgresql', 'sqlite')
+
+# (model, index name) for every composite index on a hot lookup path
+HOT_PATH_INDEXES = [
+    (Coliver, 'coliver_user_created_idx'),
+    (Todo, 'todo_type_ref_status_idx'),
+    (Payment, 'payment_user_status_due_idx'),
+    (ChapterBooking, 'booking_chapter_dates_idx'),
+    (Application, 'app_owner_status_active_idx'),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway dataset and print the query plans and timings of the hot lookups '
+        'with and without their composite indexes. Everything is rolled back afterwards. '
+        'The indexes are dropped inside the same transaction, so on PostgreSQL the coliver, todo, '
+        'payment, booking and application tables stay ACCESS EXCLUSIVE locked for the whole run. '
+        'Only runs with DEBUG on or with --i-know-this-locks-tables.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000, help='Approximate number of rows to seed')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per query when timing')
+        parser.add_argument(
+            '--i-know-this-locks-tables', action='store_true', dest='allow_locking',
+            help='Run without DEBUG, accepting that the indexed tables are locked until the run ends'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor not in SUPPORTED_VENDORS:
+            raise CommandError(
+                f'explain_indexes drops and recreates indexes inside a transaction and only runs on '
+                f'{" or ".join(SUPPORTED_VENDORS)}, not {connection.vendor}.'
+            )
+        if not (settings.DEBUG or options['allow_locking']):
+            raise CommandError(
+                'explain_indexes locks the indexed tables until it finishes, which stops all traffic to them '
+                'on a shared database. Run it with DEBUG on, or pass --i-know-this-locks-tables.'
+            )
+        try:
+            with transaction.atomic():
+                self.run(options['rows'], options['repeat'])
+                raise Rollback
+        except Rollback:
+            self.stdout.write(self.style.SUCCESS('Seeded data rolled back.'))
+
+    def run(self, rows, repeat):
+        started = time.perf_counter()
+        data = seed(rows)
+        self.stdout.write(f"Seeded {sum(data['counts'].values()):,} rows in {time.perf_counter() - started:.1f}s")
+        self.analyze()
+
+        queries = self.hot_queries(data)
+        editor = connection.schema_editor()
+        indexes = [(model, next(i for i in model._meta.indexes if i.name == name)) for model, name in HOT_PATH_INDEXES]
+
+        with connection.cursor() as cursor:
+            for model, index in indexes:
+                cursor.execute(editor.sql_delete_index % {
+                    'table': editor.quote_name(model._meta.db_table),
+                    'name': editor.quote_name(index.name),
+                })
+        self.analyze()
+        before = self.measure(queries, repeat)
+
+        with connection.cursor() as cursor:
+            for model, index in indexes:
+                cursor.execute(str(index.create_sql(model, editor)))
+        self.analyze()
+        after = self.measure(queries, repeat)
+
+        for label in queries:
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n{label}'))
+            for heading, results in (('without index', before), ('with index', after)):
+                plan, median = results[label]
+                self.stdout.write(f'  {heading}: median {median * 1000:.2f} ms')
+                for line in plan.splitlines():
+                    self.stdout.write(f'    {line}')
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def hot_queries(self, data):
+        user = data['users'][len(data['users']) // 2]
+        chapter = data['chapters'][0]
+        todo = Todo.objects.filter(task_type='payment_review').values('reference_id').first()
+        booking = ChapterBooking.objects.filter(chapter=chapter).values('start_date').first()
+        start = booking['start_date'] if booking else None
+        return {
+            'Latest coliver for a user': Coliver.objects.filter(user=user).order_by('-created_at')[:1],
+            'Current coliver for a user': Coliver.objects.filter(current_profiles__user=user),
+            'Pending todo for a payment': Todo.objects.filter(
+                task_type='payment_review', reference_id=todo['reference_id'] if todo else '1', status='pending'
+            ),
+            "User's requested payments by due date": Payment.objects.filter(
+                user=user, status='requested'
+            ).order_by('due_date'),
+            'Bookings overlapping a stay': ChapterBooking.objects.filter(
+                chapter=chapter, start_date__lt=start + timedelta(days=30), end_date__gt=start
+            ) if start else ChapterBooking.objects.filter(chapter=chapter),
+            "User's draft applications": Application.objects.filter(created_by=user, status='Draft', is_active=True),
+        }
+
+    def measure(self, queries, repeat):
+        results = {}
+        for label, queryset in queries.items():
+            plan = queryset.explain()
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append(time.perf_counter() - started)
+            results[label] = (plan, statistics.median(timings))
+        return results
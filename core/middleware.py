@@ -0,0 +1,57 @@
+import logging
+
+from django.conf import settings
+
+from .querycount import record_queries
+from .user_status import UserStatus
+
+logger = logging.getLogger('core.queries')
+
+# A query repeated this many times in one request is logged as a likely N+1
+N_PLUS_ONE_THRESHOLD = 5
+
+
+class UserStatusMiddleware:
+    """Attach a lazily computed UserStatus to every request as request.user_status."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.user_status = UserStatus(request.user)
+        return self.get_response(request)
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Record the query count, database time and repeated queries of every request.
+    The numbers are logged, and sent in a Server-Timing header in DEBUG or to staff.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with record_queries() as recorder:
+            response = self.get_response(request)
+
+        user = getattr(request, 'user', None)
+        if settings.DEBUG or (user is not None and user.is_staff):
+            response['Server-Timing'] = recorder.server_timing()
+
+        stats = {
+            'path': request.path,
+            'method': request.method,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'db_ms': round(recorder.duration * 1000, 1),
+            'duplicates': recorder.duplicates,
+        }
+        repeated = max(recorder.fingerprints.values(), default=0)
+        if repeated >= N_PLUS_ONE_THRESHOLD:
+            logger.warning('%s %s ran one query %d times\n%s', request.method, request.path,
+                           repeated, recorder.summary(), extra={'query_stats': stats})
+        else:
+            logger.info('%s %s: %d queries in %.1f ms', request.method, request.path,
+                        recorder.count, recorder.duration * 1000, extra={'query_stats': stats})
+        return response
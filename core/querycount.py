@@ -0,0 +1,63 @@
+"""
+Per-request query instrumentation.
+QueryRecorder is a connection.execute_wrapper that counts queries, sums their
+database time and groups them by fingerprint, so N+1 patterns show up as one
+fingerprint repeated many times.
+"""
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Placeholder lists of any length (IN (%s, %s, ...)) fingerprint the same
+_PLACEHOLDER_LIST = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)')
+
+
+def fingerprint(sql):
+    """The query with whitespace normalised and placeholder lists collapsed."""
+    return ' '.join(_PLACEHOLDER_LIST.sub('(...)', sql).split())
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    @property
+    def duplicates(self):
+        """{fingerprint: times run} for every query that ran more than once."""
+        return {sql: times for sql, times in self.fingerprints.most_common() if times > 1}
+
+    def server_timing(self):
+        """Value for the Server-Timing response header."""
+        duplicates = sum(times - 1 for times in self.duplicates.values())
+        return (
+            f'db;dur={self.duration * 1000:.1f};desc="{self.count} queries", '
+            f'dbdup;desc="{duplicates} duplicate queries"'
+        )
+
+    def summary(self, limit=5):
+        lines = [f'{self.count} queries in {self.duration * 1000:.1f} ms']
+        for sql, times in list(self.duplicates.items())[:limit]:
+            lines.append(f'  {times}x {sql}')
+        return '\n'.join(lines)
+
+
+@contextmanager
+def record_queries(using=DEFAULT_DB_ALIAS):
+    """Record the queries run on the `using` connection inside the block."""
+    recorder = QueryRecorder()
+    with connections[using].execute_wrapper(recorder):
+        yield recorder
@@ -0,0 +1,167 @@
+"""
+Synthetic data for benchmarks and query plan checks.
+Everything is created with bulk_create, so no signals fire and seeding a
+hundred thousand rows takes seconds. Callers normally seed inside a
+transaction they roll back afterwards, by raising Rollback.
+"""
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from applications.models import Application
+from chapters import intervals
+from chapters.models import Chapter, ChapterBooking, PricingTier
+from colivers.models import Coliver
+from core import user_data, versioned_cache
+from payments.models import Payment
+from questions.models import Question
+from todos.models import Todo
+from userprofile.models import Userprofile
+
+BATCH_SIZE = 2000
+QUESTIONS = 3
+TIERED_SHARE = 0.5
+
+# Share of the requested rows that goes to each table
+SHARES = {
+    'users': 0.02,
+    'chapters': 0.0005,
+    'colivers': 0.2,
+    'applications': 0.1,
+    'bookings': 0.1,
+    'payments': 0.3,
+    'todos': 0.28,
+}
+
+
+# Namespaces that cache rows seed() creates, which bulk_create does not invalidate
+SEEDED_NAMESPACES = ('pricing_plans', 'active_questions')
+
+
+class Rollback(Exception):
+    """Raised inside transaction.atomic() to throw the seeded rows away."""
+
+
+def seed(rows=100_000, random_seed=0):
+    """
+    Create roughly `rows` rows spread over users, chapters and their pricing tiers,
+    colivers, applications, bookings, payments and todos, plus a few application
+    questions. Returns a dict of the objects a benchmark needs
+    to pick realistic lookup values from.
+    """
+    rng = random.Random(random_seed)
+    counts = {name: max(1, int(rows * share)) for name, share in SHARES.items()}
+    prefix = f'seed{timezone.now():%Y%m%d%H%M%S%f}'
+    today = date.today()
+
+    admin = User.objects.create(username=f'{prefix}-admin', password='!', is_staff=True)
+    users = User.objects.bulk_create([
+        User(username=f'{prefix}-{i}', password='!')
+        for i in range(counts['users'])
+    ], batch_size=BATCH_SIZE)
+    chapters = Chapter.objects.bulk_create([
+        Chapter(name=f'Seed chapter {i}', created_by=admin, cost_per_night=rng.randint(20, 80) * 1000,
+                use_tiered_pricing=rng.random() < TIERED_SHARE)
+        for i in range(counts['chapters'])
+    ], batch_size=BATCH_SIZE)
+    PricingTier.objects.bulk_create([
+        PricingTier(chapter=chapter, tier_name=name, duration_days=days, tier_order=order,
+                    price_per_night=rng.randint(20, 80) * 1000)
+        for chapter in chapters if chapter.use_tiered_pricing
+        for order, (name, days) in enumerate([('Short-term', 28), ('Mid-term', 56), ('Long-term', 365)], start=1)
+    ], batch_size=BATCH_SIZE)
+    counts['tiers'] = sum(3 for chapter in chapters if chapter.use_tiered_pricing)
+    Question.objects.bulk_create([
+        Question(text=f'Seed question {i}', order=i) for i in range(QUESTIONS)
+    ])
+
+    def stay():
+        arrival = today + timedelta(days=rng.randint(-365, 365))
+        return arrival, arrival + timedelta(days=rng.randint(7, 120))
+
+    colivers = []
+    for i in range(counts['colivers']):
+        arrival, departure = stay()
+        colivers.append(Coliver(
+            user=rng.choice(users), chapter_name=rng.choice(chapters),
+            first_name='Seed', last_name=str(i), email=f'{prefix}-{i}@example.com',
+            arrival_date=arrival, departure_date=departure,
+            created_at=timezone.now() - timedelta(minutes=rng.randint(0, 500_000)),
+            is_active=rng.random() < 0.7
+        ))
+    Coliver.objects.bulk_create(colivers, batch_size=BATCH_SIZE)
+    # Signals are skipped, so point each profile at its latest coliver here
+    Userprofile.objects.bulk_create([Userprofile(user=user) for user in users], batch_size=BATCH_SIZE)
+    Userprofile.objects.filter(user__in=users).update(current_coliver=Subquery(
+        Coliver.objects.filter(user=OuterRef('user')).order_by('-created_at').values('pk')[:1]
+    ))
+
+    applications = []
+    for i in range(counts['applications']):
+        arrival, departure = stay()
+        applications.append(Application(
+            created_by=rng.choice(users), chapter=rng.choice(chapters),
+            first_name='Seed', last_name=str(i), email=f'{prefix}-{i}@example.com',
+            date_join=arrival, date_leave=departure,
+            status=rng.choice(['Draft', 'Submitted', 'Submitted', 'Withdrawn']),
+            is_active=rng.random() < 0.8
+        ))
+    Application.objects.bulk_create(applications, batch_size=BATCH_SIZE)
+
+    # Each chapter is walked forward one stay and gap at a time, so no two of its
+    # bookings overlap (the booking_no_overlap constraint on Postgres)
+    bookings = []
+    cursors = {chapter.pk: today - timedelta(days=365 + rng.randint(0, 30)) for chapter in chapters}
+    for i in range(counts['bookings']):
+        chapter = chapters[i % len(chapters)]
+        start = cursors[chapter.pk]
+        end = start + timedelta(days=rng.randint(7, 120))
+        cursors[chapter.pk] = end + timedelta(days=rng.randint(0, 30))
+        bookings.append(ChapterBooking(chapter=chapter, start_date=start, end_date=end))
+    ChapterBooking.objects.bulk_create(bookings, batch_size=BATCH_SIZE)
+
+    payments = Payment.objects.bulk_create([
+        Payment(
+            user=rng.choice(users), amount=rng.randint(100, 5000) * 1000, description='Seed payment',
+            status=rng.choice(['requested', 'proof_submitted', 'approved', 'approved', 'cancelled']),
+            due_date=today + timedelta(days=rng.randint(-180, 180)), created_by=admin
+        )
+        for _ in range(counts['payments'])
+    ], batch_size=BATCH_SIZE)
+
+    Todo.objects.bulk_create([
+        Todo(
+            title='Seed todo', description='', created_by=admin,
+            task_type=rng.choice(['payment_review', 'application_review', 'maintenance_review', 'transfer_review']),
+            # Unique references, so no object has two pending todos
+            reference_id=str(i + 1),
+            status=rng.choice(['pending', 'completed', 'completed'])
+        )
+        for i in range(counts['todos'])
+    ], batch_size=BATCH_SIZE)
+
+    invalidate_caches(chapter_ids=[chapter.pk for chapter in chapters])
+    return {
+        'admin': admin,
+        'users': users,
+        'chapters': chapters,
+        'payments': payments,
+        'counts': counts,
+    }
+
+
+def invalidate_caches(user_ids=(), chapter_ids=()):
+    """
+    Bump every cache namespace seeded rows may have been read into. seed() calls it
+    once the rows exist, and callers call it again after rolling them back, since
+    the cache is not part of the transaction.
+    """
+    for namespace in SEEDED_NAMESPACES:
+        versioned_cache.invalidate(namespace)
+    for user_id in user_ids:
+        user_data.invalidate(user_id)
+    for chapter_id in chapter_ids:
+        intervals.invalidate(chapter_id)
@@ -0,0 +1,25 @@
+"""Test helpers shared by the apps' test suites."""
+import json
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from .querycount import record_queries
+
+
+def load_query_budgets():
+    """{url name: max queries} from settings.QUERY_BUDGETS_FILE."""
+    with open(settings.QUERY_BUDGETS_FILE) as budgets:
+        return json.load(budgets)
+
+
+class QueryBudgetMixin:
+    """TestCase mixin adding assertMaxQueries."""
+
+    @contextmanager
+    def assertMaxQueries(self, max_queries, using=DEFAULT_DB_ALIAS, label='Block'):
+        with record_queries(using) as recorder:
+            yield recorder
+        if recorder.count > max_queries:
+            self.fail(f'{label} ran more than {max_queries} queries: {recorder.summary()}')
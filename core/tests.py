@@ -1,3 +1,354 @@
-from django.test import TestCase
+import importlib
+import json
+import logging
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from applications.models import Application
+from archive.models import Archive
+from chapters.models import Chapter, ChapterBooking
+from colivers.models import Coliver, current_coliver_of
+from payments.models import AutomaticPaymentTemplate, Payment
+from rules.models import Rule
+from site_settings.models import SiteSettings
+from userprofile.models import Userprofile
+from . import versioned_cache
+from .checks import check_shared_cache
+from .log import JSONFormatter, SamplingFilter
+from .seeding import seed
+from .testing import QueryBudgetMixin, load_query_budgets
+from .user_status import UserStatus, get_user_status
+
+
+class UserStatusTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='status', password='testpass123')
+
+    def test_lookups_run_once_and_only_when_read(self):
+        """Test that each status lookup is lazy and cached for the request"""
+        Coliver.objects.create(
+            user=self.user, first_name='Old', last_name='Record', email='old@example.com',
+            arrival_date=date(2024, 1, 1), departure_date=date(2024, 2, 1), is_active=False,
+            created_at='2024-01-01T00:00:00Z'
+        )
+        latest = Coliver.objects.create(
+            user=self.user, first_name='New', last_name='Record', email='new@example.com',
+            arrival_date=date(2025, 1, 1), departure_date=date(2025, 2, 1)
+        )
+
+        with self.assertNumQueries(0):
+            status = UserStatus(self.user)
+        with self.assertNumQueries(1):
+            self.assertEqual(status.coliver, latest)
+            self.assertTrue(status.is_coliver)
+        with self.assertNumQueries(1):
+            self.assertFalse(status.has_any_applications)
+            self.assertFalse(status.has_draft_applications)
+            self.assertTrue(status.show_application_button)
+
+    def test_get_user_status_without_middleware(self):
+        """Test that the status is created on demand and reused for the same request"""
+        request = RequestFactory().get('/')
+        request.user = self.user
+        self.assertIs(get_user_status(request), get_user_status(request))
+
+    def test_page_render_looks_up_coliver_once(self):
+        """Test that the context processors and views share one coliver lookup per request"""
+        Application.objects.create(created_by=self.user, first_name='A', last_name='B', email='a@example.com')
+        self.client.force_login(self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('applications_list'))
+        self.assertEqual(response.status_code, 200)
+        coliver_queries = [q for q in queries if 'FROM "colivers_coliver"' in q['sql']]
+        self.assertEqual(len(coliver_queries), 1)
+
+    def test_current_coliver_follows_saves_and_deletes(self):
+        """Test that the profile pointer tracks the user's latest coliver record"""
+        other = User.objects.create_user(username='other', password='testpass123')
+        old = Coliver.objects.create(
+            user=self.user, first_name='Old', last_name='Record', email='old@example.com',
+            arrival_date=date(2024, 1, 1), departure_date=date(2024, 2, 1)
+        )
+        new = Coliver.objects.create(
+            user=self.user, first_name='New', last_name='Record', email='new@example.com',
+            arrival_date=date(2025, 1, 1), departure_date=date(2025, 2, 1)
+        )
+        self.assertEqual(current_coliver_of(User.objects.get(pk=self.user.pk)), new)
+
+        # created_at is editable, and backdating a record can make another one the latest
+        new.created_at = old.created_at - timedelta(days=1)
+        new.save()
+        self.assertEqual(current_coliver_of(User.objects.get(pk=self.user.pk)), old)
+        new.created_at = old.created_at + timedelta(days=1)
+        new.save()
+        self.assertEqual(current_coliver_of(User.objects.get(pk=self.user.pk)), new)
+
+        new.user = other
+        new.save()
+        self.assertEqual(current_coliver_of(User.objects.get(pk=self.user.pk)), old)
+        self.assertEqual(current_coliver_of(User.objects.get(pk=other.pk)), new)
+
+        old.delete()
+        self.assertIsNone(current_coliver_of(User.objects.get(pk=self.user.pk)))
+
+        other.delete()
+        self.assertFalse(Userprofile.objects.filter(user_id=other.pk).exists())
+
+
+class VersionedCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        versioned_cache.reset_stats()
+
+    def test_hits_misses_and_invalidations_are_counted(self):
+        """Test that values are loaded once per version and the counters track it"""
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return 'value'
+
+        self.assertEqual(versioned_cache.get('test', loader), 'value')
+        self.assertEqual(versioned_cache.get('test', loader), 'value')
+        versioned_cache.invalidate('test')
+        self.assertEqual(versioned_cache.get('test', loader), 'value')
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(versioned_cache.get_stats()['test'], {'hits': 1, 'misses': 2, 'invalidations': 1})
+
+    def test_none_is_cached(self):
+        """Test that a missing row is cached rather than looked up on every call"""
+        with self.assertNumQueries(1):
+            self.assertIsNone(SiteSettings.get_settings())
+            self.assertIsNone(SiteSettings.get_settings())
+
+    def test_saving_a_registered_model_invalidates(self):
+        """Test that post_save and post_delete bump the namespace version"""
+        self.assertIsNone(SiteSettings.get_settings())
+        settings = SiteSettings.objects.create()
+        self.assertEqual(SiteSettings.get_settings(), settings)
+        settings.delete()
+        self.assertIsNone(SiteSettings.get_settings())
+
+
+class SharedCacheCheckTestCase(TestCase):
+    def test_warns_about_locmem_on_render(self):
+        """Test that a per-process cache is flagged on Render and accepted locally"""
+        self.assertEqual(check_shared_cache(None), [])
+        with self.settings(RENDER=True):
+            self.assertEqual([w.id for w in check_shared_cache(None)], ['core.W001'])
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache:6379'}}
+        with self.settings(RENDER=True, CACHES=redis):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+class FieldTrackerTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='tracked', password='testpass123')
+        admin = User.objects.create_user(username='admin', password='testpass123', is_staff=True)
+        self.chapter = Chapter.objects.create(name='Tracked', created_by=admin, cost_per_night=1000)
+        Coliver.objects.create(
+            user=self.user, first_name='Track', last_name='Ed', email='t@example.com', chapter_name=self.chapter,
+            arrival_date=date(2025, 1, 1), departure_date=date(2025, 1, 11)
+        )
+
+    def test_save_compares_without_refetching(self):
+        """Test that a save reacts to a change without selecting the old row"""
+        coliver = Coliver.objects.get()
+        coliver.is_active = False
+        with self.assertNumQueries(1):
+            coliver.save()
+        self.assertEqual(coliver.status, 'APPLICATION')
+        self.assertFalse(coliver.has_changed('is_active'))
+        self.assertFalse(coliver.previous('is_active'))
+
+    def test_previous_values_survive_until_post_save(self):
+        """Test that post_save handlers see the pre-save values, so payments follow date changes"""
+        template = AutomaticPaymentTemplate.objects.create(
+            title='Stay', description_template='Stay for {coliver_name}', amount_type='total_cost'
+        )
+        coliver = Coliver.objects.get()
+        template.create_payment_for_coliver(coliver)
+
+        coliver.departure_date = date(2025, 1, 21)
+        self.assertEqual(coliver.changed_fields(), ['departure_date'])
+        coliver.save()
+        self.assertEqual(Payment.objects.get().amount, Decimal('20000.00'))
+
+    def test_deferred_fields_are_loaded_on_demand(self):
+        """Test that a deferred tracked field falls back to one query"""
+        coliver = Coliver.objects.only('pk').get()
+        with self.assertNumQueries(1):
+            self.assertTrue(coliver.previous('is_active'))
+            self.assertEqual(coliver.previous('arrival_date'), date(2025, 1, 1))
+
+
+class ExplainIndexesCommandTestCase(TestCase):
+    def test_plans_use_the_composite_indexes_and_data_is_rolled_back(self):
+        """Test that the benchmark shows the new indexes in use and leaves nothing behind"""
+        out = StringIO()
+        call_command('explain_indexes', rows=2000, repeat=1, allow_locking=True, stdout=out)
+        output = out.getvalue()
+        if connection.vendor == 'sqlite':
+            self.assertIn('todo_type_ref_status_idx', output)
+            self.assertIn('coliver_user_created_idx', output)
+        self.assertIn('Seeded data rolled back.', output)
+        self.assertFalse(Coliver.objects.exists())
+        self.assertEqual(User.objects.count(), 0)
+
+    def test_refuses_backends_without_transactional_ddl(self):
+        """Test that the command will not drop indexes where the rollback cannot restore them"""
+        with mock.patch.object(connection, 'vendor', 'mysql'):
+            with self.assertRaisesMessage(CommandError, 'not mysql'):
+                call_command('explain_indexes', rows=10, repeat=1, stdout=StringIO())
+
+
+    def test_refuses_to_lock_tables_without_debug_or_consent(self):
+        """Test that outside DEBUG the command only runs when told the tables will be locked"""
+        with self.assertRaisesMessage(CommandError, '--i-know-this-locks-tables'):
+            call_command('explain_indexes', rows=10, repeat=1, stdout=StringIO())
+        self.assertFalse(Coliver.objects.exists())
+
+
+class SeedTestCase(TestCase):
+    def test_seeded_bookings_satisfy_the_overlap_constraint(self):
+        """Test that seed() creates no bookings the Postgres exclusion constraint would reject"""
+        migration = importlib.import_module('chapters.migrations.0007_chapterbooking_no_overlap')
+        data = seed(5000)
+        self.assertEqual(ChapterBooking.objects.count(), data['counts']['bookings'])
+        self.assertEqual(migration.find_conflicting_bookings(ChapterBooking), ([], []))
+
+
+class QueryBudgetTestCase(QueryBudgetMixin, TestCase):
+    """
+    Every URL in query_budgets.json is requested against a small dataset and must
+    stay within its budget. Views with an N+1 pattern outgrow their budget as
+    soon as a few more rows are added.
+    """
+    ROWS = 5
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(username='budget-admin', password='testpass123', email='a@example.com')
+        self.user = User.objects.create_user(username='budget-user', password='testpass123')
+        chapters = [Chapter.objects.create(name=f'Budget {i}', created_by=self.admin) for i in range(self.ROWS)]
+        for i, chapter in enumerate(chapters):
+            ChapterBooking.objects.create(
+                chapter=chapter, start_date=date.today() + timedelta(days=i), end_date=date.today() + timedelta(days=i + 10)
+            )
+            Rule.objects.create(title=f'Rule {i}', description='Be nice').chapters.add(chapter)
+        for i in range(self.ROWS):
+            owner = User.objects.create_user(username=f'budget-{i}', password='testpass123')
+            Coliver.objects.create(
+                user=owner, chapter_name=chapters[i], first_name='Co', last_name=str(i), email=f'co{i}@example.com',
+                arrival_date=date.today(), departure_date=date.today() + timedelta(days=30)
+            )
+            Payment.objects.create(user=self.user, amount=Decimal('1000.00'), description=f'Rent {i}',
+                                   due_date=date.today() + timedelta(days=i - 2), created_by=self.admin)
+            Payment.objects.create(user=owner, amount=Decimal('1000.00'), description=f'Rent {i}',
+                                   status='proof_submitted', created_by=self.admin)
+            Application.objects.create(
+                created_by=owner, chapter=chapters[i], first_name='App', last_name=str(i), email=f'app{i}@example.com',
+                date_join=date.today(), date_leave=date.today() + timedelta(days=20)
+            )
+            Archive.objects.create(
+                first_name='Old', last_name=str(i), email=f'old{i}@example.com', chapter=chapters[i],
+                date_join=date(2024, 1, 1), date_leave=date(2024, 2, 1)
+            )
+        Coliver.objects.create(
+            user=self.user, chapter_name=chapters[0], first_name='Me', last_name='Myself', email='me@example.com',
+            arrival_date=date.today(), departure_date=date.today() + timedelta(days=30)
+        )
+        self.application = Application.objects.create(
+            created_by=self.user, chapter=chapters[0], first_name='Me', last_name='Myself', email='me@example.com',
+            date_join=date.today(), date_leave=date.today() + timedelta(days=20)
+        )
+
+    def request_url(self, name):
+        """Log in as the right user, prepare the session and return the URL for name."""
+        if name.startswith('admin:'):
+            self.client.force_login(self.admin)
+            return reverse(name)
+        self.client.force_login(self.user)
+        if name == 'application_edit':
+            return reverse(name, args=[self.application.pk])
+        if name == 'available_chapters':
+            session = self.client.session
+            session['application_data'] = {
+                'first_name': 'Me', 'last_name': 'Myself', 'email': 'me@example.com', 'guests': '1',
+                'member_type': 'new member', 'date_join': date.today().isoformat(),
+                'date_leave': (date.today() + timedelta(days=20)).isoformat(),
+            }
+            session.save()
+        return reverse(name)
+
+    def test_views_stay_within_their_query_budget(self):
+        for name, budget in load_query_budgets().items():
+            with self.subTest(url=name):
+                url = self.request_url(name)
+                with self.assertLogs('core.queries', level='INFO'), self.assertMaxQueries(budget, label=name):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+    def test_server_timing_header_is_sent_to_staff(self):
+        """Test that staff responses carry the query count and database time"""
+        self.client.force_login(self.admin)
+        with self.assertLogs('core.queries', level='INFO') as logs:
+            response = self.client.get(reverse('admin:payments_payment_changelist'))
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[0-9.]+;desc="\d+ queries", dbdup;desc="\d+ duplicate queries"$')
+        self.assertEqual(logs.records[-1].query_stats['status'], 200)
+
+        self.client.force_login(self.user)
+        with self.assertLogs('core.queries', level='INFO'):
+            response = self.client.get(reverse('availability_matrix'))
+        self.assertNotIn('Server-Timing', response)
+
+
+class BenchCommandTestCase(TestCase):
+    def test_reports_latency_and_queries_for_every_step(self):
+        """Test that the bench covers the applicant, coliver and admin flows and rolls back"""
+        out = StringIO()
+        call_command('bench', rows=500, iterations=2, stdout=out)
+        report = json.loads(out.getvalue())
+        for step in ('signup', 'available_chapters', 'application_step2', 'dashboard',
+                     'availability_matrix', 'payments_payment_changelist'):
+            self.assertIn(step, report['steps'])
+            self.assertGreater(report['steps'][step]['queries_max'], 0)
+            self.assertLessEqual(report['steps'][step]['p50_ms'], report['steps'][step]['p95_ms'])
+        self.assertEqual(User.objects.count(), 0)
+
+
+class StructuredLoggingTestCase(TestCase):
+    def make_record(self, level, **extra):
+        record = logging.getLogger('core.tests').makeRecord(
+            'core.tests', level, __file__, 1, 'Charged %s for %d nights', ('application 7', 3), None, extra=extra
+        )
+        return record
+
+    def test_json_formatter_includes_extra_fields(self):
+        """Test that records become one JSON object with the formatted message and extras"""
+        entry = json.loads(JSONFormatter().format(self.make_record(logging.INFO, query_stats={'queries': 4})))
+        self.assertEqual(entry['level'], 'INFO')
+        self.assertEqual(entry['logger'], 'core.tests')
+        self.assertEqual(entry['message'], 'Charged application 7 for 3 nights')
+        self.assertEqual(entry['query_stats'], {'queries': 4})
+        self.assertNotIn('args', entry)
+
+    def test_sampling_never_drops_warnings(self):
+        """Test that sampling only thins out records below WARNING"""
+        sampler = SamplingFilter(rate=0)
+        self.assertFalse(sampler.filter(self.make_record(logging.INFO)))
+        self.assertTrue(sampler.filter(self.make_record(logging.WARNING)))
+        self.assertTrue(SamplingFilter(rate=1).filter(self.make_record(logging.DEBUG)))
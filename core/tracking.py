@@ -0,0 +1,71 @@
+"""
+Change tracking for models whose save paths react to their own field changes.
+Values are snapshotted when a row is loaded, so save() and signal handlers can
+compare old and new values without fetching the row again.
+"""
+
+
+class FieldTrackerMixin:
+    """
+    Remembers the loaded values of the fields named in tracked_fields.
+    The snapshot is taken in from_db and refresh_from_db, and is only replaced
+    after save() has returned, so pre_save and post_save handlers still see the
+    values the row had before the save.
+    """
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_tracked_fields()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self._snapshot_tracked_fields(fields)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._snapshot_tracked_fields(kwargs.get('update_fields'))
+
+    def _tracked_attnames(self, names=None):
+        for name in self.tracked_fields:
+            if names is None or name in names:
+                yield name, self._meta.get_field(name).attname
+
+    def _snapshot_tracked_fields(self, names=None):
+        snapshot = self.__dict__.setdefault('_tracked_values', {})
+        deferred = self.get_deferred_fields()
+        for name, attname in self._tracked_attnames(names):
+            if attname not in deferred:
+                snapshot[name] = getattr(self, attname)
+
+    def previous(self, name):
+        """
+        Return the value field name had when this row was loaded or last saved.
+        Unsaved instances have no previous value and return None. Fields that were
+        deferred when the row was loaded are fetched from the database once.
+        """
+        if name not in self.tracked_fields:
+            raise ValueError(f"{name!r} is not in {type(self).__name__}.tracked_fields")
+        snapshot = self.__dict__.setdefault('_tracked_values', {})
+        if name not in snapshot:
+            if self.pk is None:
+                return None
+            missing = [n for n, _ in self._tracked_attnames() if n not in snapshot]
+            attnames = [attname for _, attname in self._tracked_attnames(missing)]
+            row = type(self)._base_manager.filter(pk=self.pk).values(*attnames).first()
+            if row is None:
+                return None
+            for missing_name, attname in zip(missing, attnames):
+                snapshot[missing_name] = row[attname]
+        return snapshot[name]
+
+    def has_changed(self, name):
+        """Whether field name differs from its previous value. Always True for unsaved rows."""
+        if self._state.adding and self.pk is None:
+            return True
+        return self.previous(name) != getattr(self, self._meta.get_field(name).attname)
+
+    def changed_fields(self):
+        return [name for name in self.tracked_fields if self.has_changed(name)]
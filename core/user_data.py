@@ -0,0 +1,39 @@
+"""
+Per-user data version.
+Anything cached for one user's pages includes this version in its key, and the
+signals of the models shown on those pages bump it, so only that user's
+entries go stale instead of the whole cache being flushed.
+"""
+from django.db.models.signals import post_delete, post_save
+
+from . import versioned_cache
+
+
+def namespace(user_id):
+    return f'user_data:{user_id}'
+
+
+def get_version(user_id):
+    return versioned_cache.get_version(namespace(user_id))
+
+
+def invalidate(user_id):
+    if user_id is not None:
+        versioned_cache.invalidate(namespace(user_id))
+
+
+def register(user_field, *models):
+    """Invalidate the data of the user in user_field whenever an instance of one of models is saved or deleted."""
+    def receiver(sender, instance, **kwargs):
+        invalidate(getattr(instance, f'{user_field}_id'))
+
+    def save_receiver(sender, instance, created, **kwargs):
+        receiver(sender, instance)
+        # A row moved to another user leaves the previous owner's data stale too
+        if not created and user_field in getattr(instance, 'tracked_fields', ()) and instance.has_changed(user_field):
+            invalidate(instance.previous(user_field))
+
+    for model in models:
+        uid = f'user_data:{model._meta.label_lower}'
+        post_save.connect(save_receiver, sender=model, weak=False, dispatch_uid=uid)
+        post_delete.connect(receiver, sender=model, weak=False, dispatch_uid=uid)
@@ -0,0 +1,68 @@
+from django.db.models import Count, Q
+from django.utils.functional import cached_property
+
+from applications.models import Application
+from colivers.models import Coliver
+from site_settings.models import SiteSettings
+
+
+class UserStatus:
+    """
+    Per-request answers to the questions every page asks about the current user.
+    Each lookup runs at most once per request, and only if something reads it.
+    """
+
+    def __init__(self, user):
+        self.user = user
+
+    @cached_property
+    def coliver(self):
+        """The user's most recent coliver record, if any."""
+        if not self.user.is_authenticated:
+            return None
+        # One join through the profile's pointer, maintained by the Coliver signals
+        return Coliver.objects.filter(current_profiles__user=self.user).first()
+
+    @property
+    def is_coliver(self):
+        return self.coliver is not None and self.coliver.is_active
+
+    @cached_property
+    def application_counts(self):
+        # Count active and draft applications together in a single query
+        if not self.user.is_authenticated:
+            return {'active': 0, 'drafts': 0}
+        return Application.objects.filter(
+            created_by=self.user,
+            is_active=True
+        ).aggregate(
+            active=Count('pk'),
+            drafts=Count('pk', filter=Q(status='Draft'))
+        )
+
+    @property
+    def has_any_applications(self):
+        return self.application_counts['active'] > 0
+
+    @property
+    def has_draft_applications(self):
+        return self.application_counts['drafts'] > 0
+
+    @property
+    def show_application_button(self):
+        if not self.user.is_authenticated:
+            return False
+        # Allow colivers to create new applications (for future stays, transfers, etc.)
+        return not self.has_any_applications or self.has_draft_applications or self.is_coliver
+
+    @cached_property
+    def site_settings(self):
+        return SiteSettings.get_settings()
+
+
+def get_user_status(request):
+    """Return the request's UserStatus, creating it if the middleware did not run."""
+    status = getattr(request, 'user_status', None)
+    if status is None:
+        status = request.user_status = UserStatus(request.user)
+    return status
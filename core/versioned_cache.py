@@ -0,0 +1,103 @@
+"""
+Versioned read-through cache for rows that are read far more often than written.
+Invalidating a namespace bumps its version, so stale entries are never addressed again.
+"""
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+_MISSING = object()
+
+_stats = defaultdict(Counter)
+_stats_lock = threading.Lock()
+
+
+def _count(namespace, event):
+    with _stats_lock:
+        _stats[namespace][event] += 1
+
+
+def _version_key(namespace):
+    return f'vcache:{namespace}:version'
+
+
+def _new_version():
+    # Start from the clock rather than 1, so a version key that was evicted can
+    # never come back with a number whose entries are still cached.
+    return int(time.time() * 1000)
+
+
+def get_version(namespace):
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        cache.add(_version_key(namespace), _new_version(), timeout=None)
+        version = cache.get(_version_key(namespace))
+    return version
+
+
+def get(namespace, loader, key='default'):
+    """
+    Return the cached value for key in namespace, calling loader() on a miss.
+    None is a valid cached value, so "no row" answers are cached too.
+    """
+    cache_key = f'vcache:{namespace}:{get_version(namespace)}:{key}'
+    cached = cache.get(cache_key, _MISSING)
+    if cached is not _MISSING:
+        _count(namespace, 'hits')
+        return cached[0]
+
+    _count(namespace, 'misses')
+    value = loader()
+    cache.set(cache_key, (value,))
+    return value
+
+
+def _bump(namespace):
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        cache.set(_version_key(namespace), _new_version(), timeout=None)
+
+
+def invalidate(namespace):
+    """Drop every cached value in namespace, now and again once the transaction commits."""
+    _count(namespace, 'invalidations')
+    _bump(namespace)
+    # A concurrent reader may re-cache the old row before our write commits,
+    # so bump once more after commit to evict anything read in between.
+    transaction.on_commit(lambda: _bump(namespace))
+
+
+def register(namespace, *models):
+    """
+    Invalidate namespace whenever an instance of one of models is saved or deleted.
+    A many-to-many through model (Rule.chapters.through) also invalidates on add, remove and clear.
+    """
+    def receiver(sender, **kwargs):
+        invalidate(namespace)
+
+    def m2m_receiver(sender, action, **kwargs):
+        if action.startswith('post_'):
+            invalidate(namespace)
+
+    for model in models:
+        uid = f'vcache:{namespace}:{model._meta.label_lower}'
+        post_save.connect(receiver, sender=model, weak=False, dispatch_uid=uid)
+        post_delete.connect(receiver, sender=model, weak=False, dispatch_uid=uid)
+        if model._meta.auto_created:
+            m2m_changed.connect(m2m_receiver, sender=model, weak=False, dispatch_uid=uid)
+
+
+def get_stats():
+    """Hit, miss and invalidation counts per namespace for this process."""
+    with _stats_lock:
+        return {namespace: dict(counts) for namespace, counts in _stats.items()}
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
@@ -1,6 +1,6 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
-from colivers.models import Coliver
+from .user_status import get_user_status
 
 # Create your views here.
 def core_router(request):
@@ -8,13 +8,7 @@ def core_router(request):
         return redirect('login')
     
     # Check if the user is an active coliver
-    try:
-        coliver = Coliver.objects.filter(user=request.user).order_by('-created_at').first()
-        is_active_coliver = coliver is not None and coliver.is_active
-    except Coliver.DoesNotExist:
-        is_active_coliver = False
-    
-    if is_active_coliver:
+    if get_user_status(request).is_coliver:
         return redirect('dashboard:dashboard')
     
     return redirect('applications_list')
@@ -0,0 +1,62 @@
+"""
+Everything the coliver dashboard shows, loaded in one query per widget group and
+cached per user. The cache key carries the user's data version (core.user_data),
+bumped by the Payment, Coliver, ChapterTransferRequest and MaintenanceRequest
+signals. Rules come from the shared rules index. Both versions key the template
+fragment, so a repeat visit skips rendering as well.
+"""
+from django.db.models import BooleanField, Case, Value, When
+from django.utils import timezone
+
+from chapter_transfers.models import ChapterTransferRequest
+from core import user_data, versioned_cache
+from maintenance.models import MaintenanceRequest
+from payments.models import Payment
+from rules.index import get_index as get_rule_index
+
+PENDING_STATUSES = ('requested', 'rejected', 'proof_submitted')
+RECENT = 5
+
+
+def load_dashboard_data(user_id, today):
+    # Payment.is_overdue, in SQL
+    pending_payments = Payment.objects.filter(user_id=user_id, status__in=PENDING_STATUSES).annotate(
+        overdue=Case(When(due_date__lt=today, then=Value(True)), default=Value(False), output_field=BooleanField())
+    ).order_by('due_date')
+    overdue_payments, upcoming_payments = [], []
+    for payment in pending_payments:
+        (overdue_payments if payment.overdue else upcoming_payments).append(payment)
+
+    return {
+        'overdue_payments': overdue_payments,
+        'upcoming_payments': upcoming_payments,
+        'past_payments': list(
+            Payment.objects.filter(user_id=user_id, status='approved').order_by('-created_at')[:RECENT]
+        ),
+        'transfer_requests': list(
+            ChapterTransferRequest.objects.filter(coliver_id=user_id)
+            .select_related('current_chapter', 'requested_chapter').order_by('-created_at')[:RECENT]
+        ),
+        'maintenance_requests': list(
+            MaintenanceRequest.objects.filter(created_by_id=user_id, status='pending').order_by('-created_at')[:RECENT]
+        ),
+    }
+
+
+def get_dashboard_version(user, coliver):
+    """Changes whenever anything the dashboard shows for user may have changed."""
+    # Payments turn overdue at midnight without any write, so the date is part of it
+    return (
+        f'{user_data.get_version(user.pk)}:{versioned_cache.get_version("rules")}:'
+        f'{coliver.chapter_name_id}:{timezone.now().date().isoformat()}'
+    )
+
+
+def get_dashboard_data(user, coliver):
+    """The dashboard context for user, whose current coliver record is coliver."""
+    today = timezone.now().date()
+    data = versioned_cache.get(
+        user_data.namespace(user.pk), lambda: load_dashboard_data(user.pk, today), f'dashboard:{today.isoformat()}'
+    )
+    # Shared by everyone in the chapter, so cached once rather than per user
+    return dict(data, rules=get_rule_index().for_chapters([coliver.chapter_name_id]))
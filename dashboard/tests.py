@@ -1,3 +1,86 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+
+from chapters.models import Chapter
+from colivers.models import Coliver
+from maintenance.models import MaintenanceRequest
+from payments.models import Payment
+from rules.models import Rule
+from .data import get_dashboard_data
+
+
+class DashboardDataTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        admin = User.objects.create_user(username='admin', password='testpass123', is_staff=True)
+        self.chapter = Chapter.objects.create(name='Home', created_by=admin)
+        self.other_chapter = Chapter.objects.create(name='Away', created_by=admin)
+        self.user = User.objects.create_user(username='resident', password='testpass123')
+        self.coliver = Coliver.objects.create(
+            user=self.user, chapter_name=self.chapter, first_name='Res', last_name='Ident', email='r@example.com',
+            arrival_date=date.today(), departure_date=date.today() + timedelta(days=30)
+        )
+        self.overdue = Payment.objects.create(user=self.user, amount=Decimal('100.00'), description='Late',
+                                              due_date=date.today() - timedelta(days=1))
+        self.upcoming = Payment.objects.create(user=self.user, amount=Decimal('100.00'), description='Soon',
+                                               due_date=date.today() + timedelta(days=1))
+        self.global_rule = Rule.objects.create(title='Everywhere', description='Be kind')
+        self.home_rule = Rule.objects.create(title='Home only', description='Water the plants')
+        self.home_rule.chapters.add(self.chapter)
+        Rule.objects.create(title='Away only', description='Feed the cat').chapters.add(self.other_chapter)
+
+    def test_payments_are_split_in_sql_and_rules_filtered_by_chapter(self):
+        """Test that overdue payments and the chapter's rules come back in one query per widget group"""
+        # Payments (2), transfer and maintenance requests, plus rules and their chapters for the index
+        with self.assertNumQueries(6):
+            data = get_dashboard_data(self.user, self.coliver)
+
+        self.assertEqual(data['overdue_payments'], [self.overdue])
+        self.assertEqual(data['upcoming_payments'], [self.upcoming])
+        self.assertCountEqual(data['rules'], [self.global_rule, self.home_rule])
+
+    def test_cached_until_the_users_data_changes(self):
+        """Test that repeat reads are free and that related writes invalidate them"""
+        get_dashboard_data(self.user, self.coliver)
+        with self.assertNumQueries(0):
+            get_dashboard_data(self.user, self.coliver)
+
+        MaintenanceRequest.objects.create(created_by=self.user, title='Leak', description='Kitchen sink')
+        self.assertEqual(len(get_dashboard_data(self.user, self.coliver)['maintenance_requests']), 1)
+
+        self.upcoming.status = 'approved'
+        self.upcoming.save()
+        self.assertEqual(get_dashboard_data(self.user, self.coliver)['past_payments'], [self.upcoming])
+
+        self.home_rule.chapters.set([self.other_chapter])
+        self.assertEqual(get_dashboard_data(self.user, self.coliver)['rules'], [self.global_rule])
+
+    def test_dashboard_renders_cached_data(self):
+        """Test that the view shows the service's data"""
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('dashboard:dashboard'))
+        self.assertContains(response, 'Water the plants')
+        self.assertNotContains(response, 'Feed the cat')
+        self.assertContains(response, 'Late')
+
+    def test_repeat_visits_reuse_the_rendered_fragment(self):
+        """Test that the cached fragment is served until the user's data changes"""
+        self.client.force_login(self.user)
+        url = reverse('dashboard:dashboard')
+        self.client.get(url)
+
+        response = self.client.get(url)
+        self.assertContains(response, 'Soon')
+
+        # Written behind the signals' back, so only a stale fragment still shows the old text
+        Payment.objects.filter(pk=self.upcoming.pk).update(description='Renamed')
+        self.assertContains(self.client.get(url), 'Soon')
 
-# Create your tests here.
+        self.upcoming.description = 'Renamed'
+        self.upcoming.save()
+        self.assertContains(self.client.get(url), 'Renamed')
@@ -1,23 +1,15 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
-from colivers.models import Coliver
-from rules.models import Rule
-from payments.models import Payment
-from chapter_transfers.models import ChapterTransferRequest
-from maintenance.models import MaintenanceRequest
-from django.db import models
+from core.user_status import get_user_status
+from .data import get_dashboard_data, get_dashboard_version
 from django.contrib import messages
 
 @login_required
 def dashboard(request):
-    # Check if the user is an active coliver
-    try:
-        # Get the most recent coliver record for this user
-        coliver = Coliver.objects.filter(user=request.user).order_by('-created_at').first()
-        is_coliver = coliver is not None and coliver.is_active
-    except Coliver.DoesNotExist:
-        coliver = None
-        is_coliver = False
+    # Check if the user is an active coliver, reusing the request's cached lookup
+    status = get_user_status(request)
+    coliver = status.coliver
+    is_coliver = status.is_coliver
     
     # If not an active coliver, redirect to applications list with a message
     if not is_coliver:
@@ -29,39 +21,11 @@ def dashboard(request):
     
     context = {
         'is_coliver': is_coliver,
+        # Keys the template's cached fragment
+        'dashboard_version': get_dashboard_version(request.user, coliver),
     }
     
-    # If user is an active coliver, get active rules for their chapter
-    if is_coliver:
-        # Get both chapter-specific rules and general rules (where chapters is empty)
-        chapter_filter = models.Q(chapters__isnull=True) | models.Q(chapters__name=coliver.chapter_name)
-        active_rules = Rule.objects.filter(chapter_filter, is_active=True).order_by('order', '-created_at')
-        context['rules'] = active_rules
+    # Rules, payments and requests, cached until one of them changes for this user
+    context.update(get_dashboard_data(request.user, coliver))
 
-        # Get pending payments for the user
-        pending_payments = Payment.objects.filter(
-            user=request.user,
-            status__in=['requested', 'rejected', 'proof_submitted']
-        ).order_by('due_date')
-        
-        context['overdue_payments'] = [p for p in pending_payments if p.is_overdue]
-        context['upcoming_payments'] = [p for p in pending_payments if not p.is_overdue]
-
-        # Get past payments (only approved ones)
-        context['past_payments'] = Payment.objects.filter(
-            user=request.user,
-            status='approved'
-        ).order_by('-created_at')[:5]  # Show last 5 payments
-
-        # Get chapter transfer requests
-        context['transfer_requests'] = ChapterTransferRequest.objects.filter(
-            coliver=request.user
-        ).order_by('-created_at')[:5]  # Show last 5 requests
-
-        # Get maintenance requests (only pending ones)
-        context['maintenance_requests'] = MaintenanceRequest.objects.filter(
-            created_by=request.user,
-            status='pending'
-        ).order_by('-created_at')[:5]  # Show last 5 pending requests
-    
     return render(request, 'dashboard/dashboard.html', context)
\ No newline at end of file
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs import queue
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs, polling the job table until stopped'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Run the jobs that are due now and exit',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait between polls when the queue is empty',
+        )
+        parser.add_argument(
+            '--worker-id',
+            help='Name recorded on claimed jobs (defaults to host:pid)',
+        )
+
+    def handle(self, *args, **options):
+        worker_id = options['worker_id'] or queue.default_worker_id()
+        self.stdout.write(f"Worker {worker_id} started")
+
+        while True:
+            count = queue.run_pending(worker_id)
+            if count:
+                self.stdout.write(f"Ran {count} job(s)")
+            if options['once']:
+                break
+            time.sleep(options['poll_interval'])
@@ -0,0 +1,146 @@
+"""
+A small durable job queue backed by the Job table.
+Handlers are registered by name, enqueued with a JSON payload, and claimed by
+workers with a conditional UPDATE so each job runs on one worker at a time.
+With settings.JOBS_SYNC the job runs as soon as it is enqueued instead.
+"""
+import logging
+import os
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Delay before retry n is RETRY_DELAY * 2 ** (n - 1)
+RETRY_DELAY = timedelta(seconds=30)
+# A running job whose worker has been silent this long is assumed dead and reclaimed
+LOCK_TIMEOUT = timedelta(minutes=10)
+
+_handlers = {}
+
+
+class PermanentError(Exception):
+    """Raised by a handler when running the job again cannot succeed, so it fails without retrying."""
+
+
+def register(name):
+    """Register the decorated function as the handler for jobs called name."""
+    def decorator(func):
+        _handlers[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, idempotency_key=None, run_after=None, max_attempts=5):
+    """
+    Queue a job and return it. If a job with the same idempotency_key exists, that
+    job is returned instead and nothing new is queued.
+    The row is written in the caller's transaction, so a rolled back save never
+    leaves a job behind.
+    """
+    if name not in _handlers:
+        raise ValueError(f"No job handler registered for {name!r}")
+
+    if idempotency_key:
+        existing = Job.objects.filter(idempotency_key=idempotency_key).first()
+        if existing:
+            return existing
+
+    try:
+        with transaction.atomic():
+            job = Job.objects.create(
+                name=name,
+                payload=payload or {},
+                idempotency_key=idempotency_key or None,
+                run_after=run_after or timezone.now(),
+                max_attempts=max_attempts
+            )
+    except IntegrityError:
+        # Another request enqueued the same key between our check and insert
+        return Job.objects.get(idempotency_key=idempotency_key)
+
+    if getattr(settings, 'JOBS_SYNC', False):
+        if claim(job.pk, worker_id='sync'):
+            job.refresh_from_db()
+            run(job)
+    return job
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _claimable():
+    now = timezone.now()
+    return Q(status='queued', run_after__lte=now) | Q(status='running', locked_at__lt=now - LOCK_TIMEOUT)
+
+
+def claim(pk, worker_id):
+    """Atomically mark job pk as running for worker_id. Returns False if another worker got it first."""
+    return bool(Job.objects.filter(_claimable(), pk=pk).update(
+        status='running',
+        locked_by=worker_id,
+        locked_at=timezone.now(),
+        attempts=F('attempts') + 1
+    ))
+
+
+def claim_next(worker_id, batch_size=10):
+    """Claim the next due job, or return None when the queue is empty."""
+    candidates = Job.objects.filter(_claimable()).order_by('run_after').values_list('pk', flat=True)[:batch_size]
+    for pk in candidates:
+        if claim(pk, worker_id):
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def run(job):
+    """
+    Run a claimed job inside a transaction and record the outcome.
+    A failure rolls back the handler's writes and requeues the job with exponential
+    backoff until max_attempts is reached, after which it is marked failed. A
+    PermanentError marks it failed straight away.
+    """
+    handler = _handlers.get(job.name)
+    try:
+        if handler is None:
+            raise LookupError(f"No job handler registered for {job.name!r}")
+        with transaction.atomic():
+            handler(**job.payload)
+    except Exception as error:
+        job.last_error = traceback.format_exc()
+        if job.attempts >= job.max_attempts or isinstance(error, PermanentError):
+            job.status = 'failed'
+            logger.exception("Job %s failed after %s attempts", job, job.attempts)
+        else:
+            job.status = 'queued'
+            job.run_after = timezone.now() + RETRY_DELAY * 2 ** (job.attempts - 1)
+            logger.warning("Job %s failed, retrying at %s", job, job.run_after, exc_info=True)
+    else:
+        job.status = 'done'
+        job.last_error = ''
+    job.locked_by = ''
+    job.locked_at = None
+    job.save(update_fields=['status', 'last_error', 'run_after', 'locked_by', 'locked_at', 'updated_at'])
+    return job
+
+
+def run_pending(worker_id=None, limit=None):
+    """Run due jobs until the queue is empty or limit jobs have run. Returns the number run."""
+    worker_id = worker_id or default_worker_id()
+    count = 0
+    while limit is None or count < limit:
+        job = claim_next(worker_id)
+        if job is None:
+            break
+        run(job)
+        count += 1
+    return count
@@ -0,0 +1,94 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from . import queue
+from .models import Job
+
+calls = []
+
+
+@queue.register('tests.record')
+def record(value):
+    calls.append(value)
+
+
+@queue.register('tests.fail')
+def fail():
+    Job.objects.create(name='written-by-failing-handler')
+    raise RuntimeError('boom')
+
+
+@queue.register('tests.give_up')
+def give_up():
+    raise queue.PermanentError('hopeless')
+
+
+@override_settings(JOBS_SYNC=False)
+class JobQueueTestCase(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_is_idempotent(self):
+        """Test that a second enqueue with the same key returns the first job"""
+        first = queue.enqueue('tests.record', {'value': 1}, idempotency_key='once')
+        second = queue.enqueue('tests.record', {'value': 2}, idempotency_key='once')
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(queue.run_pending(), 1)
+        self.assertEqual(calls, [1])
+
+    def test_unknown_handler_is_rejected(self):
+        """Test that enqueueing a job nobody can run fails loudly"""
+        with self.assertRaises(ValueError):
+            queue.enqueue('tests.missing')
+
+    def test_claim_is_exclusive(self):
+        """Test that only one worker can claim a job"""
+        job = queue.enqueue('tests.record', {'value': 1})
+        self.assertTrue(queue.claim(job.pk, 'worker-a'))
+        self.assertFalse(queue.claim(job.pk, 'worker-b'))
+        self.assertIsNone(queue.claim_next('worker-b'))
+
+    def test_stale_running_jobs_are_reclaimed(self):
+        """Test that a job held by a dead worker is picked up again"""
+        job = queue.enqueue('tests.record', {'value': 1})
+        queue.claim(job.pk, 'dead-worker')
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - queue.LOCK_TIMEOUT - timedelta(seconds=1))
+        self.assertEqual(queue.claim_next('worker-b').pk, job.pk)
+
+    def test_failures_roll_back_and_retry_with_backoff(self):
+        """Test that a failing job's writes are undone and it is retried until max_attempts"""
+        job = queue.enqueue('tests.fail', max_attempts=2)
+
+        with self.assertLogs('jobs.queue', level='WARNING'):
+            self.assertEqual(queue.run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('queued', 1))
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertIn('boom', job.last_error)
+        self.assertFalse(Job.objects.filter(name='written-by-failing-handler').exists())
+
+        # Not due yet, so the worker leaves it alone
+        self.assertEqual(queue.run_pending(), 0)
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        with self.assertLogs('jobs.queue', level='ERROR'):
+            queue.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+
+    def test_permanent_errors_are_not_retried(self):
+        """Test that a PermanentError fails the job on its first attempt"""
+        job = queue.enqueue('tests.give_up')
+        with self.assertLogs('jobs.queue', level='ERROR'):
+            queue.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 1))
+
+    @override_settings(JOBS_SYNC=True)
+    def test_sync_mode_runs_on_enqueue(self):
+        """Test that JOBS_SYNC runs the job immediately"""
+        job = queue.enqueue('tests.record', {'value': 3})
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(calls, [3])
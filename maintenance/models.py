@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 from todos.models import Todo
+from core import user_data, versioned_cache
 
 class MaintenanceConfirmationText(models.Model):
     text = models.TextField(
@@ -25,6 +26,14 @@ class MaintenanceConfirmationText(models.Model):
             MaintenanceConfirmationText.objects.exclude(id=self.id).update(is_active=False)
         super().save(*args, **kwargs)
 
+    @classmethod
+    def get_active(cls):
+        """Return the active confirmation text, or an unsaved default if there is none."""
+        return versioned_cache.get(
+            'maintenance_confirmation_text',
+            lambda: cls.objects.filter(is_active=True).first() or cls()
+        )
+
 class MaintenanceRequest(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -49,3 +58,7 @@ class MaintenanceRequest(models.Model):
 
     def __str__(self):
         return f"{self.title} - {self.created_by.username}"
+
+
+versioned_cache.register('maintenance_confirmation_text', MaintenanceConfirmationText)
+user_data.register('created_by', MaintenanceRequest)
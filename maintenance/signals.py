@@ -5,7 +5,6 @@ from todos.models import Todo
 from .models import MaintenanceRequest
 from django.db import models
 from django.utils import timezone
-from django.core.cache import cache
 
 @receiver(post_save, sender=MaintenanceRequest)
 def handle_maintenance_todo(sender, instance, created, **kwargs):
@@ -15,46 +14,24 @@ def handle_maintenance_todo(sender, instance, created, **kwargs):
     
     # If status is pending, ensure there's a todo
     if instance.status == 'pending':
-        # Check if a todo already exists
-        existing_todo = Todo.objects.filter(
+        # A no-op while a review todo for this request is still pending
+        Todo.objects.create_pending(
+            title=f'Review maintenance request: {instance.title}',
+            description=(
+                f'Maintenance request from {user_name}:\n\n'
+                f'Title: {instance.title}\n'
+                f'Description: {instance.description}\n\n'
+                f'Please review and update the status accordingly.'
+            ),
             task_type='maintenance_review',
-            reference_id=str(instance.id)
-        ).first()
-        
-        if not existing_todo:
-            # Create a new todo
-            Todo.objects.create(
-                title=f'Review maintenance request: {instance.title}',
-                description=(
-                    f'Maintenance request from {user_name}:\n\n'
-                    f'Title: {instance.title}\n'
-                    f'Description: {instance.description}\n\n'
-                    f'Please review and update the status accordingly.'
-                ),
-                task_type='maintenance_review',
-                reference_id=str(instance.id),
-                coliver_name=user_name
-            )
+            reference_id=str(instance.id),
+            coliver_name=user_name
+        )
     
     # If status is completed, mark all related todos as completed
     elif instance.status == 'completed':
-        # Mark any existing review todos as completed using mark_as_completed()
-        todos = Todo.objects.filter(
-            task_type='maintenance_review',
-            reference_id=str(instance.id),
-            status='pending'
-        )
-        for todo in todos:
-            todo.mark_as_completed()
-        
-        # Also mark any existing verification todos as completed
-        verification_todos = Todo.objects.filter(
-            task_type='maintenance_verification',
-            reference_id=str(instance.id),
-            status='pending'
-        )
-        for todo in verification_todos:
-            todo.mark_as_completed()
-        
-        # Clear any cached querysets
-        cache.clear() 
\ No newline at end of file
+        # Complete the review and verification todos in one UPDATE
+        Todo.objects.filter(
+            task_type__in=['maintenance_review', 'maintenance_verification'],
+            reference_id=str(instance.id)
+        ).complete()
@@ -9,14 +9,8 @@ from .forms import MaintenanceRequestForm, MaintenanceRequestManagerForm
 
 @login_required
 def maintenance_create(request):
-    # Get the active confirmation text
-    confirmation_text = MaintenanceConfirmationText.objects.filter(is_active=True).first()
-    if not confirmation_text:
-        # Create a default one if none exists
-        confirmation_text = MaintenanceConfirmationText.objects.create(
-            text="I confirm that this maintenance request is accurate and needs attention",
-            is_active=True
-        )
+    # Get the active confirmation text (or the default one)
+    confirmation_text = MaintenanceConfirmationText.get_active()
 
     if request.method == 'POST':
         form = MaintenanceRequestForm(request.POST)
@@ -37,13 +31,8 @@ def maintenance_create(request):
 @login_required
 def maintenance_detail(request, pk):
     maintenance_request = get_object_or_404(MaintenanceRequest, pk=pk)
-    # Get the active confirmation text
-    confirmation_text = MaintenanceConfirmationText.objects.filter(is_active=True).first()
-    if not confirmation_text:
-        confirmation_text = MaintenanceConfirmationText.objects.create(
-            text="I confirm that this maintenance request is accurate and needs attention",
-            is_active=True
-        )
+    # Get the active confirmation text (or the default one)
+    confirmation_text = MaintenanceConfirmationText.get_active()
     
     if request.user.is_staff:
         if request.method == 'POST':
@@ -1,10 +1,13 @@
 from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
 from django.utils.html import format_html
 from .models import Payment, AutomaticPaymentTemplate, AutomaticPayment
-from colivers.models import Coliver
+from colivers.models import Coliver, current_coliver_of
+from .generation import generate_payments
 from django.contrib.auth.models import User
 from django import forms
-from django.db.models import Q
+from django.db.models import Case, Exists, F, OuterRef, Q, Value, When
+from django.db.models.functions import Concat
 from django.utils import timezone
 from django.db import models
 
@@ -38,20 +41,29 @@ class PriceRangeFilter(admin.SimpleListFilter):
             return queryset.filter(amount__gt=1000)
 
 class ColiverFilter(admin.SimpleListFilter):
+    """
+    Filter by coliver through a search box backed by the admin autocomplete view
+    (AutomaticPayment.coliver searched with ColiverAdmin.search_fields), so the
+    changelist never lists every coliver. Only the selected one is loaded here.
+    """
     title = 'Coliver'
     parameter_name = 'coliver'
+    template = 'admin/payments/coliver_filter.html'
 
     def lookups(self, request, model_admin):
-        colivers = Coliver.objects.all().order_by('first_name', 'last_name')
-        return [(c.id, f"{c.first_name} {c.last_name} ({c.chapter_name.name if c.chapter_name else 'No Chapter'})") for c in colivers]
+        value = self.value()
+        if not (value and value.isdigit()):
+            return []
+        colivers = Coliver.objects.filter(pk=value).values_list('id', 'first_name', 'last_name', 'chapter_name__name')
+        return [(pk, f"{first_name} {last_name} ({chapter or 'No Chapter'})") for pk, first_name, last_name, chapter in colivers]
+
+    def has_output(self):
+        # The search box is shown even when nothing is selected
+        return True
 
     def queryset(self, request, queryset):
         if self.value():
-            try:
-                coliver = Coliver.objects.get(id=self.value())
-                return queryset.filter(user=coliver.user)
-            except Coliver.DoesNotExist:
-                return queryset.none()
+            return queryset.filter(user__in=Coliver.objects.filter(id=self.value()).values('user_id'))
 
 class DueDateStatusFilter(admin.SimpleListFilter):
     title = 'Due Date Status'
@@ -93,8 +105,8 @@ class PaymentAdminForm(forms.ModelForm):
         # Update the user field to show more information
         def user_label(obj):
             try:
-                # Try to get the coliver info for this user
-                coliver = Coliver.objects.filter(user=obj).order_by('-created_at').first()
+                # The coliver comes from the profile pointer, selected with the user below
+                coliver = current_coliver_of(obj)
                 if coliver:
                     chapter_name = coliver.chapter_name.name if coliver.chapter_name else 'No Chapter'
                     return f"{coliver.first_name} {coliver.last_name} ({chapter_name}) - {obj.username}"
@@ -106,7 +118,7 @@ class PaymentAdminForm(forms.ModelForm):
         self.fields['user'].label_from_instance = user_label
         self.fields['user'].queryset = User.objects.filter(
             id__in=Coliver.objects.values_list('user_id', flat=True)
-        ).order_by('username')
+        ).select_related('userprofile__current_coliver__chapter_name').order_by('username')
         self.fields['user'].empty_label = "Select a user..."
 
     def clean_transaction_id(self):
@@ -158,26 +170,35 @@ class BasePaymentAdmin(admin.ModelAdmin):
         }),
     )
 
+    @property
+    def media(self):
+        # select2 and the admin autocomplete script, as an autocomplete field would load them, for ColiverFilter
+        autocomplete = AutocompleteSelect(AutomaticPayment._meta.get_field('coliver'), self.admin_site)
+        return super().media + autocomplete.media + forms.Media(js=['admin/js/jquery.init.js', 'payments/js/coliver_filter.js'])
+
+    def get_queryset(self, request):
+        # Everything list_display needs comes back with the page itself
+        current_coliver = 'user__userprofile__current_coliver'
+        return super().get_queryset(request).select_related('user').annotate(
+            coliver_name=Case(
+                When(**{f'{current_coliver}__isnull': False},
+                     then=Concat(f'{current_coliver}__first_name', Value(' '), f'{current_coliver}__last_name')),
+                default=F('user__username'),
+            ),
+            has_automatic_payment=Exists(AutomaticPayment.objects.filter(payment=OuterRef('pk'))),
+        )
+
     def get_coliver_name(self, obj):
-        try:
-            coliver = Coliver.objects.filter(user=obj.user).order_by('-created_at').first()
-            if coliver:
-                return f"{coliver.first_name} {coliver.last_name}"
-        except Coliver.DoesNotExist:
-            pass
-        return obj.user.username
+        return obj.coliver_name
     get_coliver_name.short_description = 'Coliver'
-    get_coliver_name.admin_order_field = 'user__username'
+    get_coliver_name.admin_order_field = 'coliver_name'
 
     def is_automatic(self, obj):
         """Show if this payment was created automatically"""
-        try:
-            # Check if there's an associated AutomaticPayment
-            return hasattr(obj, 'automatic_payment') and obj.automatic_payment is not None
-        except:
-            return False
+        return obj.has_automatic_payment
     is_automatic.boolean = True
     is_automatic.short_description = 'Auto'
+    is_automatic.admin_order_field = 'has_automatic_payment'
 
     def view_proof(self, obj):
         if obj.payment_proof:
@@ -289,17 +310,12 @@ class AutomaticPaymentTemplateAdmin(admin.ModelAdmin):
         template = get_object_or_404(AutomaticPaymentTemplate, pk=template_id)
         
         if template.applies_to_all_colivers:
-            # Get all active colivers
-            colivers = Coliver.objects.filter(is_active=True)
-            created_count = 0
-            
-            for coliver in colivers:
-                payment = template.create_payment_for_coliver(coliver, created_by=request.user)
-                if payment:
-                    created_count += 1
+            result = generate_payments(
+                [template], Coliver.objects.filter(is_active=True), created_by=request.user
+            )
             
-            if created_count > 0:
-                messages.success(request, f'Successfully created {created_count} automatic payments using template "{template.title}".')
+            if result.created > 0:
+                messages.success(request, f'Successfully created {result.created} automatic payments using template "{template.title}".')
             else:
                 messages.info(request, 'No new payments were created. All eligible colivers may already have payments for this template.')
         else:
@@ -0,0 +1,83 @@
+"""
+Batched creation of automatic payments.
+Existing (template, coliver) pairs are found with one query and the missing
+payments are inserted with bulk_create in a single transaction.
+"""
+from dataclasses import dataclass, field
+
+from django.db import connection, transaction
+
+from chapters.pricing import price_many
+from core import user_data
+from .models import AutomaticPayment, Payment
+
+BATCH_SIZE = 500
+
+
+@dataclass
+class GenerationResult:
+    # (template, coliver, payment) for every payment created, or that would be on a dry run
+    payments: list = field(default_factory=list)
+    existing: int = 0
+    # Colivers without a user account can't be billed
+    skipped: int = 0
+
+    @property
+    def created(self):
+        return len(self.payments)
+
+
+def generate_payments(templates, colivers, created_by=None, dry_run=False):
+    """
+    Create the automatic payments that are missing for every active template and coliver.
+    On a dry run the payments are built and returned but nothing is saved.
+    """
+    templates = [template for template in templates if template.is_active]
+    colivers = list(colivers)
+    result = GenerationResult()
+    if not templates or not colivers:
+        return result
+
+    existing = set(AutomaticPayment.objects.filter(
+        template__in=templates,
+        coliver__in=colivers
+    ).values_list('template_id', 'coliver_id'))
+    quotes = price_many(colivers, breakdown=False)
+
+    for template in templates:
+        for coliver in colivers:
+            if (template.pk, coliver.pk) in existing:
+                result.existing += 1
+                continue
+            if coliver.user_id is None:
+                result.skipped += 1
+                continue
+            payment = Payment(
+                user_id=coliver.user_id,
+                amount=template.calculate_amount(coliver, quotes[coliver.pk].cost),
+                description=template.format_description(coliver),
+                due_date=template.calculate_due_date(coliver),
+                created_by=created_by
+            )
+            result.payments.append((template, coliver, payment))
+
+    if dry_run or not result.payments:
+        return result
+
+    # bulk_create sends no post_save, so the billed users' cached data is
+    # invalidated below instead of by the user_data receivers
+    with transaction.atomic():
+        payments = [payment for _, _, payment in result.payments]
+        if connection.features.can_return_rows_from_bulk_insert:
+            Payment.objects.bulk_create(payments, batch_size=BATCH_SIZE)
+        else:
+            # Without RETURNING the new primary keys are unknown, so insert one by one
+            for payment in payments:
+                payment.save()
+        AutomaticPayment.objects.bulk_create([
+            AutomaticPayment(template=template, coliver=coliver, payment=payment, created_by=created_by)
+            for template, coliver, payment in result.payments
+        ], batch_size=BATCH_SIZE)
+    for user_id in {payment.user_id for _, _, payment in result.payments}:
+        user_data.invalidate(user_id)
+    return result
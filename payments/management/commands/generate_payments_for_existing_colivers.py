@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
-from payments.models import AutomaticPaymentTemplate, AutomaticPayment
+from payments.generation import generate_payments
+from payments.models import AutomaticPaymentTemplate
 from colivers.models import Coliver
 
 
@@ -39,51 +40,25 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING("No active templates found that apply to all colivers"))
             return
         
-        # Get all active colivers
-        colivers = Coliver.objects.filter(is_active=True)
+        colivers = Coliver.objects.filter(is_active=True).select_related('chapter_name')
         
         self.stdout.write(f"Found {templates.count()} active template(s) and {colivers.count()} active coliver(s)")
         
-        total_created = 0
-        total_existing = 0
+        result = generate_payments(templates, colivers, dry_run=dry_run)
         
-        for template in templates:
-            self.stdout.write(f"\nProcessing template: {template.title}")
-            created_for_template = 0
-            existing_for_template = 0
-            
-            for coliver in colivers:
-                # Check if payment already exists
-                existing_payment = AutomaticPayment.objects.filter(
-                    template=template,
-                    coliver=coliver
-                ).first()
-                
-                if existing_payment:
-                    existing_for_template += 1
-                    continue
-                
-                if not dry_run:
-                    # Create the payment
-                    payment = template.create_payment_for_coliver(coliver)
-                    if payment:
-                        created_for_template += 1
-                        self.stdout.write(f"  ✓ Created payment for {coliver.first_name} {coliver.last_name}")
-                    else:
-                        self.stdout.write(f"  ✗ Failed to create payment for {coliver.first_name} {coliver.last_name}")
-                else:
-                    # Dry run - just show what would be created
-                    amount = template.calculate_amount(coliver)
-                    due_date = template.calculate_due_date(coliver)
-                    created_for_template += 1
-                    self.stdout.write(
-                        f"  [DRY RUN] Would create payment for {coliver.first_name} {coliver.last_name}: "
-                        f"₩{amount:,.2f} due {due_date}"
-                    )
-            
-            self.stdout.write(f"  Template '{template.title}': {created_for_template} created, {existing_for_template} already exist")
-            total_created += created_for_template
-            total_existing += existing_for_template
+        for template, coliver, payment in result.payments:
+            if dry_run:
+                self.stdout.write(
+                    f"  [DRY RUN] Would create '{template.title}' payment for {coliver.first_name} {coliver.last_name}: "
+                    f"₩{payment.amount:,.2f} due {payment.due_date}"
+                )
+            else:
+                self.stdout.write(f"  ✓ Created '{template.title}' payment for {coliver.first_name} {coliver.last_name}")
+        if result.skipped:
+            self.stdout.write(self.style.WARNING(f"Skipped {result.skipped} payment(s) for colivers without a user account"))
+        
+        total_created = result.created
+        total_existing = result.existing
         
         self.stdout.write(
             self.style.SUCCESS(
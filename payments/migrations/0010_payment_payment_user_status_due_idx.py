@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 08:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0009_automaticpaymenttemplate_automaticpayment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['user', 'status', 'due_date'], name='payment_user_status_due_idx'),
+        ),
+    ]
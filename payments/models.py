@@ -3,8 +3,10 @@ from django.contrib.auth.models import User
 from django.urls import reverse
 from todos.models import Todo
 from django.utils import timezone
+from core import user_data
+from core.tracking import FieldTrackerMixin
 
-class Payment(models.Model):
+class Payment(FieldTrackerMixin, models.Model):
     PAYMENT_STATUS_CHOICES = [
         ('requested', 'Payment Requested'),
         ('proof_submitted', 'Pending Approval'),
@@ -28,8 +30,14 @@ class Payment(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='created_payments')
 
+    tracked_fields = ('status', 'user')
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # A user's payments by status, soonest due first
+            models.Index(fields=['user', 'status', 'due_date'], name='payment_user_status_due_idx'),
+        ]
 
     def __str__(self):
         return f"Payment {self.id} - {self.amount} ({self.status})"
@@ -45,19 +53,12 @@ class Payment(models.Model):
     def complete_associated_todo(self):
         """Complete any todo items associated with this payment when it's approved"""
         if self.status == 'approved':
-            todos = Todo.objects.filter(
-                task_type='payment_review',
-                reference_id=str(self.id),
-                status='pending'
-            )
-            for todo in todos:
-                todo.mark_as_completed()
+            Todo.objects.filter(task_type='payment_review', reference_id=str(self.id)).complete()
 
     def save(self, *args, **kwargs):
         # Check if status is being changed to approved
         if self.pk:  # If this is an existing object
-            old_payment = Payment.objects.get(pk=self.pk)
-            if old_payment.status != 'approved' and self.status == 'approved':
+            if self.previous('status') != 'approved' and self.status == 'approved':
                 self.complete_associated_todo()
         super().save(*args, **kwargs)
 
@@ -103,14 +104,19 @@ class AutomaticPaymentTemplate(models.Model):
     def __str__(self):
         return f"{self.title} ({self.get_amount_type_display()})"
     
-    def calculate_amount(self, coliver):
-        """Calculate the payment amount based on the template configuration"""
+    def calculate_amount(self, coliver, total_cost=None):
+        """
+        Calculate the payment amount based on the template configuration.
+        total_cost can be passed in when the coliver was already priced, e.g. by price_many.
+        """
         if self.amount_type == 'fixed':
             return self.fixed_amount or 0
-        elif self.amount_type == 'total_cost':
-            return coliver.calculate_cost()
+        if total_cost is None:
+            total_cost = coliver.calculate_cost()
+        if self.amount_type == 'total_cost':
+            return total_cost
         elif self.amount_type == 'percentage_cost':
-            return coliver.calculate_cost() * (self.percentage / 100) if self.percentage else 0
+            return total_cost * (self.percentage / 100) if self.percentage else 0
         return 0
     
     def calculate_due_date(self, coliver):
@@ -126,7 +132,16 @@ class AutomaticPaymentTemplate(models.Model):
             return base_date + timezone.timedelta(days=self.days_offset)
         return None
     
-    def create_payment_for_coliver(self, coliver, created_by=None):
+    def format_description(self, coliver):
+        """Fill in the description template for a specific coliver"""
+        return self.description_template.format(
+            coliver_name=f"{coliver.first_name} {coliver.last_name}",
+            chapter_name=coliver.chapter_name.name if coliver.chapter_name else "No Chapter",
+            arrival_date=coliver.arrival_date.strftime('%Y-%m-%d') if coliver.arrival_date else "TBD",
+            departure_date=coliver.departure_date.strftime('%Y-%m-%d') if coliver.departure_date else "TBD"
+        )
+    
+    def create_payment_for_coliver(self, coliver, created_by=None, total_cost=None):
         """Create an automatic payment for a specific coliver based on this template"""
         from colivers.models import Coliver
         
@@ -143,22 +158,14 @@ class AutomaticPaymentTemplate(models.Model):
             return existing_payment.payment
         
         # Calculate amount and due date
-        amount = self.calculate_amount(coliver)
+        amount = self.calculate_amount(coliver, total_cost)
         due_date = self.calculate_due_date(coliver)
         
-        # Format description
-        description = self.description_template.format(
-            coliver_name=f"{coliver.first_name} {coliver.last_name}",
-            chapter_name=coliver.chapter_name.name if coliver.chapter_name else "No Chapter",
-            arrival_date=coliver.arrival_date.strftime('%Y-%m-%d') if coliver.arrival_date else "TBD",
-            departure_date=coliver.departure_date.strftime('%Y-%m-%d') if coliver.departure_date else "TBD"
-        )
-        
         # Create the payment
         payment = Payment.objects.create(
             user=coliver.user,
             amount=amount,
-            description=description,
+            description=self.format_description(coliver),
             due_date=due_date,
             created_by=created_by
         )
@@ -189,3 +196,6 @@ class AutomaticPayment(models.Model):
 
     def __str__(self):
         return f"{self.template.title} for {self.coliver.first_name} {self.coliver.last_name}"
+
+
+user_data.register('user', Payment)
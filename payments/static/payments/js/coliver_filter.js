@@ -0,0 +1,15 @@
+'use strict';
+{
+    const $ = django.jQuery;
+
+    // Reload the changelist filtered by the coliver picked in ColiverFilter's autocomplete
+    $(function() {
+        $('.coliver-filter').on('change', function() {
+            const params = new URLSearchParams(this.dataset.queryString);
+            if (this.value) {
+                params.set(this.dataset.parameterName, this.value);
+            }
+            window.location.search = params.toString();
+        });
+    });
+}
@@ -1,10 +1,19 @@
+from datetime import date
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 from django.contrib.auth.models import User
 from payments.models import Payment, AutomaticPaymentTemplate, AutomaticPayment
 from todos.models import Todo
 from django.core.files.uploadedfile import SimpleUploadedFile
 from colivers.models import Coliver
 from chapters.models import Chapter
+from payments.generation import generate_payments
+from dashboard.data import get_dashboard_data
 
 class PaymentTodoTest(TestCase):
     def setUp(self):
@@ -102,3 +111,140 @@ class PaymentTodoTest(TestCase):
         
         # No todo should be created for automatic payment
         self.assertEqual(Todo.objects.filter(reference_id=str(self.payment.id)).count(), 0)
+
+
+class GeneratePaymentsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='testpass123', is_staff=True)
+        self.chapter = Chapter.objects.create(name='Test Chapter', created_by=self.admin, cost_per_night=1000)
+        self.colivers = [self.create_coliver(i) for i in range(3)]
+        self.template = AutomaticPaymentTemplate.objects.create(
+            title='Booking Payment',
+            description_template='Stay for {coliver_name} at {chapter_name}',
+            amount_type='total_cost',
+            date_type='arrival_date',
+            created_by=self.admin
+        )
+
+    def create_coliver(self, i):
+        user = User.objects.create_user(username=f'coliver{i}', password='testpass123')
+        return Coliver.objects.create(
+            user=user, chapter_name=self.chapter, first_name='Test', last_name=str(i),
+            email=f'coliver{i}@example.com', arrival_date=date(2025, 1, 1), departure_date=date(2025, 1, 11)
+        )
+
+    def test_creates_only_missing_payments(self):
+        """Test that existing pairs are skipped and the rest are created with the right amounts"""
+        self.template.create_payment_for_coliver(self.colivers[0])
+
+        result = generate_payments([self.template], Coliver.objects.all(), created_by=self.admin)
+
+        self.assertEqual((result.created, result.existing), (2, 1))
+        self.assertEqual(AutomaticPayment.objects.filter(template=self.template).count(), 3)
+        payment = Payment.objects.get(user=self.colivers[2].user)
+        self.assertEqual(payment.amount, Decimal('10000.00'))
+        self.assertEqual(payment.description, 'Stay for Test 2 at Test Chapter')
+        self.assertEqual(payment.due_date, date(2025, 1, 1))
+        self.assertEqual(payment.automatic_payment.coliver, self.colivers[2])
+
+    def test_dry_run_saves_nothing(self):
+        """Test that a dry run reports the payments without creating them"""
+        result = generate_payments([self.template], Coliver.objects.all(), dry_run=True)
+        self.assertEqual(result.created, 3)
+        self.assertFalse(Payment.objects.exists())
+
+    def test_query_count_does_not_grow_with_colivers(self):
+        """Test that generation runs a fixed number of queries however many colivers there are"""
+        for i in range(3, 10):
+            self.create_coliver(i)
+        # Created after the colivers, so the coliver signal has not billed them yet
+        deposit = AutomaticPaymentTemplate.objects.create(
+            title='Deposit', description_template='Deposit for {coliver_name}',
+            amount_type='fixed', fixed_amount=50000, created_by=self.admin
+        )
+        colivers = list(Coliver.objects.select_related('chapter_name'))
+
+        with CaptureQueriesContext(connection) as queries:
+            result = generate_payments([deposit], colivers)
+        self.assertEqual(result.created, 10)
+        self.assertLessEqual(len(queries), 5)
+
+    def test_generated_payments_show_on_a_cached_dashboard(self):
+        """Test that generation invalidates the billed users' cached dashboard data"""
+        coliver = self.colivers[0]
+        self.assertEqual(get_dashboard_data(coliver.user, coliver)['upcoming_payments'], [])
+
+        generate_payments([self.template], [coliver])
+
+        data = get_dashboard_data(coliver.user, coliver)
+        self.assertEqual([p.description for p in data['overdue_payments']], ['Stay for Test 0 at Test Chapter'])
+
+
+class PaymentAdminQueryTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(username='admin', password='testpass123', email='admin@example.com')
+        self.chapter = Chapter.objects.create(name='Test Chapter', created_by=self.admin, cost_per_night=1000)
+        self.template = AutomaticPaymentTemplate.objects.create(
+            title='Deposit', description_template='Deposit for {coliver_name}',
+            amount_type='fixed', fixed_amount=50000, created_by=self.admin
+        )
+        self.client.force_login(self.admin)
+
+    def add_colivers(self, start, end):
+        for i in range(start, end):
+            user = User.objects.create_user(username=f'coliver{i}', password='testpass123')
+            # The active template bills each new coliver automatically
+            Coliver.objects.create(
+                user=user, chapter_name=self.chapter, first_name='Test', last_name=str(i),
+                email=f'coliver{i}@example.com', arrival_date=date(2025, 1, 1), departure_date=date(2025, 1, 11)
+            )
+            Payment.objects.create(user=user, amount=Decimal('1000.00'), description='Manual', created_by=self.admin)
+
+    def count_queries(self, url):
+        # Warm the per-request caches first, so only the page itself is counted
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """Test that coliver names and the automatic flag come back with the page"""
+        self.add_colivers(0, 2)
+        small, _ = self.count_queries('/admin/payments/payment/')
+        self.add_colivers(2, 12)
+        large, response = self.count_queries('/admin/payments/payment/')
+
+        self.assertEqual(small, large)
+        self.assertContains(response, 'Test 11')
+        self.assertContains(response, 'icon-yes.svg', count=12)
+
+    def test_coliver_filter_searches_through_the_autocomplete_view(self):
+        """Test that the filter lists only the selected coliver and searches the rest on demand"""
+        self.add_colivers(0, 3)
+        coliver = Coliver.objects.get(last_name='1')
+
+        response = self.client.get('/admin/payments/payment/', {'coliver': coliver.pk})
+        self.assertContains(response, 'data-field-name="coliver"')
+        self.assertContains(response, 'payments/js/coliver_filter.js')
+        self.assertContains(response, f'<option value="{coliver.pk}" selected>Test 1 (Test Chapter)</option>', html=True)
+        self.assertNotContains(response, 'Test 2 (Test Chapter)')
+        # The manual payment and the one billed by the active template
+        self.assertEqual(response.context['cl'].result_count, 2)
+
+        results = self.client.get(reverse('admin:autocomplete'), {
+            'app_label': 'payments', 'model_name': 'automaticpayment', 'field_name': 'coliver', 'term': 'Test',
+        }).json()['results']
+        self.assertEqual(len(results), 3)
+
+    def test_add_form_queries_do_not_grow_with_users(self):
+        """Test that the user dropdown labels are built without a query per user"""
+        self.add_colivers(0, 2)
+        small, _ = self.count_queries('/admin/payments/payment/add/')
+        self.add_colivers(2, 12)
+        large, response = self.count_queries('/admin/payments/payment/add/')
+
+        self.assertEqual(small, large)
+        self.assertContains(response, 'Test 11 (Test Chapter) - coliver11')
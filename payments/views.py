@@ -42,10 +42,13 @@ def dashboard_payments(request):
         status__in=['requested', 'rejected']
     ).order_by('due_date')
     
-    overdue_payments = [p for p in pending_payments if p.is_overdue]
-    upcoming_payments = [p for p in pending_payments if not p.is_overdue]
+    # Left unevaluated: the template only runs them when its cached fragment is stale
+    today = timezone.now().date()
+    overdue_payments = pending_payments.filter(due_date__lt=today)
+    upcoming_payments = pending_payments.exclude(due_date__lt=today)
     
     return render(request, 'payments/dashboard_payments.html', {
         'overdue_payments': overdue_payments,
-        'upcoming_payments': upcoming_payments
+        'upcoming_payments': upcoming_payments,
+        'today': today,
     })
@@ -1,4 +1,5 @@
 from django.db import models
+from core import versioned_cache
 
 # Create your models here.
 
@@ -46,3 +47,7 @@ class ReintroductionQuestion(models.Model):
 
     def __str__(self):
         return f"Reintroduction Question {self.order}: {self.text[:50]}..."
+
+
+versioned_cache.register('active_questions', Question)
+versioned_cache.register('active_reintroduction_questions', ReintroductionQuestion)
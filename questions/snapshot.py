@@ -0,0 +1,61 @@
+"""
+Immutable snapshots of the active application and reintroduction questions.
+Each one is built with a single query, cached through versioned_cache and
+rebuilt when a question is saved or deleted (see questions/models.py). Wizard
+steps then count and index into it without touching the database.
+"""
+from dataclasses import dataclass
+
+from core import versioned_cache
+from .models import Question, ReintroductionQuestion
+
+
+@dataclass(frozen=True)
+class QuestionSnapshot:
+    """The fields of one question that the wizard and its templates read."""
+    id: int
+    text: str
+    description: str
+    question_type: str
+    choices: tuple
+    order: int
+    required: bool
+
+
+class QuestionSet:
+    """The active questions in display order, indexable like a list and looked up by id."""
+
+    def __init__(self, questions):
+        self._questions = tuple(questions)
+        self._by_id = {question.id: question for question in self._questions}
+
+    def __len__(self):
+        return len(self._questions)
+
+    def __getitem__(self, index):
+        return self._questions[index]
+
+    def __iter__(self):
+        return iter(self._questions)
+
+    def get(self, question_id):
+        return self._by_id.get(question_id)
+
+
+def take_snapshot(model):
+    return QuestionSet(
+        QuestionSnapshot(
+            id=question.id, text=question.text, description=question.description,
+            question_type=question.question_type, choices=tuple(question.choices or ()),
+            order=question.order, required=question.required,
+        )
+        for question in model.objects.filter(is_active=True).order_by('order')
+    )
+
+
+def active_questions():
+    return versioned_cache.get('active_questions', lambda: take_snapshot(Question))
+
+
+def active_reintroduction_questions():
+    return versioned_cache.get('active_reintroduction_questions', lambda: take_snapshot(ReintroductionQuestion))
@@ -1,3 +1,57 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from applications.models import Application
+from .models import Question, ReintroductionQuestion
+from .snapshot import active_questions, active_reintroduction_questions
+
+
+class QuestionSnapshotTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.second = Question.objects.create(text='Why here?', order=2)
+        self.first = Question.objects.create(
+            text='Pick one', order=1, question_type='multiple_choice', choices=[{'text': 'A'}, {'text': 'B'}]
+        )
+        Question.objects.create(text='Retired', order=0, is_active=False)
+
+    def test_snapshot_is_ordered_and_cached(self):
+        """Test that the active questions are read once and then served from the cache"""
+        questions = active_questions()
+        self.assertEqual([q.id for q in questions], [self.first.pk, self.second.pk])
+        self.assertEqual(questions[0].choices, ({'text': 'A'}, {'text': 'B'}))
+        self.assertEqual(questions.get(self.second.pk).text, 'Why here?')
+        with self.assertNumQueries(0):
+            self.assertEqual(len(active_questions()), 2)
+
+    def test_saving_a_question_rebuilds_the_snapshot(self):
+        """Test that question and reintroduction question saves invalidate their own snapshot"""
+        active_questions()
+        self.assertEqual(len(active_reintroduction_questions()), 0)
+
+        self.second.is_active = False
+        self.second.save()
+        ReintroductionQuestion.objects.create(text='What changed?')
+
+        self.assertEqual([q.id for q in active_questions()], [self.first.pk])
+        self.assertEqual(len(active_reintroduction_questions()), 1)
+
+    def test_wizard_step_runs_no_question_queries(self):
+        """Test that application_step2 counts and indexes the cached snapshot"""
+        user = User.objects.create_user(username='applicant', password='testpass123')
+        application = Application.objects.create(created_by=user, first_name='A', last_name='B', email='a@example.com')
+        self.client.force_login(user)
+        session = self.client.session
+        session['application_id'] = application.pk
+        session['current_question_index'] = 1
+        session.save()
+        self.client.get(reverse('application_step2'))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('application_step2'))
+        self.assertContains(response, 'Why here?')
+        self.assertFalse([q for q in queries if 'FROM "questions_question"' in q['sql']])
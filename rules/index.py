@@ -0,0 +1,52 @@
+"""
+Active rules by chapter, compiled once per version of the 'rules' namespace.
+Saving or deleting a Rule, or changing Rule.chapters, bumps that version (see
+rules/models.py), so readers never need the chapters join or distinct().
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+
+from core import versioned_cache
+from .models import Rule
+
+
+@dataclass(frozen=True)
+class RuleIndex:
+    rules: dict  # id -> Rule, in display order
+    global_ids: frozenset  # rules without chapters apply everywhere
+    chapter_ids: dict  # chapter id -> frozenset of rule ids
+
+    def ids_for(self, chapter_ids):
+        """Ids of the global rules plus those of any of chapter_ids, in display order."""
+        wanted = set(self.global_ids)
+        for chapter_id in chapter_ids:
+            wanted |= self.chapter_ids.get(chapter_id, frozenset())
+        return [pk for pk in self.rules if pk in wanted]
+
+    def for_chapters(self, chapter_ids):
+        return [self.rules[pk] for pk in self.ids_for(chapter_ids)]
+
+    def all(self):
+        return list(self.rules.values())
+
+
+def build_index():
+    # Chapters are prefetched so templates can list them from the cached rules too
+    rules = Rule.objects.filter(is_active=True).prefetch_related('chapters').order_by('order', '-created_at')
+    rules = {rule.pk: rule for rule in rules}
+    global_ids, by_chapter = set(), defaultdict(set)
+    for rule in rules.values():
+        chapters = rule.chapters.all()
+        if not chapters:
+            global_ids.add(rule.pk)
+        for chapter in chapters:
+            by_chapter[chapter.pk].add(rule.pk)
+    return RuleIndex(
+        rules=rules,
+        global_ids=frozenset(global_ids),
+        chapter_ids={chapter_id: frozenset(ids) for chapter_id, ids in by_chapter.items()},
+    )
+
+
+def get_index():
+    return versioned_cache.get('rules', build_index, 'index')
@@ -1,6 +1,7 @@
 from django.db import models
 from django.utils import timezone
 from chapters.models import Chapter
+from core import versioned_cache
 
 class Rule(models.Model):
     title = models.CharField(max_length=200)
@@ -16,3 +17,6 @@ class Rule(models.Model):
 
     def __str__(self):
         return self.title
+
+
+versioned_cache.register('rules', Rule, Rule.chapters.through)
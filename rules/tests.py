@@ -1,3 +1,41 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from chapters.models import Chapter
+from .index import get_index
+from .models import Rule
+
+
+class RuleIndexTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        admin = User.objects.create_user(username='admin', password='testpass123', is_staff=True)
+        self.home = Chapter.objects.create(name='Home', created_by=admin)
+        self.away = Chapter.objects.create(name='Away', created_by=admin)
+        self.everywhere = Rule.objects.create(title='Everywhere', description='Be kind', order=2)
+        self.home_rule = Rule.objects.create(title='Home only', description='Water the plants', order=1)
+        self.home_rule.chapters.add(self.home)
+        self.both = Rule.objects.create(title='Both', description='Recycle', order=3)
+        self.both.chapters.add(self.home, self.away)
+        Rule.objects.create(title='Retired', description='Old rule', is_active=False)
+
+    def test_rules_for_chapters_in_display_order(self):
+        """Test that a chapter gets the global rules plus its own, ordered and without duplicates"""
+        index = get_index()
+        self.assertEqual(index.for_chapters([self.home.pk]), [self.home_rule, self.everywhere, self.both])
+        self.assertEqual(index.for_chapters([self.home.pk, self.away.pk]), [self.home_rule, self.everywhere, self.both])
+        self.assertEqual(index.for_chapters([self.away.pk]), [self.everywhere, self.both])
+        with self.assertNumQueries(0):
+            get_index()
+
+    def test_rebuilt_when_rules_or_their_chapters_change(self):
+        """Test that saves and m2m changes invalidate the cached index"""
+        get_index()
+        self.home_rule.chapters.add(self.away)
+        self.assertIn(self.home_rule, get_index().for_chapters([self.away.pk]))
+
+        self.both.is_active = False
+        self.both.save()
+        self.assertNotIn(self.both, get_index().for_chapters([self.away.pk]))
+
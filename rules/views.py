@@ -1,7 +1,6 @@
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
-from .models import Rule
+from .index import get_index
 from chapters.models import Chapter
 
 # Create your views here.
@@ -14,16 +13,12 @@ def rules_list(request):
     # Get all active chapters for the filter
     chapters = Chapter.objects.all()
     
-    # Base query for active rules
-    rules_query = Rule.objects.filter(is_active=True)
-    
-    # If specific chapters are selected, filter rules for those chapters
+    # Served from the cached index, with no chapters join or distinct()
+    index = get_index()
     if selected_chapter_ids:
-        rules_query = rules_query.filter(
-            Q(chapters__id__in=selected_chapter_ids) | Q(chapters__isnull=True)
-        ).distinct()
-    
-    active_rules = rules_query.order_by('order', '-created_at')
+        active_rules = index.for_chapters([int(id) for id in selected_chapter_ids])
+    else:
+        active_rules = index.all()
     
     return render(request, 'rules/rules_list.html', {
         'rules': active_rules,
@@ -1,6 +1,6 @@
-from .models import SiteSettings
+from core.user_status import get_user_status
 
 def site_settings(request):
     return {
-        'site_settings': SiteSettings.get_settings()
-    } 
\ No newline at end of file
+        'site_settings': get_user_status(request).site_settings
+    }
@@ -1,5 +1,6 @@
 from django.db import models
 from django.core.exceptions import ValidationError
+from core import versioned_cache
 
 class SiteSettings(models.Model):
     logo = models.ImageField(upload_to='site_settings/', null=True, blank=True)
@@ -16,4 +17,7 @@ class SiteSettings(models.Model):
 
     @classmethod
     def get_settings(cls):
-        return cls.objects.first()
+        return versioned_cache.get('site_settings', cls.objects.first)
+
+
+versioned_cache.register('site_settings', SiteSettings)
@@ -64,15 +64,18 @@ INSTALLED_APPS = [
     'todos',
     'chapter_transfers',
     'maintenance.apps.MaintenanceConfig',
+    'jobs',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.QueryInstrumentationMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware', 
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.UserStatusMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -96,6 +99,7 @@ TEMPLATES = [
                 'colivers.context_processors.coliver_status',
                 'site_settings.context_processors.site_settings',
                 'applications.context_processors.user_applications',
+                'core.context_processors.user_data_version',
             ],
         },
     },
@@ -124,6 +128,70 @@ else:
     }
 
 
+# Cache
+# Defaults to per-process memory, which is only right for a single process. Versioned
+# cache invalidations must reach every web and job worker, so render.yaml points
+# CACHE_URL at a shared Redis, and the core.W001 check warns on Render without one.
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://')
+}
+
+
+# Background jobs
+# Queued jobs are run by `python manage.py run_workers`. Locally (and in tests) they
+# run as soon as they are enqueued, so no worker process is needed.
+
+JOBS_SYNC = env.bool('JOBS_SYNC', default=not RENDER)
+
+
+# Query budgets
+# Maximum number of queries per URL, enforced by core.tests.QueryBudgetTestCase.
+
+QUERY_BUDGETS_FILE = BASE_DIR / 'query_budgets.json'
+
+
+# Logging
+# JSON lines on Render, readable lines locally. LOG_LEVEL applies to the project's
+# own loggers; the per-request query stats are sampled at LOG_QUERY_SAMPLE_RATE.
+
+LOG_LEVEL = env('LOG_LEVEL', default='INFO')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {'()': 'core.log.JSONFormatter'},
+        'plain': {'format': '%(levelname)s %(name)s: %(message)s'},
+    },
+    'filters': {
+        'sample_hot_paths': {
+            '()': 'core.log.SamplingFilter',
+            'rate': env.float('LOG_QUERY_SAMPLE_RATE', default=0.1),
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'json' if RENDER else 'plain',
+        },
+        'sampled_console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'json' if RENDER else 'plain',
+            'filters': ['sample_hot_paths'],
+        },
+    },
+    'root': {'handlers': ['console'], 'level': 'WARNING'},
+    'loggers': {
+        **{
+            app: {'handlers': ['console'], 'level': LOG_LEVEL, 'propagate': False}
+            for app in ('applications', 'chapters', 'colivers', 'jobs', 'payments', 'userprofile')
+        },
+        'core.queries': {'handlers': ['sampled_console'], 'level': LOG_LEVEL, 'propagate': False},
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -46,8 +46,8 @@ class TodoAdmin(BaseTodoAdmin):
     actions = ['mark_completed']
     
     def mark_completed(self, request, queryset):
-        for todo in queryset:
-            todo.mark_as_completed()
+        count = queryset.complete()
+        self.message_user(request, f"Marked {count} task(s) as completed.")
     mark_completed.short_description = "Mark selected tasks as completed"
 
 @admin.register(CompletedTodo)
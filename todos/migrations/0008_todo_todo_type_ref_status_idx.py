@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 08:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todos', '0007_remove_priority_field'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(fields=['task_type', 'reference_id', 'status'], name='todo_type_ref_status_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2 on 2026-10-18 08:30
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.utils import timezone
+
+
+def complete_duplicate_pending_todos(apps, schema_editor):
+    """Keep the oldest pending todo per (task_type, reference_id) and complete the rest."""
+    Todo = apps.get_model('todos', 'Todo')
+    duplicated = (
+        Todo.objects.filter(status='pending', reference_id__isnull=False)
+        .order_by()
+        .values('task_type', 'reference_id')
+        .annotate(pending=Count('pk'))
+        .filter(pending__gt=1)
+    )
+    now = timezone.now()
+    for group in duplicated:
+        todos = Todo.objects.filter(
+            status='pending', task_type=group['task_type'], reference_id=group['reference_id']
+        ).order_by('created_at', 'pk')
+        keep = todos.values_list('pk', flat=True)[0]
+        todos.exclude(pk=keep).update(status='completed', completed_at=now, updated_at=now)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todos', '0008_todo_todo_type_ref_status_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(complete_duplicate_pending_todos, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='todo',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('task_type', 'reference_id'), name='unique_pending_todo'),
+        ),
+    ]
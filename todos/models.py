@@ -1,7 +1,38 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.dispatch import Signal
 from django.utils import timezone
 
+# Sent once per TodoQuerySet.complete() call with `count` and `completed_at`
+todos_completed = Signal()
+
+
+class TodoQuerySet(models.QuerySet):
+    def pending(self):
+        return self.filter(status='pending')
+
+    def create_pending(self, **fields):
+        """
+        Insert a pending todo unless one is already pending for the same task_type
+        and reference_id. This is one INSERT ... ON CONFLICT DO NOTHING (INSERT OR
+        IGNORE on SQLite) against the unique_pending_todo constraint, so it is safe
+        under concurrent saves and needs no existence check first.
+        """
+        self.bulk_create([self.model(status='pending', **fields)], ignore_conflicts=True)
+
+    def complete(self):
+        """
+        Mark every pending todo in the queryset as completed with a single UPDATE.
+        No per-row save signals are sent; todos_completed is sent once instead.
+        Returns the number of todos completed.
+        """
+        now = timezone.now()
+        count = self.pending().update(status='completed', completed_at=now, updated_at=now)
+        if count:
+            todos_completed.send(sender=self.model, count=count, completed_at=now)
+        return count
+
+
 class Todo(models.Model):
     TASK_TYPES = [
         ('application_review', 'Application Review'),
@@ -29,10 +60,24 @@ class Todo(models.Model):
     reference_id = models.CharField(max_length=100, null=True, blank=True, help_text='ID of the related application/payment')
     coliver_name = models.CharField(max_length=255, null=True, blank=True, help_text='Name of the person associated with this task')
 
+    objects = TodoQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Todo'
         verbose_name_plural = 'Todos'
+        indexes = [
+            # Todos for a given object, e.g. the pending review for a payment
+            models.Index(fields=['task_type', 'reference_id', 'status'], name='todo_type_ref_status_idx'),
+        ]
+        constraints = [
+            # At most one open task per object; see TodoQuerySet.create_pending
+            models.UniqueConstraint(
+                fields=['task_type', 'reference_id'],
+                condition=models.Q(status='pending'),
+                name='unique_pending_todo',
+            ),
+        ]
 
     def __str__(self):
         return self.title
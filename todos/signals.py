@@ -9,8 +9,8 @@ def create_application_todo(sender, instance, created, **kwargs):
     applicant_name = f"{instance.first_name} {instance.last_name}"
     
     if created:
-        # Create a todo for new applications
-        Todo.objects.create(
+        # Create a todo for new applications, unless one is already pending for this id
+        Todo.objects.create_pending(
             title=f'Review application for {applicant_name}',
             description=f'New application submitted by {applicant_name} needs review.',
             task_type='application_review',
@@ -18,8 +18,8 @@ def create_application_todo(sender, instance, created, **kwargs):
             coliver_name=applicant_name
         )
     elif instance.status == 'proof_submitted' and instance.application_status != 'approved':
-        # Create a todo when proof is submitted
-        Todo.objects.create(
+        # Create a todo when proof is submitted, unless one is still pending
+        Todo.objects.create_pending(
             title=f'Review proof for {applicant_name}',
             description=f'Application proof submitted by {applicant_name} needs review.',
             task_type='application_review',
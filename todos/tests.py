@@ -1,3 +1,82 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
 from django.test import TestCase
 
-# Create your tests here.
+from applications.models import Application
+from core import user_data
+from maintenance.models import MaintenanceRequest
+from .models import Todo, todos_completed
+
+
+class TodoCompleteTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='resident', password='testpass123')
+
+    def create_todo(self, reference_id, task_type='maintenance_review', status='pending'):
+        return Todo.objects.create(
+            title='Review', description='', task_type=task_type, reference_id=reference_id, status=status
+        )
+
+    def test_complete_runs_one_update_and_one_notification(self):
+        """Test that completing a queryset is a single UPDATE and a single signal"""
+        for i in range(5):
+            self.create_todo(str(i))
+        already_done = self.create_todo('9', status='completed')
+        received = []
+        todos_completed.connect(lambda sender, **kwargs: received.append(kwargs['count']), weak=False, dispatch_uid='test')
+        self.addCleanup(todos_completed.disconnect, dispatch_uid='test')
+
+        with self.assertNumQueries(1):
+            count = Todo.objects.all().complete()
+
+        self.assertEqual(count, 5)
+        self.assertEqual(received, [5])
+        self.assertFalse(Todo.objects.pending().exists())
+        self.assertFalse(Todo.objects.filter(completed_at__isnull=True).exclude(pk=already_done.pk).exists())
+
+    def test_completed_maintenance_request_only_invalidates_its_owner(self):
+        """Test that completing a maintenance request completes its todos and bumps only the owner's data version"""
+        other = User.objects.create_user(username='other', password='testpass123')
+        request = MaintenanceRequest.objects.create(title='Leak', description='Kitchen tap', created_by=self.user)
+        self.create_todo(str(request.pk), task_type='maintenance_verification')
+        cache.set('unrelated', 'kept')
+        own_version = user_data.get_version(self.user.pk)
+        other_version = user_data.get_version(other.pk)
+
+        request.status = 'completed'
+        request.save()
+
+        self.assertFalse(Todo.objects.filter(reference_id=str(request.pk)).pending().exists())
+        self.assertNotEqual(user_data.get_version(self.user.pk), own_version)
+        self.assertEqual(user_data.get_version(other.pk), other_version)
+        self.assertEqual(cache.get('unrelated'), 'kept')
+
+
+class TodoDeduplicationTestCase(TestCase):
+    def test_create_pending_is_a_single_idempotent_insert(self):
+        """Test that only one todo per object can be pending, and a new one may follow a completed one"""
+        with self.assertNumQueries(1):
+            Todo.objects.create_pending(title='Review', description='', task_type='payment_review', reference_id='7')
+        Todo.objects.create_pending(title='Review again', description='', task_type='payment_review', reference_id='7')
+        Todo.objects.create_pending(title='Other', description='', task_type='maintenance_review', reference_id='7')
+        self.assertEqual(Todo.objects.filter(task_type='payment_review', reference_id='7').count(), 1)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Todo.objects.create(title='Duplicate', description='', task_type='payment_review', reference_id='7')
+
+        Todo.objects.filter(task_type='payment_review', reference_id='7').complete()
+        Todo.objects.create_pending(title='Review', description='', task_type='payment_review', reference_id='7')
+        self.assertEqual(Todo.objects.filter(task_type='payment_review', reference_id='7').pending().count(), 1)
+        self.assertEqual(Todo.objects.filter(task_type='payment_review', reference_id='7').count(), 2)
+
+    def test_new_application_skips_an_already_pending_review(self):
+        """Test that saving a new application does not fail when its review todo already exists"""
+        user = User.objects.create_user(username='applicant', password='testpass123')
+        Todo.objects.create(title='Seeded', description='', task_type='application_review', reference_id='500')
+
+        Application.objects.create(pk=500, created_by=user, first_name='A', last_name='B', email='a@example.com')
+
+        self.assertEqual(Todo.objects.filter(task_type='application_review', reference_id='500').count(), 1)
+
@@ -0,0 +1,35 @@
+# Generated by Django 5.2 on 2026-10-18 08:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_current_coliver(apps, schema_editor):
+    """Give every user with a coliver record a profile pointing at their latest one."""
+    Coliver = apps.get_model('colivers', 'Coliver')
+    Userprofile = apps.get_model('userprofile', 'Userprofile')
+
+    user_ids = set(Coliver.objects.exclude(user=None).order_by().values_list('user_id', flat=True).distinct())
+    user_ids -= set(Userprofile.objects.values_list('user_id', flat=True))
+    Userprofile.objects.bulk_create([Userprofile(user_id=user_id) for user_id in user_ids], batch_size=1000)
+
+    latest = Coliver.objects.filter(user_id=OuterRef('user_id')).order_by('-created_at').values('pk')[:1]
+    Userprofile.objects.update(current_coliver=Subquery(latest))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('colivers', '0010_coliver_coliver_user_created_idx'),
+        ('userprofile', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='current_coliver',
+            field=models.ForeignKey(blank=True, help_text="The user's most recent coliver record", null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='current_profiles', to='colivers.coliver'),
+        ),
+        migrations.RunPython(backfill_current_coliver, migrations.RunPython.noop),
+    ]
@@ -2,4 +2,13 @@ from django.db import models
 from django.contrib.auth.models import User
 
 class Userprofile(models.Model):
-    user = models.OneToOneField(User, related_name='userprofile', on_delete=models.CASCADE)
\ No newline at end of file
+    user = models.OneToOneField(User, related_name='userprofile', on_delete=models.CASCADE)
+    # Kept in sync by the Coliver signals in colivers/models.py
+    current_coliver = models.ForeignKey(
+        'colivers.Coliver',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='current_profiles',
+        help_text="The user's most recent coliver record"
+    )
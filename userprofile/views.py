@@ -1,9 +1,13 @@
+import logging
+
 from django.shortcuts import render, redirect
 from django.contrib.auth import logout, login
 
 from .models import Userprofile
 from .forms import CustomUserCreationForm
 
+logger = logging.getLogger(__name__)
+
 def signup(request):
     if request.method == 'POST':
         form = CustomUserCreationForm(request.POST)
@@ -14,7 +18,7 @@ def signup(request):
             login(request, user)  # Log in the user immediately after signup
             return redirect('applications_list')  # Redirect to applications page
         else:
-            print('Form errors:', form.errors)
+            logger.info('Signup form rejected: %s', list(form.errors))
         
     else:
         form = CustomUserCreationForm()